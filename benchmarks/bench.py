@@ -0,0 +1,294 @@
+""" Benchmarks the client against a local mock of space-track.org.
+
+Each scenario runs against a MockSpaceTrack on localhost, so results measure
+the client rather than the network or space-track.org's rate limits::
+
+    python benchmarks/bench.py                        # every scenario
+    python benchmarks/bench.py --records 20000 --latency 0.02 submit parse
+    python benchmarks/bench.py --save baseline.json
+    python benchmarks/bench.py --compare baseline.json --tolerance 0.2
+
+The scenarios are:
+
+    submit: queries per second, and p50/p99 latency, of single-object
+        queries from several threads through a persistent session.
+    catalog: the same for whole-catalog pulls, in each result format.
+    parse: records per second parsed from each format, as dicts, as
+        TleRecords and as NumPy columns, with no network involved.
+    cache: queries per second answered by a ResponseCache.
+    build: queries built, and URLs compiled, per second, with no network
+        involved.
+    throttle: how long a burst takes when the server answers 429.
+
+Peak resident memory is reported after each scenario. With --compare, the
+run fails if any rate drops, or any latency grows, by more than the
+tolerance.
+
+"""
+
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import resource
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mockserver import MockSpaceTrack  # noqa: E402
+from spacetracktool import (ResponseCache, RetryPolicy,  # noqa: E402
+                            SpaceTrackClient)
+from spacetracktool import columns, parsers  # noqa: E402
+from spacetracktool.records import parse_records  # noqa: E402
+from spacetracktool.spacetrackclient import _make_response  # noqa: E402
+
+
+FORMATS = ('json', 'csv', 'tle', '3le')
+
+# Units whose values are better when smaller.
+LOWER_IS_BETTER = ('ms', 'MiB', 's')
+
+
+def percentile(values: list, fraction: float) -> float:
+    """ Returns a percentile of a list of numbers, by nearest rank. """
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(fraction * len(ordered)))
+                                      - 1))
+    return ordered[index]
+
+
+def peak_rss() -> float:
+    """ Returns the peak resident memory of this process in MiB. """
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 2 ** 20 if sys.platform == 'darwin' else peak / 2 ** 10
+
+
+def best_rate(function, count: int, repeat: int = 3) -> float:
+    """ Returns items per second for the fastest of several calls. """
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return count / best
+
+
+def timed_queries(function, arguments: list, threads: int) -> tuple:
+    """ Calls a function once per argument from a pool of threads.
+
+    Returns:
+        Tuple of the total wall time and the list of per-call latencies, both
+        in seconds.
+
+    """
+    def call(argument):
+        start = time.perf_counter()
+        function(argument)
+        return time.perf_counter() - start
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        latencies = list(pool.map(call, arguments))
+    return time.perf_counter() - start, latencies
+
+
+def latency_results(name: str, elapsed: float, latencies: list) -> list:
+    """ Returns the rate and latency results of a timed run. """
+    return [(name + ' rate', len(latencies) / elapsed, 'queries/s'),
+            (name + ' p50', percentile(latencies, 0.5) * 1e3, 'ms'),
+            (name + ' p99', percentile(latencies, 0.99) * 1e3, 'ms')]
+
+
+def bench_submit(server: MockSpaceTrack, args) -> list:
+    """ Times single-object queries through a persistent session. """
+    with server.client('user', 'pass', persistent=True,
+                       pool_size=args.threads) as client:
+        queries = [client.build_query('tle_latest', ordinal=1,
+                                      norad_cat_id=10000 + i % args.records)
+                   for i in range(args.queries)]
+        client.submit(queries[0])  # log in before timing
+        elapsed, latencies = timed_queries(client.submit, queries,
+                                           args.threads)
+    return latency_results('submit', elapsed, latencies)
+
+
+def bench_catalog(server: MockSpaceTrack, args) -> list:
+    """ Times whole-catalog pulls in each format. """
+    results = []
+    count = max(1, args.queries // 10)
+    for fmt in FORMATS:
+        with server.client('user', 'pass', fmt=fmt, persistent=True,
+                           pool_size=args.threads) as client:
+            query = client.build_query('tle_latest', ordinal=1)
+            sent = server.bytes_sent
+            client.submit(query)  # log in and render the body before timing
+            size = server.bytes_sent - sent
+            elapsed, latencies = timed_queries(
+                lambda q: client.submit(q).content, [query] * count,
+                args.threads)
+        results.extend(latency_results('catalog ' + fmt, elapsed, latencies))
+        results.append(('catalog {} wire size'.format(fmt), size / 2 ** 10,
+                        'KiB'))
+    return results
+
+
+def bench_parse(server: MockSpaceTrack, args) -> list:
+    """ Times parsing of a whole catalog in each format. """
+    results = []
+    for fmt in FORMATS:
+        body = server.payload(fmt, args.records)
+
+        def rows(fmt=fmt, body=body):
+            response = _make_response('format/' + fmt, 200, body)
+            return parsers.iter_records(response, fmt)
+
+        rate = best_rate(lambda: sum(1 for _ in rows()), args.records)
+        results.append(('parse {} rows'.format(fmt), rate, 'records/s'))
+        rate = best_rate(lambda: sum(1 for _ in parse_records(rows())),
+                         args.records)
+        results.append(('parse {} TleRecords'.format(fmt), rate, 'records/s'))
+        if columns.np is not None:
+            rate = best_rate(lambda: columns.from_response(body, fmt),
+                             args.records)
+            results.append(('parse {} columns'.format(fmt), rate,
+                            'records/s'))
+    return results
+
+
+def bench_cache(server: MockSpaceTrack, args) -> list:
+    """ Times repeated queries answered from a ResponseCache. """
+    with server.client('user', 'pass', persistent=True,
+                       cache=ResponseCache()) as client:
+        queries = [client.build_query('tle_latest', ordinal=1,
+                                      norad_cat_id=10000 + i % 10)
+                   for i in range(args.queries)]
+        for query in queries[:10]:
+            client.submit(query)  # fill the cache
+        elapsed, latencies = timed_queries(client.submit, queries,
+                                           args.threads)
+    return latency_results('cache', elapsed, latencies)
+
+
+def bench_build(server: MockSpaceTrack, args) -> list:
+    """ Times building queries and compiling their URLs. """
+    client = SpaceTrackClient('user', 'pass', rate_limit=False)
+    count = args.queries * 100
+    ids = range(count)
+
+    def build(request_class, key='norad_cat_id', **kwargs):
+        for value in ids:
+            kwargs[key] = value
+            client.build_query(request_class, **kwargs)
+
+    queries = [client.build_query('tle', norad_cat_id=norad_id,
+                                  epoch='>now-30', orderby='EPOCH desc')
+               for norad_id in ids]
+
+    def compile_urls():
+        for query in queries:
+            query.url  # pylint: disable=pointless-statement
+
+    return [('build tle_latest rate',
+             best_rate(lambda: build('tle_latest', ordinal=1), count),
+             'queries/s'),
+            ('build satcat rate', best_rate(lambda: build('satcat'), count),
+             'queries/s'),
+            ('build cdm rate', best_rate(lambda: build('cdm', 'cdm_id'), count),
+             'queries/s'),
+            ('build url rate', best_rate(compile_urls, count), 'queries/s')]
+
+
+def bench_throttle(server: MockSpaceTrack, args) -> list:
+    """ Times a burst of queries against a throttling server. """
+    server.throttle = (max(1, args.queries // 4), 0.5)
+    try:
+        with server.client('user', 'pass', persistent=True,
+                           retry=RetryPolicy(max_retries=20, backoff=0.05,
+                                             max_backoff=0.5, budget=None),
+                           circuit_breaker=None) as client:
+            client.submit(client.build_query('tle_latest', norad_cat_id=1))
+            throttled = server.throttled
+            queries = [client.build_query('tle_latest', ordinal=1,
+                                          norad_cat_id=10000 + i)
+                       for i in range(args.queries)]
+            # The client reports every retry; keep the results table legible.
+            with contextlib.redirect_stdout(io.StringIO()):
+                elapsed, _ = timed_queries(client.submit, queries,
+                                           args.threads)
+    finally:
+        server.throttle = None
+    return [('throttle burst time', elapsed, 's'),
+            ('throttle 429 responses', server.throttled - throttled, 'count')]
+
+
+SCENARIOS = {'submit': bench_submit, 'catalog': bench_catalog,
+             'parse': bench_parse, 'cache': bench_cache,
+             'build': bench_build, 'throttle': bench_throttle}
+
+
+def compare(results: list, baseline: dict, tolerance: float) -> list:
+    """ Returns descriptions of results that regressed from a baseline. """
+    regressions = []
+    for name, value, unit in results:
+        old = baseline.get(name)
+        if old is None or unit == 'count' or unit == 'KiB':
+            continue
+        if unit in LOWER_IS_BETTER:
+            worse = value > old * (1. + tolerance)
+        else:
+            worse = value < old * (1. - tolerance)
+        if worse:
+            regressions.append('{}: {:.4g} {} (baseline {:.4g})'.format(
+                name, value, unit, old))
+    return regressions
+
+
+def main(argv=None) -> int:
+    """ Runs the benchmarks, returning the exit status. """
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('scenarios', nargs='*', choices=[[]] + list(SCENARIOS),
+                        help='scenarios to run (default: all)')
+    parser.add_argument('--records', type=int, default=5000,
+                        help='element sets in a whole-catalog result')
+    parser.add_argument('--queries', type=int, default=500,
+                        help='queries per timed run')
+    parser.add_argument('--threads', type=int, default=8,
+                        help='threads sending queries')
+    parser.add_argument('--latency', type=float, default=0.,
+                        help='seconds the server waits before answering')
+    parser.add_argument('--no-compress', action='store_true',
+                        help='never compress server responses')
+    parser.add_argument('--save', help='write the results to a JSON file')
+    parser.add_argument('--compare', help='JSON file of baseline results')
+    parser.add_argument('--tolerance', type=float, default=0.2,
+                        help='allowed fractional regression (default 0.2)')
+    args = parser.parse_args(argv)
+    results = []
+    with MockSpaceTrack(records=args.records, latency=args.latency,
+                        compress=not args.no_compress) as server:
+        for name in args.scenarios or SCENARIOS:
+            scenario = SCENARIOS[name](server, args)
+            scenario.append((name + ' peak RSS', peak_rss(), 'MiB'))
+            for result in scenario:
+                print('{:<32} {:>14.4g} {}'.format(*result))
+            results.extend(scenario)
+    if args.save:
+        with open(args.save, 'w') as out:
+            json.dump({name: value for name, value, _ in results}, out,
+                      indent=2)
+    if args.compare:
+        with open(args.compare) as baseline_file:
+            regressions = compare(results, json.load(baseline_file),
+                                  args.tolerance)
+        for regression in regressions:
+            print('REGRESSION ' + regression)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,395 @@
+""" A local stand-in for space-track.org, for benchmarks.
+
+The server answers logins at /ajaxauth/login and /ajaxauth/logout, and any
+query under /basicspacedata/query/ or /expandedspacedata/query/, with
+synthetic element sets in the requested format. Queries need the cookie set by
+a login, as on space-track.org, or may be posted to the login URL along with
+the credentials. Payload size, latency and throttling are configurable::
+
+    from mockserver import MockSpaceTrack
+
+    with MockSpaceTrack(records=5000, latency=0.02) as server:
+        client = server.client('user', 'pass', persistent=True)
+        result = client.tle_latest_query(ordinal=1)
+
+Queries return every record, or those matching a NORAD_CAT_ID list predicate
+(synthetic objects are numbered from 10000), or as many as a limit allows.
+Run this module to serve until interrupted::
+
+    python benchmarks/mockserver.py --port 8080 --records 20000
+
+"""
+
+
+import argparse
+import csv
+import gzip
+import io
+import json
+import os
+import sys
+import threading
+import time
+import uuid
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from spacetracktool import SpaceTrackClient  # noqa: E402
+
+
+FORMATS = ('json', 'csv', 'xml', 'tle', '3le')
+
+
+def _checksum(line: str) -> str:
+    """ Returns the modulo-10 checksum digit of a TLE line. """
+    total = sum(int(char) if char.isdigit() else char == '-'
+                for char in line[:68])
+    return str(total % 10)
+
+
+def make_elset(index: int) -> dict:
+    """ Builds a plausible, valid element set for a synthetic object.
+
+    Args:
+        index: number of the object, from 0.
+
+    Returns:
+        A record dict as returned by space-track.org in the 'json' format.
+
+    """
+    norad_id = 10000 + index
+    inclination = 20. + (index * 7.3) % 80.
+    raan = (index * 13.7) % 360.
+    eccentricity = 0.0001 + (index % 97) * 0.0003
+    arg_perigee = (index * 29.1) % 360.
+    mean_anomaly = (index * 41.9) % 360.
+    mean_motion = 11.5 + (index % 47) * 0.09
+    day = 1. + (index % 300) + (index % 1000) / 1000.
+    line1 = ('1 {:05d}U 18{:03d}A   18{:012.8f}  .00001000  00000-0  '
+             '10000-4 0  999'.format(norad_id, 1 + index % 999, day))
+    line2 = ('2 {:05d} {:8.4f} {:8.4f} {:07d} {:8.4f} {:8.4f} {:11.8f}'
+             '{:5d}'.format(norad_id, inclination, raan,
+                            int(round(eccentricity * 1e7)), arg_perigee,
+                            mean_anomaly, mean_motion, index % 100000))
+    line1 += _checksum(line1)
+    line2 += _checksum(line2)
+    epoch = time.strftime('%Y-%m-%d %H:%M:%S', time.gmtime(
+        1514764800 + (day - 1.) * 86400.))
+    return {
+        'ORDINAL': '1', 'COMMENT': 'GENERATED VIA SPACETRACK.ORG API',
+        'ORIGINATOR': 'JSPOC', 'NORAD_CAT_ID': str(norad_id),
+        'OBJECT_NAME': 'OBJECT {}'.format(index), 'OBJECT_TYPE': 'PAYLOAD',
+        'CLASSIFICATION_TYPE': 'U',
+        'INTLDES': '18{:03d}A'.format(1 + index % 999), 'EPOCH': epoch,
+        'EPOCH_MICROSECONDS': '0', 'MEAN_MOTION': '{:.8f}'.format(mean_motion),
+        'ECCENTRICITY': '{:.7f}'.format(eccentricity),
+        'INCLINATION': '{:.4f}'.format(inclination),
+        'RA_OF_ASC_NODE': '{:.4f}'.format(raan),
+        'ARG_OF_PERICENTER': '{:.4f}'.format(arg_perigee),
+        'MEAN_ANOMALY': '{:.4f}'.format(mean_anomaly),
+        'EPHEMERIS_TYPE': '0', 'ELEMENT_SET_NO': '999',
+        'REV_AT_EPOCH': str(index % 100000), 'BSTAR': '0.0001',
+        'MEAN_MOTION_DOT': '1e-05', 'MEAN_MOTION_DDOT': '0',
+        'FILE': str(2000000 + index), 'TLE_LINE0': '0 OBJECT {}'.format(index),
+        'TLE_LINE1': line1, 'TLE_LINE2': line2,
+    }
+
+
+def encode(body: bytes, coding: str) -> bytes:
+    """ Compresses a body with the 'gzip' or 'deflate' coding, or None. """
+    if coding == 'gzip':
+        return gzip.compress(body, compresslevel=6)
+    if coding == 'deflate':
+        return zlib.compress(body, 6)
+    return body
+
+
+def render(rows: list, fmt: str) -> bytes:
+    """ Renders records in one of the FORMATS. """
+    if fmt == 'json':
+        return json.dumps(rows).encode()
+    if fmt == 'csv':
+        out = io.StringIO()
+        if rows:
+            writer = csv.DictWriter(out, fieldnames=list(rows[0]),
+                                    lineterminator='\r\n')
+            writer.writeheader()
+            writer.writerows(rows)
+        return out.getvalue().encode()
+    if fmt == 'xml':
+        items = ''.join('<item>{}</item>'.format(''.join(
+            '<{0}>{1}</{0}>'.format(key, value) for key, value in row.items()))
+            for row in rows)
+        return '<?xml version="1.0"?><xml>{}</xml>'.format(items).encode()
+    keys = ('TLE_LINE0', 'TLE_LINE1', 'TLE_LINE2') if fmt == '3le' else \
+        ('TLE_LINE1', 'TLE_LINE2')
+    return ''.join('\r\n'.join(row[key] for key in keys) + '\r\n'
+                   for row in rows).encode()
+
+
+class MockSpaceTrack:
+    """ Threaded local HTTP server imitating space-track.org.
+
+    Kwargs:
+        records: the number of element sets returned by a catalog-wide query.
+            Default is 1000.
+        latency: seconds added to every response. Default is 0.
+        throttle: (count, period) to answer with 429 once more than `count`
+            queries arrive in `period` seconds, or None. Default is None.
+        compress: if True, gzip or deflate responses when the client asks.
+            Default is True.
+        host: the interface to listen on. Default is '127.0.0.1'.
+        port: the port to listen on, or 0 for any free port. Default is 0.
+
+    """
+
+    def __init__(self, records: int = 1000, latency: float = 0.,
+                 throttle: tuple = None, compress: bool = True,
+                 host: str = '127.0.0.1', port: int = 0):
+        self.latency = latency
+        self.throttle = throttle
+        self.compress = compress
+        self.rows = [make_elset(i) for i in range(records)]
+        self.requests = 0  # queries answered, including throttled ones
+        self.throttled = 0
+        self.bytes_sent = 0
+        self._payloads = {}  # (fmt, count) -> rendered body
+        self._sessions = set()
+        self._arrivals = []
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), _make_handler(self))
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base(self) -> str:
+        """ Returns the base URL of the server. """
+        host, port = self._server.server_address[:2]
+        return 'http://{}:{}'.format(host, port)
+
+    def client(self, *args, client_class=SpaceTrackClient, **kwargs):
+        """ Returns a client that sends its queries to this server.
+
+        Args and keyword args are passed to the client, except that
+        rate_limit defaults to False.
+
+        Kwargs:
+            client_class: the client class to point at the server. Default is
+                SpaceTrackClient.
+
+        """
+        local = type('Local' + client_class.__name__, (client_class,), {
+            '_base': self.base,
+            '_login_url': self.base + '/ajaxauth/login',
+            '_logout_url': self.base + '/ajaxauth/logout',
+        })
+        kwargs.setdefault('rate_limit', False)
+        return local(*args, **kwargs)
+
+    def start(self):
+        """ Serves requests from a background thread. """
+        self._thread = threading.Thread(target=self._server.serve_forever,
+                                        daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """ Stops serving and closes the socket. """
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+    def payload(self, fmt: str, count: int, coding: str = None) -> bytes:
+        """ Returns the rendered body for the first `count` records.
+
+        Bodies are rendered and compressed once, then reused, so that the
+        server's own work does not dominate the timings.
+
+        """
+        key = (fmt, count, coding)
+        with self._lock:
+            body = self._payloads.get(key)
+        if body is None:
+            body = encode(render(self.rows[:count], fmt), coding)
+            with self._lock:
+                self._payloads[key] = body
+        return body
+
+    def login(self, form: dict) -> str:
+        """ Checks a login form, returning a new session ID or None. """
+        if not form.get('identity') or not form.get('password'):
+            return None
+        session = uuid.uuid4().hex
+        with self._lock:
+            self._sessions.add(session)
+        return session
+
+    def is_session(self, session: str) -> bool:
+        """ Returns True if a session ID came from a login. """
+        with self._lock:
+            return session in self._sessions
+
+    def admit(self) -> bool:
+        """ Counts a query, returning False if it should be throttled. """
+        now = time.monotonic()
+        with self._lock:
+            self.requests += 1
+            if self.throttle is None:
+                return True
+            count, period = self.throttle
+            while self._arrivals and self._arrivals[0] <= now - period:
+                self._arrivals.pop(0)
+            if len(self._arrivals) >= count:
+                self.throttled += 1
+                return False
+            self._arrivals.append(now)
+            return True
+
+    def answer(self, path: str, coding: str = None) -> tuple:
+        """ Returns the status and body answering a query path.
+
+        Args:
+            path: the query path or URL.
+
+        Kwargs:
+            coding: the content coding to compress the body with, or None.
+                Default is None.
+
+        """
+        parts = path.rstrip('/').split('/')
+        fmt = 'json'
+        if len(parts) > 1 and parts[-2] == 'format':
+            fmt = parts[-1]
+        if fmt not in FORMATS:
+            return 400, b'Unknown format', None
+        count = len(self.rows)
+        if 'limit' in parts[:-1]:
+            limit = parts[parts.index('limit') + 1].split(',')[0]
+            count = min(count, int(limit))
+        if 'NORAD_CAT_ID' in parts[:-1]:
+            rows = self.select(parts[parts.index('NORAD_CAT_ID') + 1])
+            return 200, encode(render(rows[:count], fmt), coding), coding
+        return 200, self.payload(fmt, count, coding), coding
+
+    def select(self, ids: str) -> list:
+        """ Returns the records matching a NORAD_CAT_ID list predicate. """
+        rows = []
+        for term in ids.split(','):
+            low, _, high = term.partition('--')
+            if not low.isdigit() or (high and not high.isdigit()):
+                continue
+            start = max(int(low) - 10000, 0)
+            stop = max(int(high or low) - 10000 + 1, 0)
+            rows.extend(self.rows[start:stop])
+        return rows
+
+
+def _make_handler(server: MockSpaceTrack):
+    """ Returns a request handler class bound to a MockSpaceTrack. """
+
+    class Handler(BaseHTTPRequestHandler):
+        """ Answers one HTTP request. """
+        protocol_version = 'HTTP/1.1'
+        disable_nagle_algorithm = True  # headers and body go out separately
+
+        def log_message(self, *args):  # pylint: disable=arguments-differ
+            pass
+
+        def _session(self) -> str:
+            cookie = self.headers.get('Cookie', '')
+            for part in cookie.split(';'):
+                name, _, value = part.strip().partition('=')
+                if name == 'chocolatechip':
+                    return value
+            return None
+
+        def _send(self, status: int, body: bytes, headers: dict = None):
+            if server.latency:
+                time.sleep(server.latency)
+            self.send_response(status)
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            with server._lock:  # pylint: disable=protected-access
+                server.bytes_sent += len(body)
+            self.wfile.write(body)
+
+        def _query(self, path: str):
+            if not server.admit():
+                self._send(429, b'Rate limit exceeded',
+                           {'Retry-After': '1'})
+                return
+            accept = self.headers.get('Accept-Encoding', '')
+            coding = None
+            if server.compress:
+                if 'gzip' in accept:
+                    coding = 'gzip'
+                elif 'deflate' in accept:
+                    coding = 'deflate'
+            status, body, coding = server.answer(path, coding)
+            headers = {'Content-Encoding': coding} if coding else {}
+            self._send(status, body, headers)
+
+        def do_GET(self):  # pylint: disable=invalid-name
+            if '/query/class/' not in self.path:
+                self._send(404, b'Not found')
+            elif not server.is_session(self._session()):
+                self._send(401, b'Unauthorized')
+            else:
+                self._query(self.path)
+
+        def do_POST(self):  # pylint: disable=invalid-name
+            length = int(self.headers.get('Content-Length', 0))
+            form = {key: values[0] for key, values in
+                    parse_qs(self.rfile.read(length).decode()).items()}
+            if self.path.endswith('/ajaxauth/logout'):
+                self._send(200, b'"Successfully logged out"')
+                return
+            if not self.path.endswith('/ajaxauth/login'):
+                self._send(404, b'Not found')
+                return
+            session = server.login(form)
+            if session is None:
+                self._send(200, b'{"Login":"Failed"}')
+            elif form.get('query'):
+                self._query(form['query'])
+            else:
+                self._send(200, b'""', {
+                    'Set-Cookie': 'chocolatechip={}; Path=/'.format(session)})
+
+    return Handler
+
+
+def main(argv=None):
+    """ Serves until interrupted. """
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--records', type=int, default=1000)
+    parser.add_argument('--latency', type=float, default=0.)
+    parser.add_argument('--throttle', type=float, nargs=2, default=None,
+                        metavar=('COUNT', 'PERIOD'))
+    args = parser.parse_args(argv)
+    server = MockSpaceTrack(records=args.records, latency=args.latency,
+                            throttle=args.throttle, host=args.host,
+                            port=args.port)
+    print('Serving {} element sets at {}'.format(args.records, server.base))
+    try:
+        server.start()
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -34,11 +34,11 @@ CLASSIFIERS = ['Development Status :: 5 - Production/Stable',
                'Operating System :: OS Independent',
                'Programming Language :: Python',
                'Programming Language :: Python :: 3',
-               'Programming Language :: Python :: 3.3',
-               'Programming Language :: Python :: 3.4',
-               'Programming Language :: Python :: 3.5',
-               'Programming Language :: Python :: 3.6',
-               'Programming Language :: Python :: 3.7',
+               'Programming Language :: Python :: 3.8',
+               'Programming Language :: Python :: 3.9',
+               'Programming Language :: Python :: 3.10',
+               'Programming Language :: Python :: 3.11',
+               'Programming Language :: Python :: 3.12',
                'Topic :: Scientific/Engineering',
                'Topic :: Scientific/Engineering :: Astronomy',
                'Topic :: Utilities']
@@ -46,8 +46,17 @@ KEYWORDS = 'space spacetrack elset tle satellite astronomy'
 PROJECT_URLS = {'Documentation': 'https://engineero.github.io/spacetracktool/',
                 'Source': 'https://github.com/Engineero/spacetracktool',
                 'Tracker': 'https://github.com/Engineero/spacetracktool/issues'}
+PYTHON_REQUIRES = '>=3.8'
 PACKAGES = find_packages(exclude=['contrib', 'docs', 'tests*'])
 INSTALL_REQUIRES = ['requests']
+EXTRAS_REQUIRE = {'async': ['aiohttp'],
+                  'brotli': ['brotli'],
+                  'numpy': ['numpy'],
+                  'parquet': ['pyarrow'],
+                  'prometheus': ['prometheus_client'],
+                  'screening': ['numpy', 'sgp4', 'scipy'],
+                  'sgp4': ['numpy', 'sgp4']}
+ENTRY_POINTS = {'console_scripts': ['spacetracktool = spacetracktool.__main__:main']}
 
 setup(name=NAME,
       version=VERSION,
@@ -61,7 +70,10 @@ setup(name=NAME,
       classifiers=CLASSIFIERS,
       keywords=KEYWORDS,
       project_urls=PROJECT_URLS,
+      python_requires=PYTHON_REQUIRES,
       packages=PACKAGES,
-      install_requires=INSTALL_REQUIRES)
+      install_requires=INSTALL_REQUIRES,
+      extras_require=EXTRAS_REQUIRE,
+      entry_points=ENTRY_POINTS)
 
 # setup(setup_requires=['pbr'], pbr=True)
@@ -1,17 +1,27 @@
-""" Module for making queries to space-track.org.
-
-The main entry point of the module is the SpaceTrackClient class. To start,
-create an instance of the SpaceTrackClient passing your username and password
-for space-track.org. You can sign up for a free account at space-track.org. ::
-
-    import spacetracktool as st
-    client = SpaceTrackClient('username', 'password')
-
-Any query class defined in the space-track.org API is implemented as a method
-of this client, but not all classes have been tested as of yet. If you find
-problems, please open an issue on the project's GitHub page or submit a pull
-request.
-
-"""
-from .spacetrackclient import SpaceTrackClient
-from ._version import __version__
+""" Module for making queries to space-track.org.
+
+The main entry point of the module is the SpaceTrackClient class. To start,
+create an instance of the SpaceTrackClient passing your username and password
+for space-track.org. You can sign up for a free account at space-track.org. ::
+
+    import spacetracktool as st
+    client = SpaceTrackClient('username', 'password')
+
+Any query class defined in the space-track.org API is implemented as a method
+of this client, but not all classes have been tested as of yet. If you find
+problems, please open an issue on the project's GitHub page or submit a pull
+request.
+
+An AsyncSpaceTrackClient with the same query methods is available for running
+many queries concurrently with asyncio (requires aiohttp). Both clients queue
+their queries through a RateLimiter to stay within space-track.org's limits,
+and retry transient failures as a RetryPolicy allows.
+
+"""
+from .spacetrackclient import SpaceTrackClient
+from .asyncclient import AsyncSpaceTrackClient
+from .cache import ResponseCache
+from .query import Query
+from .ratelimit import RateLimiter
+from .retry import CircuitBreaker, CircuitOpenError, RetryPolicy
+from ._version import __version__
@@ -0,0 +1,36 @@
+""" Runs the spacetracktool command line.
+
+Usage::
+
+    spacetracktool serve [options]       # see spacetracktool.proxy
+    spacetracktool coordinate [options]  # see spacetracktool.coordination
+
+Pass --help after a command for its options.
+
+"""
+
+
+import argparse
+import sys
+from . import coordination, proxy
+
+
+# Commands, each a function taking the remaining arguments and returning the
+# exit status.
+COMMANDS = {'serve': proxy.main, 'coordinate': coordination.main}
+
+
+def main(argv=None) -> int:
+    """ Runs one command, returning its exit status. """
+    parser = argparse.ArgumentParser(
+        prog='spacetracktool', description='Tools for space-track.org.')
+    parser.add_argument('command', choices=sorted(COMMANDS),
+                        help='the command to run')
+    parser.add_argument('args', nargs=argparse.REMAINDER,
+                        help='arguments of the command')
+    args = parser.parse_args(argv)
+    return COMMANDS[args.command](args.args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,633 @@
+""" Defines an asyncio client for space-track.org.
+
+The AsyncSpaceTrackClient has the same query methods as the SpaceTrackClient,
+but each one returns a coroutine. Queries are built as soon as the method is
+called, so many queries may be created up front and awaited together::
+
+    import asyncio
+    import spacetracktool as st
+
+    async def main(ids):
+        async with st.AsyncSpaceTrackClient('username', 'password') as client:
+            return await client.gather(
+                *(client.tle_latest_query(norad_cat_id=i, ordinal=1)
+                  for i in ids))
+
+    results = asyncio.run(main([25544, 43013]))
+
+This module requires aiohttp, which can be installed with::
+
+    pip install spacetracktool[async]
+
+"""
+
+
+import asyncio
+import datetime
+import gzip
+import os
+import time
+import requests
+from . import columns, parsers
+from .query import Query
+from .records import parse_records
+from .retry import RETRY_EXCEPTIONS, RETRY_STATUSES, parse_retry_after
+from .spacetrackclient import (ACCEPT_ENCODING, SpaceTrackClient,
+                               _cache_headers, _make_response,
+                               _merge_records, _url_format)
+
+try:
+    import aiohttp
+except ImportError:  # pragma: no cover
+    aiohttp = None
+
+
+def _trace_config():
+    """ Returns an aiohttp TraceConfig timing DNS lookups and connects.
+
+    The timings are stored in the dict passed to each request as its
+    trace_request_ctx.
+
+    """
+    def timer(name, end):
+        async def callback(session, context, params):
+            timings = context.trace_request_ctx
+            if timings is None:
+                return
+            now = time.perf_counter()
+            if end:
+                timings[name] = now - timings.pop(name + '_start', now)
+            else:
+                timings[name + '_start'] = now
+        return callback
+
+    trace = aiohttp.TraceConfig()
+    trace.on_dns_resolvehost_start.append(timer('dns', False))
+    trace.on_dns_resolvehost_end.append(timer('dns', True))
+    trace.on_connection_create_start.append(timer('connect', False))
+    trace.on_connection_create_end.append(timer('connect', True))
+    return trace
+
+
+async def _write_body(res, out, compress: bool, chunk_size: int) -> int:
+    """ Copies an aiohttp response body to a file, chunk by chunk.
+
+    Args:
+        res: the aiohttp response.
+        out: the writable binary file-like object to write to.
+        compress: if True, gzip the body.
+        chunk_size: bytes read from the connection at a time.
+
+    Returns:
+        The number of body bytes read from the connection.
+
+    """
+    if compress:
+        out = gzip.GzipFile(fileobj=out, mode='wb')
+    received = 0
+    try:
+        async for chunk in res.content.iter_chunked(chunk_size):
+            out.write(chunk)
+            received += len(chunk)
+    finally:
+        if compress:
+            out.close()  # finishes the gzip stream, not the file
+    return received
+
+
+class AsyncSpaceTrackClient(SpaceTrackClient):
+    """ Provides an asyncio API for making requests to space-track.org
+
+    The client logs in once through a pooled aiohttp session, reuses the
+    session cookie for every query, and logs in again if the cookie expires.
+    At most `max_concurrency` requests are in flight at any time. The records,
+    columns, batch_query, lookup and submit_to_file methods are coroutines
+    too. Use the client with `async with`, not `with`.
+
+    Args:
+        username: your space-track.org username.
+        password: the associated password.
+
+    Kwargs:
+        fmt: string specifying format for returned message. See
+            SpaceTrackClient. Default is None.
+        max_concurrency: the maximum number of requests in flight at once.
+            Default is 10.
+        rate_limit: True, False or a RateLimiter. See SpaceTrackClient.
+            Default is True.
+        cache: a ResponseCache, True or None. See SpaceTrackClient. Default
+            is None.
+        hooks: list of instrumentation hooks. See SpaceTrackClient. The DNS
+            and connect timings are measured too. Default is None.
+        retry: a RetryPolicy, True or None. See SpaceTrackClient. Default is
+            True.
+        circuit_breaker: a CircuitBreaker, True or None. See
+            SpaceTrackClient. Default is True.
+        coordinator: a spacetracktool.coordination coordinator whose
+            request budget queries spend from. The async client keeps its own
+            login. Default is None.
+        base: base URL of the server to query, or None for space-track.org.
+            See SpaceTrackClient. Default is None.
+        store: a spacetracktool.store.CatalogStore that lookup answers from
+            first. See SpaceTrackClient. Default is None.
+        compact: if True, or 'tle' or '3le', records and columns download
+            element sets in a compact format. See SpaceTrackClient. Default
+            is False.
+
+    Raises:
+        ImportError: if aiohttp is not installed.
+
+    """
+
+    def __init__(self, username: str, password: str, fmt: str=None,
+                 max_concurrency: int=10, rate_limit=True, cache=None,
+                 hooks=None, retry=True, circuit_breaker=True,
+                 coordinator=None, base: str=None, store=None,
+                 compact=False):
+        if aiohttp is None:
+            raise ImportError('AsyncSpaceTrackClient requires aiohttp. '
+                              'Install it with pip install aiohttp.')
+        super().__init__(username, password, fmt, rate_limit=rate_limit,
+                         retry=retry, circuit_breaker=circuit_breaker,
+                         cache=cache, hooks=hooks, coordinator=coordinator,
+                         base=base, store=store, compact=compact)
+        self._max_concurrency = max_concurrency
+        self._aio_session = None
+        self._semaphore = None
+        self._async_login_lock = None
+
+    def __enter__(self):
+        raise TypeError("use 'async with' with an AsyncSpaceTrackClient")
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        raise TypeError("use 'async with' with an AsyncSpaceTrackClient")
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close()
+
+    def _get_session(self):
+        """ Returns the aiohttp session, creating it on first use. """
+        if self._aio_session is None:
+            connector = aiohttp.TCPConnector(limit=self._max_concurrency)
+            # unsafe allows cookies from bare IP hosts, like a local mirror.
+            jar = aiohttp.CookieJar(unsafe=True)
+            self._aio_session = aiohttp.ClientSession(
+                connector=connector, cookie_jar=jar,
+                headers={'Accept-Encoding': ACCEPT_ENCODING},
+                trace_configs=[_trace_config()])
+            self._semaphore = asyncio.Semaphore(self._max_concurrency)
+            self._async_login_lock = asyncio.Lock()
+        return self._aio_session
+
+    async def _async_login(self, stale: int=None) -> int:
+        """ Logs in if the session does not hold a valid cookie.
+
+        Keyword Args:
+            stale (int): login count at the time a request was rejected by the
+                server, or None. See SpaceTrackClient._ensure_login. Default
+                is None.
+
+        Returns:
+            The login count of the cookie now held by the session.
+
+        Raises:
+            requests.exceptions.HTTPError: if the login is rejected.
+
+        """
+        session = self._get_session()
+        async with self._async_login_lock:
+            if self._logged_in and stale != self._login_count:
+                return self._login_count
+            self._logged_in = False
+            payload = {'identity': self._username, 'password': self._password}
+            async with session.post(self.login_url, data=payload) as res:
+                text = await res.text()
+                if res.status >= 400 or 'Failed' in text:
+                    print('Error logging in! Status code {}'.format(res.status))
+                    raise requests.exceptions.HTTPError('Login failed!')
+            self._logged_in = True
+            self._login_count += 1
+            return self._login_count
+
+    async def _get(self, session, url: str, login: int, headers: dict=None,
+                   sink=None):
+        """ GETs a URL once, logging in again if the cookie has expired.
+
+        Args:
+            session: the aiohttp session.
+            url: the full query URL.
+            login: login count of the cookie used by the request.
+
+        Keyword Args:
+            headers (dict): extra request headers, or None. Default is None.
+            sink: coroutine function passed the aiohttp response to consume
+                the body of a successful response, or None to read it into
+                the result. Default is None.
+
+        Returns:
+            Tuple of the response, as a requests Response, and the login count
+            of the cookie now held by the session.
+
+        """
+        sent = time.perf_counter()
+        login_time = 0.
+        for attempt in range(2):
+            timings = {}
+            start = time.perf_counter()
+            async with session.get(url, headers=headers,
+                                   trace_request_ctx=timings) as res:
+                ttfb = time.perf_counter() - start
+                if sink is not None and res.status < 400:
+                    content = b''
+                    try:
+                        await sink(res)
+                    except (aiohttp.ClientConnectionError,
+                            asyncio.TimeoutError) as excep:
+                        # Part of the body may be written already, so this
+                        # must not be retried as if nothing was received.
+                        raise aiohttp.ClientPayloadError(
+                            'Download interrupted: {}'.format(excep)) \
+                            from excep
+                else:
+                    content = await res.read()
+                if res.status == 401 and attempt == 0:
+                    start = time.perf_counter()
+                    login = await self._async_login(stale=login)
+                    login_time += time.perf_counter() - start
+                    continue
+                result = _make_response(url, res.status, content,
+                                        headers=res.headers,
+                                        reason=res.reason)
+            break
+        result.elapsed = datetime.timedelta(seconds=ttfb)
+        result.request_time = time.perf_counter() - sent
+        result.login_time = login_time
+        # Connecting includes the DNS lookup; report the two separately.
+        result.dns_time = timings.get('dns', 0.)
+        result.connect_time = max(0., timings.get('connect', 0.) -
+                                  result.dns_time)
+        return result, login
+
+    async def _fetch(self, url: str):
+        """ GETs a query through the authenticated session.
+
+        Args:
+            url: the full query URL.
+
+        Returns:
+            Response from space-track.org, as a requests Response.
+
+        """
+        start = time.perf_counter()
+        result = self._cached(url)
+        if result is not None:
+            self.result = result
+            self._emit(url, start, result)
+            return result
+        try:
+            result = await self._fetch_remote(url)
+        except (requests.exceptions.RequestException, aiohttp.ClientError,
+                asyncio.TimeoutError) as excep:
+            self._emit(url, start, getattr(excep, 'response', None),
+                       error=excep)
+            raise
+        self._emit(url, start, result)
+        return result
+
+    async def _fetch_remote(self, url: str, headers: dict=None, sink=None):
+        """ GETs a query from space-track.org, retrying as allowed.
+
+        Args:
+            url: the full query URL.
+
+        Keyword Args:
+            headers (dict): extra request headers, or None. Default is None.
+            sink: coroutine function consuming the body of a successful
+                response, as for _get, or None. Default is None.
+
+        Returns:
+            Response from space-track.org, as a requests Response.
+
+        """
+        session = self._get_session()
+        async with self._semaphore:
+            start = time.perf_counter()
+            login = await self._async_login()
+            login_time = time.perf_counter() - start
+            wait = 0.
+            attempt = 0
+            while True:
+                if self._breaker is not None:
+                    self._breaker.before_request()
+                try:
+                    if self._rate_limiter:
+                        wait += await self._rate_limiter.acquire_async()
+                    result, login = await self._get(session, url, login,
+                                                    headers, sink)
+                except (aiohttp.ClientConnectionError,
+                        asyncio.TimeoutError) + RETRY_EXCEPTIONS as excep:
+                    if self._breaker is not None:
+                        self._breaker.record_failure()
+                    if self._retry is None or not self._retry.allow(url,
+                                                                    attempt):
+                        raise
+                    print('Error posting request! {}; retrying.'.format(excep))
+                    await asyncio.sleep(self._retry.delay(attempt))
+                    attempt += 1
+                    continue
+                except BaseException:
+                    # Any other error still ends the attempt, so that a
+                    # half-open circuit does not wait for its trial forever.
+                    if self._breaker is not None:
+                        self._breaker.record_failure()
+                    raise
+                if self._breaker is not None:
+                    if result.status_code in RETRY_STATUSES:
+                        self._breaker.record_failure()
+                    else:
+                        self._breaker.record_success()
+                if (self._retry is None
+                        or not self._retry.is_retryable(result.status_code)
+                        or not self._retry.allow(url, attempt)):
+                    break
+                print('Error posting request! Status code {}; '
+                      'retrying.'.format(result.status_code))
+                retry_after = parse_retry_after(
+                    result.headers.get('Retry-After'))
+                await asyncio.sleep(self._retry.delay(attempt, retry_after))
+                attempt += 1
+        result.queue_wait = wait
+        result.retries = attempt
+        result.login_time += login_time
+        result.from_cache = False
+        self.result = result
+        if not result.ok:
+            print('Error posting request! Status code {}'.format(
+                result.status_code))
+            # pylint: disable=not-callable
+            result.raise_for_status()  # raise HTTP error
+        if self._cache is not None and sink is None:
+            self._cache.put(url, result.content, _cache_headers(result.headers))
+        return result
+
+    def submit(self, url=None):
+        """ Submits the generated query to space-track.org.
+
+        The query URL is compiled immediately, so the client may go on to build
+        other queries before the returned coroutine is awaited.
+
+        Keyword Args:
+            url (str, Query): Query URL for space-track.org, a Query built by
+                build_query, or None to submit the most recently built query.
+                Default is None.
+
+        Returns:
+            A coroutine resolving to the response from space-track.org
+
+        """
+        if not url:
+            url = self._compile_query()
+        elif isinstance(url, Query):
+            url = url.url
+        return self._fetch(url)
+
+    async def records(self, url=None) -> list:
+        """ Submits a TLE query and returns its results as TleRecords.
+
+        See SpaceTrackClient.records. The response is downloaded whole before
+        it is parsed.
+
+        Keyword Args:
+            url (str, Query): the query to submit, as for submit. Default is
+                None.
+
+        Returns:
+            List of spacetracktool.records.TleRecord objects.
+
+        Raises:
+            ValueError: if records cannot be parsed from the query's format.
+
+        """
+        url = self._element_url(url)
+        fmt = _url_format(url)
+        if fmt not in parsers.STREAMABLE_FORMATS:
+            raise ValueError('Cannot parse records from the {} format!'.format(
+                fmt))
+        result = await self.submit(url)
+        return list(parse_records(parsers.iter_records(result, fmt)))
+
+    async def columns(self, url=None):
+        """ Submits a TLE query and returns its results as a NumPy array.
+
+        See SpaceTrackClient.columns.
+
+        Keyword Args:
+            url (str, Query): the query to submit, as for submit. Default is
+                None.
+
+        Returns:
+            Structured array with dtype spacetracktool.columns.ELEMENT_DTYPE.
+
+        Raises:
+            ImportError: if NumPy is not installed.
+
+        """
+        url = self._element_url(url)
+        result = await self.submit(url)
+        return columns.from_response(result.content, _url_format(url))
+
+    async def batch_query(self, request_class: str, ids,
+                          key: str='norad_cat_id', max_url_length: int=2000,
+                          **kwargs) -> list:
+        """ Queries many catalog IDs in as few requests as possible.
+
+        See SpaceTrackClient.batch_query. The chunks are queried
+        concurrently.
+
+        Returns:
+            List of the returned records, parsed from JSON.
+
+        Raises:
+            ValueError: if the client's format is not 'json', or if the other
+                arguments leave no room in the URL for any IDs.
+
+        """
+        queries = self._batch_queries(request_class, ids, key, max_url_length,
+                                      kwargs)
+        return _merge_records(await self.gather(
+            *(self.submit(query) for query in queries)))
+
+    async def lookup(self, request_class: str, ids,
+                     max_age: float=None) -> dict:
+        """ Looks up records by catalog ID, locally first.
+
+        See SpaceTrackClient.lookup.
+
+        Returns:
+            Dict mapping each catalog ID found to its record, parsed from
+            JSON.
+
+        Raises:
+            ValueError: if the client's format is not 'json'.
+
+        """
+        found, missing = self._stored(request_class, ids, max_age)
+        if missing:
+            kwargs = {'ordinal': 1} if request_class == 'tle_latest' else {}
+            self._remember(request_class, found, await self.batch_query(
+                request_class, missing, **kwargs))
+        return found
+
+    async def submit_to_file(self, target, url=None, compress: bool=False,
+                             resume: bool=True, chunk_size: int=2 ** 20):
+        """ Submits a query and writes its result straight to a file.
+
+        See SpaceTrackClient.submit_to_file. The body is written chunk by
+        chunk as it downloads, to `target` + '.part' when `target` is a path,
+        which is renamed to `target` once complete. Interrupted downloads are
+        resumed with an HTTP Range request as the retry policy allows.
+
+        Args:
+            target: path of the file to write, or a writable binary file-like
+                object.
+
+        Keyword Args:
+            url (str, Query): the query to submit, as for submit. Default is
+                None.
+            compress (bool): if True, gzip the body on its way to the file.
+                Default is False.
+            resume (bool): if True, resume interrupted downloads. Only
+                uncompressed downloads to a path can be resumed. Default is
+                True.
+            chunk_size (int): bytes read from the connection at a time.
+                Default is 1 MiB.
+
+        Returns:
+            Response from space-track.org, as a requests Response without its
+            body. Its bytes_received attribute holds the number of body bytes
+            received by this call, and its retries attribute the number of
+            retries and resumes made.
+
+        Raises:
+            requests.exceptions.HTTPError: if space-track.org returned an
+                error status.
+            aiohttp.ClientPayloadError: if the download was interrupted and
+                could not be resumed.
+
+        """
+        if not url:
+            url = self._compile_query()
+        elif isinstance(url, Query):
+            url = url.url
+        part = None
+        if not hasattr(target, 'write'):
+            part = os.fspath(target) + '.part'
+        resume = resume and part is not None and not compress
+        start = time.perf_counter()
+        resumes = 0
+        began = received = None
+
+        async def sink(res):
+            nonlocal began, received
+            began = time.perf_counter()
+            if part is None:
+                received = await _write_body(res, target, compress,
+                                             chunk_size)
+                return
+            # A full body instead of the range asked for starts over.
+            with open(part, 'ab' if offset and res.status == 206
+                      else 'wb') as out:
+                received = await _write_body(res, out, compress, chunk_size)
+                out.flush()
+                os.fsync(out.fileno())
+
+        while True:
+            offset = 0
+            if resume and os.path.exists(part):
+                offset = os.path.getsize(part)
+            headers = None
+            if offset:
+                # Byte offsets count the decoded body, so ask for it as is.
+                headers = {'Range': 'bytes={}-'.format(offset),
+                           'Accept-Encoding': 'identity'}
+            began = None
+            try:
+                res = await self._fetch_remote(url, headers, sink)
+            except requests.exceptions.HTTPError as excep:
+                if offset and excep.response.status_code == 416:
+                    os.remove(part)  # partial file is stale; start over
+                    continue
+                self._emit(url, start, excep.response, error=excep)
+                raise
+            except aiohttp.ClientPayloadError as excep:
+                download = None if began is None else \
+                    time.perf_counter() - began
+                if (not resume or self._retry is None
+                        or not self._retry.allow(url, resumes)):
+                    self._emit(url, start, error=excep, download=download)
+                    raise
+                print('Download interrupted! {}; resuming.'.format(excep))
+                await asyncio.sleep(self._retry.delay(resumes))
+                resumes += 1
+                continue
+            except (requests.exceptions.RequestException, aiohttp.ClientError,
+                    asyncio.TimeoutError) as excep:
+                self._emit(url, start, getattr(excep, 'response', None),
+                           error=excep)
+                raise
+            break
+        if part is not None:
+            os.replace(part, os.fspath(target))
+        res.bytes_received = received
+        res.retries += resumes
+        self._emit(url, start, res, download=time.perf_counter() - began)
+        return res
+
+    async def gather(self, *queries, concurrency: int=None,
+                     return_exceptions: bool=False) -> list:
+        """ Awaits many queries concurrently.
+
+        Args:
+            queries: coroutines returned by the client's query methods.
+
+        Keyword Args:
+            concurrency (int): the maximum number of these queries in flight
+                at once, or None to use only the client's max_concurrency.
+                Default is None.
+            return_exceptions (bool): if True, exceptions are returned in place
+                of failed results instead of raised. Default is False.
+
+        Returns:
+            The responses, in the same order as the queries.
+
+        """
+        if concurrency is None:
+            return await asyncio.gather(*queries,
+                                        return_exceptions=return_exceptions)
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def run(query):
+            async with semaphore:
+                return await query
+
+        return await asyncio.gather(*(run(q) for q in queries),
+                                    return_exceptions=return_exceptions)
+
+    async def _async_logout(self):
+        """ Logs out of the space-track.org session. """
+        async with self._aio_session.post(self.logout_url) as res:
+            if res.status >= 400:
+                print('Error logging out! Status code {}'.format(res.status))
+        self._logged_in = False
+
+    async def close(self):
+        """ Logs out (if logged in) and closes the aiohttp session. """
+        if self._aio_session is None:
+            return
+        if self._logged_in:
+            await self._async_logout()
+        await self._aio_session.close()
+        self._aio_session = None
@@ -0,0 +1,271 @@
+""" Defines a response cache for space-track.org queries.
+
+A ResponseCache stores query results keyed by the compiled query URL, so a
+query repeated within its time-to-live is answered locally instead of costing a
+round trip and a slot in the rate limit. Each request class has its own TTL,
+because element sets change far more often than, say, the box score::
+
+    import spacetracktool as st
+    cache = st.ResponseCache(ttls={'tle_latest': 600.}, directory='~/.stcache')
+    client = st.SpaceTrackClient('username', 'password', cache=cache)
+
+Entries are held in memory in least-recently-used order, bounded by count and
+total size. If a directory is given, entries are also written there
+(zlib-compressed by default) so that several processes share one cache.
+
+"""
+
+
+import collections
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+import zlib
+
+
+# Seconds a result stays fresh, by request class.
+DEFAULT_TTLS = {
+    'tle': 3600.,
+    'tle_latest': 3600.,
+    'tle_publish': 3600.,
+    'satcat': 86400.,
+    'satcat_change': 86400.,
+    'satcat_debut': 86400.,
+    'boxscore': 86400.,
+    'launch_site': 7 * 86400.,
+    'decay': 3600.,
+    'tip': 600.,
+    'announcement': 3600.,
+    'cdm': 600.,
+    'organization': 86400.,
+}
+
+
+def request_class_of(url: str) -> str:
+    """ Returns the request class named in a query URL, or None. """
+    parts = url.split('/')
+    try:
+        return parts[parts.index('class') + 1]
+    except (ValueError, IndexError):
+        return None
+
+
+class ResponseCache:
+    """ Size-bounded LRU cache of query results with per-class expiry.
+
+    All methods are safe to call from several threads at once.
+
+    Kwargs:
+        ttls: dict mapping request classes to time-to-live in seconds. These
+            update DEFAULT_TTLS. Default is None.
+        default_ttl: time-to-live for request classes not in ttls, in
+            seconds. Default is 600.
+        max_entries: the most results held in memory. Default is 1024.
+        max_bytes: the most result bytes held in memory. Default is 64 MiB.
+        directory: directory in which to share results between processes, or
+            None to keep them in memory only. Default is None.
+        compress: if True, zlib-compress results written to directory.
+            Default is True.
+        max_disk_bytes: the most bytes kept in directory, or None for no
+            limit. Default is None.
+        clock: function returning the current time in seconds since the
+            epoch. Default is time.time.
+
+    """
+
+    def __init__(self, ttls: dict = None, default_ttl: float = 600.,
+                 max_entries: int = 1024, max_bytes: int = 64 * 1024 ** 2,
+                 directory: str = None, compress: bool = True,
+                 max_disk_bytes: int = None, clock=time.time):
+        self._ttls = dict(DEFAULT_TTLS)
+        self._ttls.update(ttls or {})
+        self._default_ttl = default_ttl
+        self._max_entries = max_entries
+        self._max_bytes = max_bytes
+        self._directory = None
+        if directory is not None:
+            self._directory = os.path.abspath(os.path.expanduser(directory))
+            os.makedirs(self._directory, exist_ok=True)
+        self._compress = compress
+        self._max_disk_bytes = max_disk_bytes
+        self._clock = clock
+        # url -> (expires, content, headers), least recently used first
+        self._entries = collections.OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def ttl(self, url: str) -> float:
+        """ Returns the time-to-live, in seconds, for results of a URL. """
+        return self._ttls.get(request_class_of(url), self._default_ttl)
+
+    def get(self, url: str):
+        """ Looks up a fresh result.
+
+        Args:
+            url: the compiled query URL.
+
+        Returns:
+            A (content, headers) tuple, or None on a miss.
+
+        """
+        now = self._clock()
+        with self._lock:
+            entry = self._entries.get(url)
+            if entry is not None:
+                if entry[0] > now:
+                    self._entries.move_to_end(url)
+                    self.hits += 1
+                    return entry[1], entry[2]
+                self._drop(url)
+        entry = self._read(url, now)
+        with self._lock:
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._store(url, *entry)
+        return entry[1], entry[2]
+
+    def put(self, url: str, content: bytes, headers: dict = None):
+        """ Stores a result.
+
+        Args:
+            url: the compiled query URL.
+            content: the raw response body.
+
+        Kwargs:
+            headers: response headers worth keeping, such as Content-Type.
+                Default is None.
+
+        """
+        expires = self._clock() + self.ttl(url)
+        headers = dict(headers or {})
+        with self._lock:
+            self._store(url, expires, content, headers)
+        self._write(url, expires, content, headers)
+
+    def clear(self):
+        """ Removes every entry, from memory and from the directory. """
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+        for path in self._disk_files():
+            _remove(path)
+
+    @property
+    def stats(self) -> dict:
+        """ Returns hit/miss counters and current memory use. """
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses,
+                    'entries': len(self._entries), 'bytes': self._bytes}
+
+    def _store(self, url: str, expires: float, content: bytes, headers: dict):
+        """ Adds an entry to memory and evicts down to the size bounds. """
+        self._drop(url)
+        if len(content) > self._max_bytes:
+            return
+        self._entries[url] = (expires, content, headers)
+        self._bytes += len(content)
+        while (len(self._entries) > self._max_entries or
+               self._bytes > self._max_bytes):
+            _, (_, old, _) = self._entries.popitem(last=False)
+            self._bytes -= len(old)
+
+    def _drop(self, url: str):
+        """ Removes an entry from memory, if present. """
+        entry = self._entries.pop(url, None)
+        if entry is not None:
+            self._bytes -= len(entry[1])
+
+    def _path(self, url: str) -> str:
+        """ Returns the file holding a URL's entry in the directory. """
+        name = hashlib.sha256(url.encode('utf-8')).hexdigest()
+        return os.path.join(self._directory, name + '.entry')
+
+    def _disk_files(self) -> list:
+        """ Returns the paths of every entry in the directory. """
+        if self._directory is None:
+            return []
+        return [os.path.join(self._directory, name)
+                for name in os.listdir(self._directory)
+                if name.endswith('.entry')]
+
+    def _read(self, url: str, now: float):
+        """ Reads a fresh entry from the directory.
+
+        Returns:
+            An (expires, content, headers) tuple, or None.
+
+        """
+        if self._directory is None:
+            return None
+        path = self._path(url)
+        try:
+            with open(path, 'rb') as entry_file:
+                data = entry_file.read()
+            meta, content = data.split(b'\n', 1)
+            meta = json.loads(meta.decode('utf-8'))
+            if meta['compressed']:
+                content = zlib.decompress(content)
+        except (OSError, ValueError, KeyError, zlib.error):
+            return None
+        if meta['url'] != url:
+            return None
+        if meta['expires'] <= now:
+            _remove(path)
+            return None
+        try:
+            os.utime(path)  # mark as recently used
+        except OSError:
+            pass
+        return meta['expires'], content, meta['headers']
+
+    def _write(self, url: str, expires: float, content: bytes, headers: dict):
+        """ Atomically writes an entry to the directory. """
+        if self._directory is None:
+            return
+        if self._compress:
+            content = zlib.compress(content)
+        meta = {'url': url, 'expires': expires, 'headers': headers,
+                'compressed': self._compress}
+        handle, tmp_path = tempfile.mkstemp(dir=self._directory,
+                                            suffix='.tmp')
+        try:
+            with os.fdopen(handle, 'wb') as entry_file:
+                entry_file.write(json.dumps(meta).encode('utf-8') + b'\n')
+                entry_file.write(content)
+            os.replace(tmp_path, self._path(url))
+        except OSError:
+            _remove(tmp_path)
+            return
+        if self._max_disk_bytes is not None:
+            self._prune_disk()
+
+    def _prune_disk(self):
+        """ Removes least-recently-used entries until under max_disk_bytes. """
+        files = []
+        for path in self._disk_files():
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            files.append((stat.st_mtime, stat.st_size, path))
+        total = sum(size for _, size, _ in files)
+        for _, size, path in sorted(files):
+            if total <= self._max_disk_bytes:
+                break
+            _remove(path)
+            total -= size
+
+
+def _remove(path: str):
+    """ Removes a file, ignoring one that is already gone. """
+    try:
+        os.remove(path)
+    except OSError:
+        pass
@@ -0,0 +1,181 @@
+""" Merges overlapping queries made at the same time.
+
+Two tools are provided. A SingleFlight makes identical queries that are in
+flight at the same time share one request; the SpaceTrackClient uses one when
+created with coalesce=True. A QueryBatcher collects single-ID queries of the
+same kind that arrive within a short window, sends them as one list query, and
+hands each caller its own records::
+
+    from concurrent.futures import ThreadPoolExecutor
+    import spacetracktool as st
+    from spacetracktool.coalesce import QueryBatcher
+
+    client = st.SpaceTrackClient('username', 'password', persistent=True,
+                                 coalesce=True)
+    batcher = QueryBatcher(client, window=0.05)
+
+    def latest(norad_id):
+        return batcher.get('tle_latest', norad_id, ordinal=1)
+
+    with ThreadPoolExecutor(max_workers=16) as pool:
+        elsets = list(pool.map(latest, range(25540, 25560)))  # one request
+
+"""
+
+
+import threading
+from concurrent.futures import Future
+from .query import CONTROL_KEYS
+
+
+class SingleFlight:
+    """ Runs one call per key at a time, sharing its result with every caller.
+
+    A caller that asks for a key already being fetched waits for that fetch
+    and gets the same result, or the same exception. Results are not kept
+    once the fetch is over. All methods are safe to call from several threads
+    at once.
+
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._flights = {}  # key -> Future of the call in flight
+        self.shared = 0  # calls answered by another caller's fetch
+
+    def do(self, key, function, *args, **kwargs):
+        """ Calls a function, unless a call for the same key is in flight.
+
+        Args:
+            key: hashable key identifying the call, e.g. a query URL.
+            function: the function to call.
+
+        Any other arguments are passed to the function.
+
+        Returns:
+            The function's return value, from this call or the one in flight.
+
+        """
+        with self._lock:
+            future = self._flights.get(key)
+            leader = future is None
+            if leader:
+                future = self._flights[key] = Future()
+            else:
+                self.shared += 1
+        if not leader:
+            return future.result()
+        try:
+            future.set_result(function(*args, **kwargs))
+        except BaseException as excep:
+            future.set_exception(excep)
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+        return future.result()
+
+
+class _Batch:
+    """ Single-ID queries of one kind waiting to be sent together. """
+
+    def __init__(self):
+        self.futures = {}  # catalog ID -> Future of its records
+        self.timer = None
+
+
+class QueryBatcher:
+    """ Collects single-ID queries into list queries.
+
+    Queries for the same request class with the same other arguments are
+    compatible. The first one starts a window; every compatible query arriving
+    before it closes joins the batch, and the batch is then sent with
+    SpaceTrackClient.batch_query. Each caller gets the records for its own ID.
+    Queries with REST controls such as limit or orderby cannot be merged, and
+    are sent on their own. All methods are safe to call from several threads
+    at once.
+
+    Args:
+        client: a SpaceTrackClient using the 'json' format.
+
+    Kwargs:
+        window: seconds to wait for more queries after the first of a batch.
+            Default is 0.05.
+        max_batch: send a batch at once when it holds this many IDs. Default
+            is 500.
+        key: the predicate the IDs are matched against. Default is
+            'norad_cat_id'.
+
+    """
+
+    def __init__(self, client, window: float = 0.05, max_batch: int = 500,
+                 key: str = 'norad_cat_id'):
+        self._client = client
+        self._window = window
+        self._max_batch = max_batch
+        self._key = key
+        self._lock = threading.Lock()
+        self._batches = {}  # (request_class, other arguments) -> _Batch
+
+    def get(self, request_class: str, norad_id, **kwargs) -> list:
+        """ Queries the records of one ID, batched with other callers.
+
+        Args:
+            request_class: the space-track.org request class, e.g.
+                'tle_latest'.
+            norad_id: the catalog ID to query.
+
+        Any other keyword arguments are added to the query, as for
+        SpaceTrackClient.build_query.
+
+        Returns:
+            List of the ID's records, parsed from JSON.
+
+        """
+        norad_id = int(norad_id)
+        if any(key in CONTROL_KEYS for key in kwargs):
+            kwargs[self._key] = norad_id
+            query = self._client.build_query(request_class, **kwargs)
+            return self._client.submit(query).json()
+        batch_key = (request_class, tuple(sorted(kwargs.items())))
+        flush = None
+        with self._lock:
+            batch = self._batches.get(batch_key)
+            if batch is None:
+                batch = self._batches[batch_key] = _Batch()
+                batch.timer = threading.Timer(self._window, self._flush,
+                                              (batch_key, batch))
+                batch.timer.daemon = True
+                batch.timer.start()
+            future = batch.futures.setdefault(norad_id, Future())
+            if len(batch.futures) >= self._max_batch:
+                batch.timer.cancel()
+                flush = batch
+        if flush is not None:
+            self._flush(batch_key, flush)
+        return future.result()
+
+    def _flush(self, batch_key: tuple, batch: _Batch):
+        """ Sends a batch and hands out its records. """
+        with self._lock:
+            if self._batches.get(batch_key) is not batch:
+                return  # already sent
+            del self._batches[batch_key]
+        request_class, other = batch_key
+        try:
+            records = self._client.batch_query(request_class,
+                                               list(batch.futures),
+                                               key=self._key, **dict(other))
+        except BaseException as excep:  # pylint: disable=broad-except
+            for future in batch.futures.values():
+                future.set_exception(excep)
+            return
+        field = self._key.upper()
+        results = {norad_id: [] for norad_id in batch.futures}
+        for record in records:
+            try:
+                results[int(record[field])].append(record)
+            except (KeyError, TypeError, ValueError):
+                continue
+        for norad_id, future in batch.futures.items():
+            future.set_result(results[norad_id])
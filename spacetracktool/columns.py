@@ -0,0 +1,205 @@
+""" Converts element-set query results into NumPy structured arrays.
+
+For bulk analysis, a column per element is far cheaper than a Python object
+per row. The 'tle' and '3le' formats are parsed without creating any per-row
+Python objects at all: the response body is viewed as a byte array, lines are
+found and sliced by their fixed columns, and each column is converted in one
+vectorized step::
+
+    import spacetracktool as st
+
+    client = st.SpaceTrackClient('username', 'password', fmt='tle')
+    elements = client.columns(client.build_query('tle_latest', ordinal=1))
+    leo = elements[elements['mean_motion'] > 11.25]
+    print(leo['inclination'].mean(), leo['epoch'].max())
+
+Numeric elements are float64 and epochs are datetime64[us] in UTC. JSON and
+CSV results are converted too, one row at a time. This module requires NumPy.
+
+"""
+
+
+from .parsers import iter_json_array, iter_csv
+from .records import EARTH_MU, EARTH_RADIUS, TleRecord
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover
+    np = None
+
+
+FLOAT_FIELDS = ('mean_motion', 'eccentricity', 'inclination',
+                'ra_of_asc_node', 'arg_of_pericenter', 'mean_anomaly',
+                'bstar', 'mean_motion_dot', 'mean_motion_ddot', 'apogee',
+                'perigee')
+INT_FIELDS = ('norad_cat_id', 'element_set_no', 'rev_at_epoch')
+
+ELEMENT_DTYPE = ([('norad_cat_id', 'i8'), ('epoch', 'M8[us]')] +
+                 [(name, 'f8') for name in FLOAT_FIELDS] +
+                 [('element_set_no', 'i8'), ('rev_at_epoch', 'i8')])
+
+_LINE_LENGTH = 69  # characters in line 1 or line 2 of an element set
+_ALPHA5 = b'ABCDEFGHJKLMNPQRSTUVWXYZ'
+
+
+def _require_numpy():
+    """ Raises ImportError if NumPy is not installed. """
+    if np is None:
+        raise ImportError('spacetracktool.columns requires numpy. '
+                          'Install it with pip install numpy.')
+
+
+def _column(lines, start: int, stop: int):
+    """ Returns columns [start, stop) of each line as a bytes array. """
+    width = stop - start
+    return np.ascontiguousarray(lines[:, start:stop]).view(
+        'S{}'.format(width)).ravel()
+
+
+def _implied_decimal(lines, start: int):
+    """ Converts 8-column fields like ' 12345-3' (0.12345e-3) to float. """
+    sign = np.where(lines[:, start] == ord('-'), -1., 1.)
+    mantissa = _column(lines, start + 1, start + 6).astype(np.float64)
+    exponent = _column(lines, start + 6, start + 8).astype(np.int64)
+    return sign * mantissa * 1e-5 * 10. ** exponent
+
+
+def _satnum(lines):
+    """ Converts catalog number columns, including Alpha-5, to int. """
+    lookup = np.zeros(256, dtype=np.int64)
+    lookup[np.frombuffer(b'0123456789', dtype=np.uint8)] = np.arange(10)
+    lookup[np.frombuffer(_ALPHA5, dtype=np.uint8)] = np.arange(10, 34)
+    lookup[np.frombuffer(_ALPHA5.lower(), dtype=np.uint8)] = np.arange(10, 34)
+    lookup[ord(' ')] = 0
+    return (lookup[lines[:, 2]] * 10000 +
+            _column(lines, 3, 7).astype(np.int64))
+
+
+def _altitudes(mean_motion, eccentricity):
+    """ Returns apogee and perigee altitudes in km from the elements. """
+    with np.errstate(divide='ignore'):
+        rate = mean_motion * 2. * np.pi / 86400.
+        semimajor_axis = np.cbrt(EARTH_MU / rate ** 2)
+    return (semimajor_axis * (1. + eccentricity) - EARTH_RADIUS,
+            semimajor_axis * (1. - eccentricity) - EARTH_RADIUS)
+
+
+def from_tle(data):
+    """ Parses 'tle' or '3le' text into a structured array, vectorized.
+
+    Name lines are skipped. Lines must have the standard 69 columns; shorter
+    element lines are ignored.
+
+    Args:
+        data: bytes or str holding the element sets.
+
+    Returns:
+        Structured array with dtype ELEMENT_DTYPE, one row per element set.
+
+    Raises:
+        ImportError: if NumPy is not installed.
+        ValueError: if the numbers of '1 ' and '2 ' lines do not match.
+
+    """
+    _require_numpy()
+    if isinstance(data, str):
+        data = data.encode('ascii', 'replace')
+    buffer = np.frombuffer(data + b'\n', dtype=np.uint8)
+    ends = np.flatnonzero(buffer == ord('\n'))
+    starts = np.concatenate(([0], ends[:-1] + 1))
+    long_enough = ends - starts >= _LINE_LENGTH
+    first = buffer[np.minimum(starts, len(buffer) - 1)]
+    second = buffer[np.minimum(starts + 1, len(buffer) - 1)]
+    is_line1 = long_enough & (first == ord('1')) & (second == ord(' '))
+    is_line2 = long_enough & (first == ord('2')) & (second == ord(' '))
+    if is_line1.sum() != is_line2.sum():
+        raise ValueError('Element sets are incomplete!')
+    columns = np.arange(_LINE_LENGTH)
+    line1 = buffer[starts[is_line1][:, None] + columns]
+    line2 = buffer[starts[is_line2][:, None] + columns]
+    result = np.zeros(len(line1), dtype=ELEMENT_DTYPE)
+    result['norad_cat_id'] = _satnum(line1)
+    year = _column(line1, 18, 20).astype(np.int64)
+    year = np.where(year < 57, year + 2000, year + 1900)
+    days = _column(line1, 20, 32).astype(np.float64) - 1.
+    result['epoch'] = ((year - 1970).astype('M8[Y]').astype('M8[us]') +
+                       np.round(days * 86400e6).astype('m8[us]'))
+    result['mean_motion_dot'] = _column(line1, 33, 43).astype(np.float64)
+    result['mean_motion_ddot'] = _implied_decimal(line1, 44)
+    result['bstar'] = _implied_decimal(line1, 53)
+    result['element_set_no'] = _column(line1, 64, 68).astype(np.int64)
+    result['inclination'] = _column(line2, 8, 16).astype(np.float64)
+    result['ra_of_asc_node'] = _column(line2, 17, 25).astype(np.float64)
+    result['eccentricity'] = (_column(line2, 26, 33).astype(np.float64) *
+                              1e-7)
+    result['arg_of_pericenter'] = _column(line2, 34, 42).astype(np.float64)
+    result['mean_anomaly'] = _column(line2, 43, 51).astype(np.float64)
+    result['mean_motion'] = _column(line2, 52, 63).astype(np.float64)
+    rev = _column(line2, 63, 68)
+    result['rev_at_epoch'] = np.where(rev == b'     ', b'0', rev).astype(
+        np.int64)
+    result['apogee'], result['perigee'] = _altitudes(result['mean_motion'],
+                                                     result['eccentricity'])
+    return result
+
+
+def from_records(rows):
+    """ Builds a structured array from rows or TleRecords.
+
+    Args:
+        rows: iterable of JSON or CSV row dicts, or of TleRecords.
+
+    Returns:
+        Structured array with dtype ELEMENT_DTYPE, one row per element set.
+        Missing numbers are NaN (floats) or 0 (ints), and missing epochs NaT.
+
+    Raises:
+        ImportError: if NumPy is not installed.
+
+    """
+    _require_numpy()
+    names = [name for name, _ in ELEMENT_DTYPE]
+    values = {name: [] for name in names}
+    for row in rows:
+        if isinstance(row, dict):
+            row = TleRecord.from_dict(row)
+        for name in names:
+            values[name].append(getattr(row, name))
+    result = np.zeros(len(values['epoch']), dtype=ELEMENT_DTYPE)
+    for name in FLOAT_FIELDS:
+        result[name] = np.array(values[name], dtype=np.float64)
+    for name in INT_FIELDS:
+        result[name] = [0 if v is None else v for v in values[name]]
+    result['epoch'] = np.array(values['epoch'], dtype='M8[us]')
+    return result
+
+
+def from_response(content, fmt: str):
+    """ Parses a whole response body into a structured array.
+
+    Args:
+        content: bytes or str of the response body.
+        fmt: the format of the response: 'tle', '3le', 'json' or 'csv'.
+
+    Returns:
+        Structured array with dtype ELEMENT_DTYPE.
+
+    Raises:
+        ImportError: if NumPy is not installed.
+        ValueError: if the format cannot be converted.
+
+    """
+    if fmt in ('tle', '3le'):
+        return from_tle(content)
+    if isinstance(content, bytes):
+        content = content.decode('utf-8')
+    if fmt == 'json':
+        return from_records(iter_json_array([content]))
+    if fmt == 'csv':
+        return from_records(iter_csv([content]))
+    raise ValueError('Cannot convert the {} format to columns!'.format(fmt))
+
+
+def to_columns(array) -> dict:
+    """ Splits a structured array into a dict of column arrays. """
+    return {name: array[name] for name in array.dtype.names}
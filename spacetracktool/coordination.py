@@ -0,0 +1,536 @@
+""" Shares one request budget and one login between many clients.
+
+A RateLimiter keeps the clients of one process within space-track.org's
+request limits, but every process has its own. A coordinator holds the budget
+outside the process, so every client that uses it, in any process, spends from
+the same budget. Persistent clients also share one login through it: the
+first to need a cookie logs in and publishes it, and the rest reuse it instead
+of logging in themselves.
+
+Two backends are provided. A SQLiteCoordinator keeps the shared state in a
+SQLite file, for processes on one host::
+
+    import spacetracktool as st
+    from spacetracktool.coordination import SQLiteCoordinator
+
+    coordinator = SQLiteCoordinator('/tmp/space-track.sqlite')
+    client = st.SpaceTrackClient('username', 'password', persistent=True,
+                                 coordinator=coordinator)
+
+A CoordinatorServer keeps it in one process, and TCPCoordinators on any host
+talk to it over TCP. Start a server with::
+
+    spacetracktool coordinate --host 0.0.0.0 --port 7437
+
+and give each client TCPCoordinator(('server-host', 7437)). The protocol is
+unauthenticated and sends the session cookie in the clear, so only run the
+server on a trusted network.
+
+Request slots are handed out first come, first served across every client,
+as by a RateLimiter.
+
+"""
+
+
+import argparse
+import asyncio
+import json
+import socket
+import socketserver
+import sqlite3
+import threading
+import time
+import uuid
+from .ratelimit import RateLimiter, SPACE_TRACK_LIMITS
+
+
+# Default TCP port of a CoordinatorServer.
+DEFAULT_PORT = 7437
+
+# Operations a TCPCoordinator must not resend, since a request that reached
+# the server before the connection failed would take effect twice.
+NON_IDEMPOTENT = frozenset(['reserve'])
+
+
+class Coordinator:
+    """ Base class of the coordination backends.
+
+    A coordinator can stand in for a RateLimiter anywhere one is accepted.
+    Subclasses implement reserve, which hands out request slots, and _claim,
+    _publish and _release, which share the login.
+
+    Kwargs:
+        poll: seconds to wait between checks while another client logs in.
+            Default is 0.1.
+
+    """
+
+    def __init__(self, poll: float = 0.1):
+        self._poll = poll
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def reserve(self) -> float:
+        """ Reserves the next free request slot without waiting for it.
+
+        Returns:
+            The number of seconds to wait before the slot is reached.
+
+        """
+        raise NotImplementedError
+
+    def acquire(self) -> float:
+        """ Blocks the calling thread until the request may be sent.
+
+        Returns:
+            The number of seconds the request waited in the queue.
+
+        """
+        delay = self.reserve()
+        if delay > 0:
+            time.sleep(delay)
+        return delay
+
+    async def acquire_async(self) -> float:
+        """ Suspends the calling task until the request may be sent.
+
+        Returns:
+            The number of seconds the request waited in the queue.
+
+        """
+        loop = asyncio.get_running_loop()
+        delay = await loop.run_in_executor(None, self.reserve)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        return delay
+
+    def login(self, stale, login) -> tuple:
+        """ Returns the shared session cookies, logging in if they are stale.
+
+        If another client has published cookies newer than `stale`, they are
+        returned at once. Otherwise this client is given a lease, calls
+        `login` and publishes the cookies it returns, while any other client
+        that needs a login waits for them.
+
+        Args:
+            stale: the generation of the cookies the server rejected, or None
+                if the client holds none.
+            login: function that logs in and returns the session cookies, as
+                a dict of names to values.
+
+        Returns:
+            Tuple of the cookies' generation and the cookie dict.
+
+        """
+        token = uuid.uuid4().hex
+        while True:
+            claim = self._claim(stale, token)
+            if claim is True:
+                break
+            if claim is not None:
+                return claim
+            time.sleep(self._poll)
+        try:
+            cookies = login()
+        except BaseException:
+            self._release(token)
+            raise
+        return self._publish(token, cookies)
+
+    def _claim(self, stale, token: str):
+        """ Asks for fresh cookies, or for the lease to log in.
+
+        Returns:
+            A (generation, cookies) tuple if cookies newer than `stale` are
+            published, True if this client now holds the lease (including if
+            it already held it), or None if another client is logging in.
+
+        """
+        raise NotImplementedError
+
+    def _publish(self, token: str, cookies: dict) -> tuple:
+        """ Publishes the cookies of a new login and gives up the lease.
+
+        The cookies are only published if this client still holds the lease,
+        or if no cookies are published at all; a client whose lease lapsed
+        must not replace cookies a newer holder has published.
+
+        Returns:
+            Tuple of the generation and the cookies now published.
+
+        """
+        raise NotImplementedError
+
+    def _release(self, token: str):
+        """ Gives up the lease after a failed login. """
+        raise NotImplementedError
+
+    def close(self):
+        """ Releases the coordinator's resources. """
+
+
+class SQLiteCoordinator(Coordinator):
+    """ Coordinates the processes of one host through a SQLite file.
+
+    Args:
+        path: path of the SQLite file, created if needed. Every process must
+            use the same file, on a local file system.
+
+    Kwargs:
+        limits: iterable of (requests, period) pairs, with period in seconds.
+            Every process should use the same limits. Default is
+            space-track.org's 30 per minute and 300 per hour.
+        lease_timeout: seconds after which a login lease lapses, in case its
+            holder died while logging in. Default is 60.
+        poll: seconds to wait between checks while another client logs in.
+            Default is 0.1.
+        timeout: seconds to wait for another process's write to finish.
+            Default is 30.
+        clock: function returning the current wall-clock time in seconds,
+            shared by every process. Default is time.time.
+
+    Raises:
+        ValueError: if any limit is not a positive count and period.
+
+    """
+
+    def __init__(self, path: str, limits=SPACE_TRACK_LIMITS,
+                 lease_timeout: float = 60., poll: float = 0.1,
+                 timeout: float = 30., clock=time.time):
+        super().__init__(poll)
+        self._limits = RateLimiter(limits).limits  # validates the limits
+        self._lease_timeout = lease_timeout
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, timeout=timeout,
+                                   isolation_level=None,
+                                   check_same_thread=False)
+        with self._lock:
+            self._db.execute('PRAGMA journal_mode=WAL')
+            self._db.execute('CREATE TABLE IF NOT EXISTS slot '
+                             '(id INTEGER PRIMARY KEY, slot REAL NOT NULL)')
+            self._db.execute('CREATE INDEX IF NOT EXISTS slot_slot '
+                             'ON slot (slot)')
+            self._db.execute('CREATE TABLE IF NOT EXISTS login '
+                             '(id INTEGER PRIMARY KEY CHECK (id = 0), '
+                             'generation INTEGER NOT NULL, cookies TEXT, '
+                             'lease TEXT, expires REAL)')
+            self._db.execute('INSERT OR IGNORE INTO login (id, generation) '
+                             'VALUES (0, 0)')
+
+    @property
+    def limits(self) -> tuple:
+        """ Returns the (requests, period) limits enforced. """
+        return self._limits
+
+    def _transaction(self, work):
+        """ Runs a function in a write transaction, returning its result. """
+        with self._lock:
+            self._db.execute('BEGIN IMMEDIATE')
+            try:
+                result = work(self._db)
+            except BaseException:
+                self._db.execute('ROLLBACK')
+                raise
+            self._db.execute('COMMIT')
+            return result
+
+    def reserve(self) -> float:
+        """ Reserves the next free request slot without waiting for it.
+
+        Slots are computed as by RateLimiter.reserve, from the slots given to
+        every process.
+
+        Returns:
+            The number of seconds to wait before the slot is reached.
+
+        """
+        def work(db):
+            now = self._clock()
+            row = db.execute('SELECT slot FROM slot ORDER BY id DESC '
+                             'LIMIT 1').fetchone()
+            slot = now if row is None else max(now, row[0])
+            for count, period in self._limits:
+                row = db.execute('SELECT slot FROM slot ORDER BY id DESC '
+                                 'LIMIT 1 OFFSET ?', (count - 1,)).fetchone()
+                if row is not None:
+                    slot = max(slot, row[0] + period)
+            db.execute('INSERT INTO slot (slot) VALUES (?)', (slot,))
+            oldest = now - max(period for _, period in self._limits)
+            db.execute('DELETE FROM slot WHERE slot < ?', (oldest,))
+            return slot - now
+
+        return self._transaction(work)
+
+    def _claim(self, stale, token: str):
+        def work(db):
+            generation, cookies, lease, expires = db.execute(
+                'SELECT generation, cookies, lease, expires FROM login '
+                'WHERE id = 0').fetchone()
+            if cookies is not None and generation != stale:
+                return generation, json.loads(cookies)
+            now = self._clock()
+            if lease is not None and lease != token and expires > now:
+                return None
+            db.execute('UPDATE login SET lease = ?, expires = ? WHERE id = 0',
+                       (token, now + self._lease_timeout))
+            return True
+
+        return self._transaction(work)
+
+    def _publish(self, token: str, cookies: dict) -> tuple:
+        def work(db):
+            db.execute('UPDATE login SET generation = generation + 1, '
+                       'cookies = ?, lease = NULL, expires = NULL '
+                       'WHERE id = 0 AND (lease = ? OR cookies IS NULL)',
+                       (json.dumps(cookies), token))
+            generation, published = db.execute(
+                'SELECT generation, cookies FROM login '
+                'WHERE id = 0').fetchone()
+            return generation, json.loads(published)
+
+        return self._transaction(work)
+
+    def _release(self, token: str):
+        self._transaction(lambda db: db.execute(
+            'UPDATE login SET lease = NULL, expires = NULL '
+            'WHERE id = 0 AND lease = ?', (token,)))
+
+    def close(self):
+        """ Closes the SQLite connection. """
+        with self._lock:
+            self._db.close()
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    """ Answers one TCPCoordinator connection, one JSON line at a time. """
+
+    def handle(self):
+        for line in self.rfile:
+            try:
+                answer = self.server.answer(json.loads(line))
+            except (KeyError, TypeError, ValueError) as excep:
+                answer = {'error': str(excep)}
+            self.wfile.write(json.dumps(answer).encode() + b'\n')
+
+
+class CoordinatorServer(socketserver.ThreadingTCPServer):
+    """ Holds the shared state for TCPCoordinators on any host.
+
+    Kwargs:
+        host: the address to listen on. Default is '127.0.0.1'.
+        port: the TCP port to listen on, or 0 for any free port. Default is
+            DEFAULT_PORT.
+        limits: iterable of (requests, period) pairs, with period in seconds.
+            Default is space-track.org's 30 per minute and 300 per hour.
+        lease_timeout: seconds after which a login lease lapses, in case its
+            holder died while logging in. Default is 60.
+
+    Raises:
+        ValueError: if any limit is not a positive count and period.
+
+    """
+    allow_reuse_address = True
+    daemon_threads = True
+
+    def __init__(self, host: str = '127.0.0.1', port: int = DEFAULT_PORT,
+                 limits=SPACE_TRACK_LIMITS, lease_timeout: float = 60.):
+        self._limiter = RateLimiter(limits)
+        self._lease_timeout = lease_timeout
+        self._lock = threading.Lock()
+        self._generation = 0
+        self._cookies = None
+        self._lease = None
+        self._expires = 0.
+        self._thread = None
+        super().__init__((host, port), _Handler)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def start(self) -> 'CoordinatorServer':
+        """ Starts serving from a background thread, and returns self. """
+        self._thread = threading.Thread(target=self.serve_forever,
+                                        kwargs={'poll_interval': 0.1},
+                                        daemon=True)
+        self._thread.start()
+        return self
+
+    def close(self):
+        """ Stops serving and closes the listening socket. """
+        if self._thread is not None:
+            self.shutdown()
+            self._thread.join()
+            self._thread = None
+        self.server_close()
+
+    def answer(self, message: dict) -> dict:
+        """ Answers one request from a TCPCoordinator.
+
+        Raises:
+            ValueError: if the request is not understood.
+
+        """
+        operation = message['op']
+        if operation == 'reserve':
+            return {'delay': self._limiter.reserve()}
+        if operation == 'limits':
+            return {'limits': self._limiter.limits}
+        with self._lock:
+            now = time.monotonic()
+            if operation == 'claim':
+                if self._cookies is not None and \
+                        self._generation != message['stale']:
+                    return {'generation': self._generation,
+                            'cookies': self._cookies}
+                if self._lease not in (None, message['token']) and \
+                        self._expires > now:
+                    return {'wait': True}
+                self._lease = message['token']
+                self._expires = now + self._lease_timeout
+                return {'lease': True}
+            if operation == 'publish':
+                if self._lease == message['token'] or self._cookies is None:
+                    self._generation += 1
+                    self._cookies = message['cookies']
+                    self._lease = None
+                return {'generation': self._generation,
+                        'cookies': self._cookies}
+            if operation == 'release':
+                if self._lease == message['token']:
+                    self._lease = None
+                return {}
+        raise ValueError('Unknown operation {}!'.format(operation))
+
+
+class TCPCoordinator(Coordinator):
+    """ Coordinates clients on any host through a CoordinatorServer.
+
+    Each thread keeps its own connection to the server.
+
+    Kwargs:
+        address: (host, port) of the CoordinatorServer. Default is
+            ('127.0.0.1', DEFAULT_PORT).
+        timeout: seconds to wait for the server to answer. Default is 10.
+        poll: seconds to wait between checks while another client logs in.
+            Default is 0.1.
+
+    """
+
+    def __init__(self, address=('127.0.0.1', DEFAULT_PORT),
+                 timeout: float = 10., poll: float = 0.1):
+        super().__init__(poll)
+        self._address = tuple(address)
+        self._timeout = timeout
+        self._local = threading.local()
+        self._connections = []
+        self._lock = threading.Lock()
+
+    def _call(self, operation: str, **kwargs) -> dict:
+        """ Sends one request to the server and returns its answer.
+
+        A request that fails is sent again once, over a new connection, in
+        case the server restarted; NON_IDEMPOTENT requests are not.
+
+        Raises:
+            ConnectionError: if the server cannot be reached, or hung up.
+            ValueError: if the server did not understand the request.
+
+        """
+        message = dict(kwargs, op=operation)
+        attempts = 1 if operation in NON_IDEMPOTENT else 2
+        for attempt in range(attempts):
+            connection = getattr(self._local, 'connection', None)
+            try:
+                if connection is None:
+                    connection = self._connect()
+                connection.write(json.dumps(message).encode() + b'\n')
+                connection.flush()
+                line = connection.readline()
+                if not line:
+                    raise ConnectionError('Coordinator closed the connection!')
+                break
+            except OSError:
+                self._local.connection = None
+                if attempt == attempts - 1:
+                    raise
+        answer = json.loads(line)
+        if 'error' in answer:
+            raise ValueError(answer['error'])
+        return answer
+
+    def _connect(self):
+        """ Opens this thread's connection to the server. """
+        sock = socket.create_connection(self._address, self._timeout)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        connection = sock.makefile('rwb')
+        sock.close()  # the file keeps the socket open
+        self._local.connection = connection
+        with self._lock:
+            self._connections.append(connection)
+        return connection
+
+    @property
+    def limits(self) -> tuple:
+        """ Returns the (requests, period) limits enforced by the server. """
+        return tuple(tuple(limit) for limit in self._call('limits')['limits'])
+
+    def reserve(self) -> float:
+        """ Reserves the next free request slot without waiting for it.
+
+        Returns:
+            The number of seconds to wait before the slot is reached.
+
+        """
+        return self._call('reserve')['delay']
+
+    def _claim(self, stale, token: str):
+        answer = self._call('claim', stale=stale, token=token)
+        if 'cookies' in answer:
+            return answer['generation'], answer['cookies']
+        return True if answer.get('lease') else None
+
+    def _publish(self, token: str, cookies: dict) -> tuple:
+        answer = self._call('publish', token=token, cookies=cookies)
+        return answer['generation'], answer['cookies']
+
+    def _release(self, token: str):
+        self._call('release', token=token)
+
+    def close(self):
+        """ Closes every thread's connection to the server. """
+        with self._lock:
+            for connection in self._connections:
+                connection.close()
+            self._connections = []
+        self._local = threading.local()
+
+
+def main(argv=None) -> int:
+    """ Runs a CoordinatorServer until interrupted. """
+    parser = argparse.ArgumentParser(
+        prog='spacetracktool coordinate',
+        description='Shares one space-track.org request budget and login '
+                    'between clients.')
+    parser.add_argument('--host', default='127.0.0.1',
+                        help='address to listen on (default: 127.0.0.1)')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT,
+                        help='port to listen on (default: {})'.format(
+                            DEFAULT_PORT))
+    args = parser.parse_args(argv)
+    server = CoordinatorServer(args.host, args.port)
+    print('Coordinating on {}:{}'.format(*server.server_address))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
@@ -0,0 +1,367 @@
+""" Indexes element sets in memory by orbital regime.
+
+An OrbitIndex holds the latest element set of each object and answers
+questions like "which objects pass through 500-600 km" or "which are in GEO
+within 2 degrees of the equator" without a query to space-track.org::
+
+    import spacetracktool as st
+    from spacetracktool.index import OrbitIndex
+    from spacetracktool.store import CatalogStore
+
+    client = st.SpaceTrackClient('username', 'password')
+    index = OrbitIndex.from_store(CatalogStore('catalog.sqlite'))
+    leo = index.find(altitude=(500., 600.))
+    geo = index.find(altitude=(35586., 35986.), inclination=(None, 2.))
+    # Keep it current with new element sets as they arrive.
+    index.upsert(client.tle_latest_query(ordinal=1, epoch='>now-1').json())
+
+Each object's shell, from its perigee to its apogee, is kept in an interval
+tree, so the shells overlapping an altitude range are found in O(log n + k)
+time for k matches. Inclinations and right ascensions of the ascending node are
+kept in sorted lists searched by bisection. Adding, replacing or removing an
+element set updates every structure in place.
+
+"""
+
+
+import bisect
+import math
+import random
+import threading
+from .records import TleRecord
+
+
+class _Node:
+    """ Node of a _ShellTree, holding one object's shell. """
+    __slots__ = ('key', 'high', 'priority', 'max_high', 'left', 'right')
+
+    def __init__(self, key: tuple, high: float):
+        self.key = key  # (perigee, norad_cat_id)
+        self.high = high
+        self.priority = random.random()
+        self.max_high = high  # highest apogee in the subtree
+        self.left = None
+        self.right = None
+
+    def update(self):
+        """ Recomputes max_high from the node's children. """
+        high = self.high
+        for child in (self.left, self.right):
+            if child is not None and child.max_high > high:
+                high = child.max_high
+        self.max_high = high
+
+
+def _rotate_right(node: _Node) -> _Node:
+    top = node.left
+    node.left, top.right = top.right, node
+    node.update()
+    top.update()
+    return top
+
+
+def _rotate_left(node: _Node) -> _Node:
+    top = node.right
+    node.right, top.left = top.left, node
+    node.update()
+    top.update()
+    return top
+
+
+class _ShellTree:
+    """ Interval tree of [perigee, apogee] shells.
+
+    A treap ordered by perigee, in which each node also keeps the highest
+    apogee below it, so subtrees that cannot overlap a range are skipped.
+
+    """
+
+    def __init__(self):
+        self._root = None
+
+    def build(self, shells: list):
+        """ Replaces the tree with one of (low, high, norad_cat_id) shells.
+
+        Builds the tree from the sorted shells in one pass, much faster than
+        inserting them one by one.
+
+        """
+        spine = []  # the right spine of the tree built so far
+        for low, high, norad_cat_id in sorted(shells):
+            node = _Node((low, norad_cat_id), high)
+            while spine and spine[-1].priority < node.priority:
+                node.left = spine.pop()
+                node.left.update()  # the popped subtree is complete
+            if spine:
+                spine[-1].right = node
+            spine.append(node)
+        for node in reversed(spine):
+            node.update()
+        self._root = spine[0] if spine else None
+
+    def insert(self, low: float, high: float, norad_cat_id: int):
+        """ Adds a shell. """
+        self._root = self._insert(self._root, _Node((low, norad_cat_id),
+                                                    high))
+
+    def _insert(self, node: _Node, new: _Node) -> _Node:
+        if node is None:
+            return new
+        if new.key < node.key:
+            node.left = self._insert(node.left, new)
+            if node.left.priority > node.priority:
+                return _rotate_right(node)
+        else:
+            node.right = self._insert(node.right, new)
+            if node.right.priority > node.priority:
+                return _rotate_left(node)
+        node.update()
+        return node
+
+    def remove(self, low: float, norad_cat_id: int):
+        """ Removes a shell. """
+        self._root = self._remove(self._root, (low, norad_cat_id))
+
+    def _remove(self, node: _Node, key: tuple) -> _Node:
+        if node is None:
+            return None
+        if key < node.key:
+            node.left = self._remove(node.left, key)
+        elif node.key < key:
+            node.right = self._remove(node.right, key)
+        elif node.left is None:
+            return node.right
+        elif node.right is None:
+            return node.left
+        elif node.left.priority > node.right.priority:
+            node = _rotate_right(node)
+            node.right = self._remove(node.right, key)
+        else:
+            node = _rotate_left(node)
+            node.left = self._remove(node.left, key)
+        node.update()
+        return node
+
+    def overlapping(self, low: float, high: float) -> list:
+        """ Returns the IDs of the shells overlapping [low, high]. """
+        found = []
+        stack = [self._root]
+        while stack:
+            node = stack.pop()
+            if node is None or node.max_high < low:
+                continue
+            stack.append(node.left)
+            if node.key[0] <= high:  # later shells may also start in range
+                if node.high >= low:
+                    found.append(node.key[1])
+                stack.append(node.right)
+        return found
+
+
+class _SortedKeys:
+    """ Sorted list of (value, norad_cat_id) pairs. """
+
+    def __init__(self):
+        self._keys = []
+
+    def build(self, keys: list):
+        """ Replaces the list with the (value, norad_cat_id) pairs. """
+        self._keys = sorted(keys)
+
+    def insert(self, value: float, norad_cat_id: int):
+        """ Adds a value. """
+        bisect.insort(self._keys, (value, norad_cat_id))
+
+    def remove(self, value: float, norad_cat_id: int):
+        """ Removes a value. """
+        index = bisect.bisect_left(self._keys, (value, norad_cat_id))
+        del self._keys[index]
+
+    def between(self, low: float, high: float) -> list:
+        """ Returns the IDs of the values in [low, high]. """
+        start = bisect.bisect_left(self._keys, (low, -math.inf))
+        stop = bisect.bisect_right(self._keys, (high, math.inf))
+        return [key[1] for key in self._keys[start:stop]]
+
+
+def _bounds(value) -> tuple:
+    """ Converts a range criterion to (low, high), unbounded where None. """
+    if not isinstance(value, tuple):
+        return value, value
+    low, high = value
+    return (-math.inf if low is None else low,
+            math.inf if high is None else high)
+
+
+class OrbitIndex:
+    """ In-memory index of the latest element set of each object.
+
+    All methods are safe to call from several threads at once.
+
+    Args:
+        elsets: iterable of TleRecords, or of JSON row dicts of a 'tle' or
+            'tle_latest' query, to index. Default is none.
+
+    """
+
+    def __init__(self, elsets=()):
+        self._lock = threading.Lock()
+        self._records = {}
+        self._shells = _ShellTree()
+        self._inclinations = _SortedKeys()
+        self._nodes = _SortedKeys()
+        self.upsert(elsets)
+
+    @classmethod
+    def from_store(cls, store, max_age: float = None) -> 'OrbitIndex':
+        """ Indexes the latest element sets kept in a CatalogStore.
+
+        Args:
+            store: the spacetracktool.store.CatalogStore.
+
+        Kwargs:
+            max_age: leave out records stored more than this many seconds
+                ago, or None to keep all of them. Default is None.
+
+        Returns:
+            The index.
+
+        """
+        return cls(store.find('tle_latest', max_age=max_age))
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def __contains__(self, norad_cat_id) -> bool:
+        return norad_cat_id in self._records
+
+    def get(self, norad_cat_id: int) -> TleRecord:
+        """ Returns an object's indexed element set, or None. """
+        return self._records.get(norad_cat_id)
+
+    def records(self):
+        """ Yields every indexed element set, ordered by NORAD_CAT_ID. """
+        with self._lock:
+            found = [self._records[norad_cat_id]
+                     for norad_cat_id in sorted(self._records)]
+        yield from found
+
+    def upsert(self, elsets):
+        """ Indexes element sets, replacing older ones of the same objects.
+
+        An element set older than the one indexed for its object is ignored,
+        so results may be added in any order.
+
+        Args:
+            elsets: iterable of TleRecords, or of JSON row dicts of a 'tle' or
+                'tle_latest' query.
+
+        """
+        with self._lock:
+            bulk = not self._records  # build the structures in one pass
+            for elset in elsets:
+                if not isinstance(elset, TleRecord):
+                    elset = TleRecord.from_dict(elset)
+                old = self._records.get(elset.norad_cat_id)
+                if old is not None and elset.epoch is not None and \
+                        old.epoch is not None and elset.epoch < old.epoch:
+                    continue
+                if bulk:
+                    self._records[elset.norad_cat_id] = elset
+                    continue
+                if old is not None:
+                    self._unindex(old)
+                self._index(elset)
+            if bulk:
+                self._build()
+
+    def remove(self, norad_cat_id: int):
+        """ Removes an object's element set from the index.
+
+        Raises:
+            KeyError: if the object is not indexed.
+
+        """
+        with self._lock:
+            self._unindex(self._records[norad_cat_id])
+
+    def _build(self):
+        """ Rebuilds every structure from the indexed element sets. """
+        elsets = self._records.values()
+        self._shells.build([
+            (elset.perigee, elset.apogee, elset.norad_cat_id)
+            for elset in elsets
+            if elset.perigee is not None and elset.apogee is not None])
+        self._inclinations.build([
+            (elset.inclination, elset.norad_cat_id) for elset in elsets
+            if elset.inclination is not None])
+        self._nodes.build([
+            (elset.ra_of_asc_node, elset.norad_cat_id) for elset in elsets
+            if elset.ra_of_asc_node is not None])
+
+    def _index(self, elset: TleRecord):
+        """ Adds an element set to every structure it has values for. """
+        norad_cat_id = elset.norad_cat_id
+        self._records[norad_cat_id] = elset
+        if elset.perigee is not None and elset.apogee is not None:
+            self._shells.insert(elset.perigee, elset.apogee, norad_cat_id)
+        if elset.inclination is not None:
+            self._inclinations.insert(elset.inclination, norad_cat_id)
+        if elset.ra_of_asc_node is not None:
+            self._nodes.insert(elset.ra_of_asc_node, norad_cat_id)
+
+    def _unindex(self, elset: TleRecord):
+        """ Removes an element set from every structure. """
+        norad_cat_id = elset.norad_cat_id
+        del self._records[norad_cat_id]
+        if elset.perigee is not None and elset.apogee is not None:
+            self._shells.remove(elset.perigee, norad_cat_id)
+        if elset.inclination is not None:
+            self._inclinations.remove(elset.inclination, norad_cat_id)
+        if elset.ra_of_asc_node is not None:
+            self._nodes.remove(elset.ra_of_asc_node, norad_cat_id)
+
+    def find(self, altitude=None, inclination=None,
+             ra_of_asc_node=None) -> list:
+        """ Returns the element sets in an orbital regime.
+
+        Each keyword argument gives an inclusive (low, high) range, in which
+        either bound may be None, or a single value. Objects missing a value
+        searched on are left out::
+
+            >> index.find(altitude=(500., 600.))
+            >> index.find(altitude=35786., inclination=(None, 2.))
+            >> index.find(inclination=(97., 99.), ra_of_asc_node=(350., 10.))
+
+        Kwargs:
+            altitude: km; matches objects whose shell, from perigee to apogee,
+                overlaps the range. Default is None, for any.
+            inclination: degrees. Default is None, for any.
+            ra_of_asc_node: degrees. A range whose low bound is above its
+                high bound wraps through 360. Default is None, for any.
+
+        Returns:
+            List of TleRecords, ordered by NORAD_CAT_ID.
+
+        """
+        with self._lock:
+            matches = []
+            if altitude is not None:
+                matches.append(self._shells.overlapping(*_bounds(altitude)))
+            if inclination is not None:
+                matches.append(self._inclinations.between(
+                    *_bounds(inclination)))
+            if ra_of_asc_node is not None:
+                low, high = _bounds(ra_of_asc_node)
+                if low > high:
+                    matches.append(self._nodes.between(low, math.inf) +
+                                   self._nodes.between(-math.inf, high))
+                else:
+                    matches.append(self._nodes.between(low, high))
+            if not matches:
+                found = self._records.keys()
+            else:
+                matches.sort(key=len)
+                found = set(matches[0]).intersection(*matches[1:])
+            return [self._records[norad_cat_id]
+                    for norad_cat_id in sorted(found)]
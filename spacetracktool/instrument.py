@@ -0,0 +1,282 @@
+""" Reports what each query cost, to hooks of your choosing.
+
+A client created with hooks calls each hook with a RequestEvent once every
+query submitted has finished, whether it succeeded, failed or was answered by
+the cache. A hook is any callable taking the event. Two are provided: a
+HistogramCollector, which keeps in-process histograms and counters, and a
+PrometheusExporter, which records the same figures as Prometheus metrics::
+
+    import spacetracktool as st
+    from spacetracktool.instrument import HistogramCollector
+
+    collector = HistogramCollector()
+    client = st.SpaceTrackClient('username', 'password', persistent=True,
+                                 hooks=[collector])
+    client.tle_latest_query(norad_cat_id=25544, ordinal=1)
+    print(collector.summary()['tle_latest']['ttfb'])
+
+Timings are in seconds. The DNS and connect timings are only measured by the
+AsyncSpaceTrackClient, through aiohttp's tracing; they are None otherwise. The
+PrometheusExporter requires prometheus_client.
+
+"""
+
+
+import bisect
+import collections
+import math
+import threading
+from urllib.parse import urlsplit, urlunsplit
+
+try:
+    import prometheus_client
+except ImportError:  # pragma: no cover
+    prometheus_client = None
+
+
+RequestEvent = collections.namedtuple('RequestEvent', [
+    'request_class', 'url', 'status', 'total', 'queue_wait', 'login', 'dns',
+    'connect', 'ttfb', 'download', 'response_bytes', 'wire_bytes', 'retries',
+    'from_cache', 'error'])
+RequestEvent.__doc__ = """ What one submitted query cost.
+
+Attributes:
+    request_class: the space-track.org request class, e.g. 'tle'.
+    url: the query URL, without any credentials.
+    status: the HTTP status code, or None if no response was received.
+    total: seconds from submit being called until the response was ready. For
+        a streamed query, until the last record was read.
+    queue_wait: seconds spent waiting on the rate limiter.
+    login: seconds spent logging in, or None if the query was sent with the
+        credentials instead.
+    dns: seconds spent resolving the host name, or None.
+    connect: seconds spent opening a connection, or None.
+    ttfb: seconds from sending the request to receiving the response headers,
+        for the last attempt.
+    download: seconds spent reading the response body, for the last attempt.
+    response_bytes: size of the decoded response body, or None.
+    wire_bytes: size of the body as sent, compressed, or None if unknown.
+    retries: the number of retries made.
+    from_cache: True if the client's cache answered the query.
+    error: the exception raised by the query, or None.
+
+"""
+
+# Timings kept by the HistogramCollector.
+TIMINGS = ('total', 'queue_wait', 'login', 'dns', 'connect', 'ttfb',
+           'download')
+
+# Upper bounds of the default histogram buckets, in seconds.
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1., 2.5,
+           5., 10., 30., 60., 120.)
+
+# Name figures are kept under for queries whose request class is unknown.
+UNKNOWN_CLASS = 'unknown'
+
+
+def redact(url: str) -> str:
+    """ Returns a URL without any user name or password in it. """
+    parts = urlsplit(url)
+    if '@' not in parts.netloc:
+        return url
+    netloc = parts.netloc.rpartition('@')[2]
+    return urlunsplit(parts._replace(netloc=netloc))
+
+
+class Histogram:
+    """ Counts observations into fixed buckets.
+
+    Not safe to share between threads by itself; the HistogramCollector holds
+    a lock around it.
+
+    Kwargs:
+        bounds: increasing upper bounds of the buckets. Larger values go in a
+            final, unbounded bucket. Default is BUCKETS.
+
+    """
+
+    def __init__(self, bounds=BUCKETS):
+        self.bounds = tuple(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.count = 0
+        self.sum = 0.
+        self.max = 0.
+
+    def observe(self, value: float):
+        """ Adds an observation. """
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+
+    def quantile(self, fraction: float) -> float:
+        """ Estimates a quantile, interpolating within its bucket.
+
+        Returns:
+            The estimate, or NaN if there are no observations.
+
+        """
+        if not self.count:
+            return math.nan
+        rank = fraction * self.count
+        seen = 0
+        for index, count in enumerate(self.counts):
+            if count and seen + count >= rank:
+                low = self.bounds[index - 1] if index else 0.
+                high = self.bounds[index] if index < len(self.bounds) \
+                    else self.max
+                return low + (high - low) * (rank - seen) / count
+            seen += count
+        return self.max
+
+    def summary(self) -> dict:
+        """ Returns the count, mean, p50, p90, p99 and max. """
+        return {'count': self.count,
+                'mean': self.sum / self.count if self.count else math.nan,
+                'p50': self.quantile(0.5), 'p90': self.quantile(0.9),
+                'p99': self.quantile(0.99), 'max': self.max}
+
+
+class HistogramCollector:
+    """ Hook keeping timing histograms and counters per request class.
+
+    Figures are kept for each request class, and for all of them together
+    under the name '*'. Queries of no known class are kept under
+    UNKNOWN_CLASS. All methods are safe to call from several threads at
+    once.
+
+    Kwargs:
+        bounds: upper bounds of the histogram buckets. Default is BUCKETS.
+
+    """
+    COUNTERS = ('requests', 'errors', 'cache_hits', 'cache_misses',
+                'retries', 'response_bytes', 'wire_bytes')
+
+    def __init__(self, bounds=BUCKETS):
+        self._bounds = bounds
+        self._lock = threading.Lock()
+        self._histograms = {}  # (request_class, timing) -> Histogram
+        self._counters = collections.defaultdict(collections.Counter)
+        self._statuses = collections.defaultdict(collections.Counter)
+
+    def __call__(self, event: RequestEvent):
+        with self._lock:
+            for name in (event.request_class or UNKNOWN_CLASS, '*'):
+                self._record(name, event)
+
+    def _record(self, name: str, event: RequestEvent):
+        """ Adds an event to one class's figures; the lock must be held. """
+        for timing in TIMINGS:
+            value = getattr(event, timing)
+            if value is None:
+                continue
+            key = (name, timing)
+            if key not in self._histograms:
+                self._histograms[key] = Histogram(self._bounds)
+            self._histograms[key].observe(value)
+        counters = self._counters[name]
+        counters['requests'] += 1
+        counters['errors'] += event.error is not None
+        counters['cache_hits'] += bool(event.from_cache)
+        counters['cache_misses'] += not event.from_cache
+        counters['retries'] += event.retries or 0
+        counters['response_bytes'] += event.response_bytes or 0
+        counters['wire_bytes'] += event.wire_bytes or 0
+        if event.status is not None:
+            self._statuses[name][event.status] += 1
+
+    def histogram(self, timing: str, request_class: str = '*') -> Histogram:
+        """ Returns the histogram of one timing, or None if none was seen. """
+        with self._lock:
+            return self._histograms.get((request_class, timing))
+
+    def counters(self, request_class: str = '*') -> dict:
+        """ Returns the counters of a request class. """
+        with self._lock:
+            counters = self._counters.get(request_class,
+                                          collections.Counter())
+            return {name: counters[name] for name in self.COUNTERS}
+
+    def summary(self) -> dict:
+        """ Returns every figure, as nested dicts keyed by request class.
+
+        Each class maps each timing seen to its histogram summary, each
+        counter name to its count, and 'statuses' to a dict of status counts.
+
+        """
+        with self._lock:
+            result = {}
+            for name, counters in self._counters.items():
+                figures = {counter: counters[counter]
+                           for counter in self.COUNTERS}
+                figures['statuses'] = dict(self._statuses[name])
+                result[name] = figures
+            for (name, timing), histogram in self._histograms.items():
+                result[name][timing] = histogram.summary()
+            return result
+
+    def reset(self):
+        """ Forgets every figure. """
+        with self._lock:
+            self._histograms.clear()
+            self._counters.clear()
+            self._statuses.clear()
+
+
+class PrometheusExporter:
+    """ Hook recording query figures as Prometheus metrics.
+
+    The metrics are a `<namespace>_request_seconds` histogram labelled by
+    request class and phase (the TIMINGS), a `<namespace>_requests_total`
+    counter labelled by request class, status and whether the cache answered,
+    and `<namespace>_response_bytes_total` and `<namespace>_retries_total`
+    counters labelled by request class. Queries of no known class are
+    labelled UNKNOWN_CLASS. Serve the metrics as usual for prometheus_client,
+    e.g. with prometheus_client.start_http_server.
+
+    Kwargs:
+        registry: the CollectorRegistry to register the metrics with. Default
+            is prometheus_client's default registry.
+        namespace: prefix of the metric names. Default is 'spacetracktool'.
+        buckets: the histogram bucket bounds. Default is BUCKETS.
+
+    Raises:
+        ImportError: if prometheus_client is not installed.
+
+    """
+
+    def __init__(self, registry=None, namespace: str = 'spacetracktool',
+                 buckets=BUCKETS):
+        if prometheus_client is None:
+            raise ImportError('PrometheusExporter requires prometheus_client.'
+                              ' Install it with pip install prometheus_client.')
+        if registry is None:
+            registry = prometheus_client.REGISTRY
+        self._seconds = prometheus_client.Histogram(
+            'request_seconds', 'Time spent on space-track.org queries.',
+            ['request_class', 'phase'], namespace=namespace,
+            buckets=buckets, registry=registry)
+        self._requests = prometheus_client.Counter(
+            'requests', 'Queries submitted to space-track.org.',
+            ['request_class', 'status', 'cache'], namespace=namespace,
+            registry=registry)
+        self._bytes = prometheus_client.Counter(
+            'response_bytes', 'Bytes of query results received.',
+            ['request_class'], namespace=namespace, registry=registry)
+        self._retries = prometheus_client.Counter(
+            'retries', 'Retries of failed queries.', ['request_class'],
+            namespace=namespace, registry=registry)
+
+    def __call__(self, event: RequestEvent):
+        request_class = event.request_class or UNKNOWN_CLASS
+        for timing in TIMINGS:
+            value = getattr(event, timing)
+            if value is not None:
+                self._seconds.labels(request_class, timing).observe(value)
+        status = 'error' if event.status is None else str(event.status)
+        cache = 'hit' if event.from_cache else 'miss'
+        self._requests.labels(request_class, status, cache).inc()
+        if event.response_bytes:
+            self._bytes.labels(request_class).inc(event.response_bytes)
+        if event.retries:
+            self._retries.labels(request_class).inc(event.retries)
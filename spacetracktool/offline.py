@@ -0,0 +1,252 @@
+""" Evaluates space-track.org queries locally, against records already fetched.
+
+A RecordTable holds query results as columns, and answers any query built for
+the same request class without contacting space-track.org, so one large pull
+can be re-sliced as often as needed without spending any of the rate limit::
+
+    import spacetracktool as st
+    from spacetracktool.offline import RecordTable
+
+    client = st.SpaceTrackClient('username', 'password')
+    table = RecordTable(client.tle_latest_query(ordinal=1).json())
+    query = client.build_query('tle_latest', inclination='97--99',
+                               object_type='PAYLOAD', orderby='EPOCH desc',
+                               limit=10)
+    newest_sun_sync = table.select(query)
+
+The predicate language is the one space-track.org uses, and that
+spacetracktool.operations builds: `value`, `>value`, `<value`, `<>value`,
+`start--end`, comma-separated lists of any of these, `null-val`,
+`<>null-val`, `~~value` (contains), `^value` (starts with), and `now` or
+`now-days` in place of a date. Text matches ignore case. Values that look like
+numbers are compared as numbers, and everything else, including dates, as
+text; a 'T' between a date and its time is read as a space. The orderby,
+limit, distinct and predicates controls are applied too.
+
+Each filter is a vectorized NumPy operation over a whole column, and columns
+are converted once and then reused by every later query. This module
+requires NumPy.
+
+"""
+
+
+import datetime
+import re
+from .query import Query
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover
+    np = None
+
+
+NULL = 'null-val'  # space-track.org's null string
+
+_NOW = re.compile(r'^now(?:([+-])(\d+(?:\.\d*)?))?$', re.IGNORECASE)
+
+# An ISO date followed by a 'T' time separator, in lower-case text.
+_ISO_T = re.compile(r'^(\d{4}-\d{2}-\d{2})t')
+
+
+def _number(value: str) -> float:
+    """ Returns a predicate value as a float, or None if it is not one. """
+    try:
+        return float(value)
+    except ValueError:
+        return None
+
+
+def _text(value: str) -> str:
+    """ Returns a value as lower-case text, dates with a space before the time.
+
+    Epochs may be sent as '2024-01-01T12:00:00' or '2024-01-01 12:00:00'; both
+    are compared as the latter, as `now` is written.
+
+    """
+    return _ISO_T.sub(r'\1 ', value.lower())
+
+
+def _resolve_now(value: str, now: datetime.datetime) -> str:
+    """ Replaces `now` or `now-days` with a date string. """
+    match = _NOW.match(value)
+    if match is None:
+        return value
+    sign, days = match.groups()
+    offset = datetime.timedelta(days=float(days or 0))
+    moment = now - offset if sign == '-' else now + offset
+    return moment.strftime('%Y-%m-%d %H:%M:%S')
+
+
+class RecordTable:
+    """ Columnar table of query results that answers queries locally.
+
+    Args:
+        records: iterable of record dicts, as returned by space-track.org in
+            the 'json' format, or by a CatalogStore.
+
+    Kwargs:
+        clock: function returning the current UTC time as a naive datetime,
+            used for `now` predicates. Default is datetime.datetime.utcnow.
+
+    Raises:
+        ImportError: if NumPy is not installed.
+
+    """
+
+    def __init__(self, records, clock=datetime.datetime.utcnow):
+        if np is None:
+            raise ImportError('RecordTable requires NumPy. Install it with '
+                              'pip install numpy.')
+        self._records = list(records)
+        self._clock = clock
+        self._text = {}  # field -> (lower-case text, missing mask)
+        self._numbers = {}  # field -> float values, NaN where not numbers
+
+    def __len__(self):
+        return len(self._records)
+
+    def _column(self, field: str) -> tuple:
+        """ Returns a field's lower-case text and missing-value mask. """
+        if field not in self._text:
+            values = [record.get(field) for record in self._records]
+            missing = np.array([value is None or value == ''
+                                for value in values], dtype=bool)
+            text = np.array(['' if value is None else _text(str(value))
+                             for value in values], dtype=str)
+            self._text[field] = (text, missing)
+        return self._text[field]
+
+    def _numeric(self, field: str):
+        """ Returns a field as floats, NaN where a value is not a number. """
+        if field not in self._numbers:
+            text, missing = self._column(field)
+            try:
+                numbers = np.where(missing, 'nan', text).astype(float)
+            except ValueError:
+                numbers = np.array([_number(value) if value else None
+                                    for value in text], dtype=float)
+            self._numbers[field] = numbers
+        return self._numbers[field]
+
+    def _compare(self, field: str, value: str):
+        """ Returns the column and value to compare, as numbers or text. """
+        value = _resolve_now(value, self._clock())
+        number = _number(value)
+        if number is not None:
+            return self._numeric(field), number
+        return self._column(field)[0], _text(value)
+
+    def _term(self, field: str, term: str):
+        """ Returns the mask of rows matching one predicate term. """
+        text, missing = self._column(field)
+        if term.lower() == NULL:
+            return missing.copy()
+        if term.startswith('<>'):
+            if term[2:].lower() == NULL:
+                return ~missing
+            return ~self._term(field, term[2:]) & ~missing
+        if term.startswith('~~'):
+            return np.char.find(text, _text(term[2:])) >= 0
+        if term.startswith('^'):
+            return np.char.startswith(text, _text(term[1:]))
+        if term.startswith('>'):
+            column, value = self._compare(field, term[1:])
+            return (column > value) & ~missing
+        if term.startswith('<'):
+            column, value = self._compare(field, term[1:])
+            return (column < value) & ~missing
+        if '--' in term:
+            low, high = term.split('--', 1)
+            if _number(low) is not None and _number(high) is not None:
+                column, low, high = self._numeric(field), float(low), \
+                    float(high)
+            else:
+                now = self._clock()
+                column = text
+                low = _text(_resolve_now(low, now))
+                high = _text(_resolve_now(high, now))
+            return (column >= low) & (column <= high) & ~missing
+        column, value = self._compare(field, term)
+        return column == value
+
+    def mask(self, field: str, predicate: str):
+        """ Returns the boolean mask of rows matching a predicate.
+
+        Args:
+            field: the field name, e.g. 'INCLINATION'.
+            predicate: the predicate value, e.g. '97--99'.
+
+        """
+        field = field.upper()
+        result = np.zeros(len(self._records), dtype=bool)
+        for term in predicate.split(','):
+            result |= self._term(field, term)
+        return result
+
+    def _sort_key(self, field: str):
+        """ Returns integer ranks sorting a field, missing values first. """
+        numbers = self._numeric(field)
+        text, missing = self._column(field)
+        if np.isnan(numbers[~missing]).any():
+            values = text
+        else:
+            values = np.where(missing, -np.inf, numbers)
+        return np.unique(values, return_inverse=True)[1].ravel()
+
+    def _order(self, index, orderby: str):
+        """ Sorts row indices by an orderby control. """
+        for clause in reversed(orderby.split(',')):
+            parts = clause.split()
+            if not parts:
+                continue
+            ranks = self._sort_key(parts[0].upper())[index]
+            if len(parts) > 1 and parts[1].lower() == 'desc':
+                ranks = -ranks
+            index = index[np.argsort(ranks, kind='stable')]
+        return index
+
+    def select(self, query) -> list:
+        """ Runs a query against the table.
+
+        Args:
+            query: a Query, as built by SpaceTrackClient.build_query, or a
+                query URL. Its request class is not checked against the
+                records.
+
+        Returns:
+            List of the matching record dicts, in the order and number asked
+            for by the query's orderby and limit controls.
+
+        """
+        if isinstance(query, str):
+            query = Query.from_url(query)
+        controls = {}
+        selected = np.ones(len(self._records), dtype=bool)
+        for key, value in query.predicates:
+            if key.islower():
+                controls[key] = value
+            else:
+                selected &= self.mask(key, value)
+        index = np.flatnonzero(selected)
+        if 'orderby' in controls:
+            index = self._order(index, controls['orderby'])
+        rows = [self._records[i] for i in index]
+        if 'predicates' in controls:
+            fields = [field.upper() for field in
+                      controls['predicates'].split(',')]
+            rows = [{field: row.get(field) for field in fields}
+                    for row in rows]
+        if controls.get('distinct', '').lower() == 'true':
+            seen = set()
+            unique = []
+            for row in rows:
+                fingerprint = tuple(sorted(row.items()))
+                if fingerprint not in seen:
+                    seen.add(fingerprint)
+                    unique.append(row)
+            rows = unique
+        if 'limit' in controls:
+            limit, _, offset = controls['limit'].partition(',')
+            offset = int(offset or 0)
+            rows = rows[offset:offset + int(limit)]
+        return rows
@@ -73,3 +73,63 @@ def make_range_string(start: str = None, end: str = None,
             raise ValueError("Either 'start' or 'end' or both must be \
                               specified if 'equal' is False.")
     return result
+
+
+def make_id_list_strings(ids, max_length: int = 2000) -> list:
+    """ Packs catalog IDs into as few list predicate strings as possible.
+
+    The IDs are de-duplicated and sorted, and every run of three or more
+    consecutive IDs is folded into a `'[start]--[end]'` range. The resulting
+    terms are joined with commas into strings no longer than `max_length`, so
+    each string may be passed as a single predicate value, such as
+    `norad_cat_id`, without the URL growing too long. A single term longer than
+    `max_length` is returned on its own.
+
+    Args:
+
+        ids: iterable of ints or values coercable to int.
+            The catalog IDs to pack.
+
+    Kwargs:
+
+        max_length: int.
+            The maximum length of each returned string. Default is 2000.
+
+    Returns:
+
+        List of comma-separated ID strings, e.g. `['1--5,7,9']`.
+
+    Raises:
+
+        ValueError: if any ID cannot be coerced to int.
+
+    """
+    try:
+        sorted_ids = sorted(set(int(i) for i in ids))
+    except (TypeError, ValueError) as excep:
+        raise ValueError('ids must be ints or coercable to int!') from excep
+    terms = []
+    start = 0
+    while start < len(sorted_ids):
+        end = start
+        while (end + 1 < len(sorted_ids) and
+               sorted_ids[end + 1] == sorted_ids[end] + 1):
+            end += 1
+        if end - start >= 2:
+            terms.append(make_range_string(sorted_ids[start], sorted_ids[end]))
+        else:
+            terms.extend(str(i) for i in sorted_ids[start:end + 1])
+        start = end + 1
+    chunks = []
+    chunk = []
+    length = -1  # the first term has no leading comma
+    for term in terms:
+        if chunk and length + 1 + len(term) > max_length:
+            chunks.append(','.join(chunk))
+            chunk = []
+            length = -1
+        chunk.append(term)
+        length += 1 + len(term)
+    if chunk:
+        chunks.append(','.join(chunk))
+    return chunks
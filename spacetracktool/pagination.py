@@ -0,0 +1,223 @@
+""" Splits huge queries into pages of manageable size.
+
+A query like tle_query(epoch='>2000-01-01') can time out on the server or
+produce a single enormous response. The functions here split such a query into
+many smaller ones and yield the results one page at a time. Each page is a list
+of records parsed as by SpaceTrackClient.submit(..., stream=True).
+
+paginate uses the limit/offset REST control with a stable sort order::
+
+    from spacetracktool import pagination
+    for page in pagination.paginate(client, 'satcat', page_size=5000,
+                                    current='Y'):
+        handle(page)
+
+paginate_epochs walks an epoch range in sub-windows, halving a window whose
+page comes back too large and doubling the window after small pages::
+
+    for page in pagination.paginate_epochs(client, 'tle', '2000-01-01',
+                                           '2018-01-01', max_rows=20000):
+        handle(page)
+
+Both keep up to `prefetch` pages downloading in background threads, so
+parsing and handling one page overlaps the download of the next.
+
+"""
+
+
+import collections
+import datetime
+from concurrent.futures import ThreadPoolExecutor
+from . import parsers
+from .query import REQUEST_SCHEMAS
+
+
+def _fetch_page(client, query) -> list:
+    """ Submits one page's query and parses its records. """
+    response = client.submit(query)
+    return list(parsers.iter_records(response, query.fmt))
+
+
+def _check_format(client):
+    """ Raises ValueError if the client's results cannot be paged. """
+    if client.fmt not in parsers.STREAMABLE_FORMATS:
+        raise ValueError('Cannot page the {} format!'.format(client.fmt))
+
+
+def default_orderby(request_class: str) -> str:
+    """ Returns a sort order that makes limit/offset pages stable.
+
+    Args:
+        request_class: the space-track.org request class.
+
+    Returns:
+        An orderby value such as 'NORAD_CAT_ID asc,EPOCH asc'.
+
+    Raises:
+        ValueError: if the request class has no natural sort key.
+
+    """
+    keys = REQUEST_SCHEMAS[request_class].names
+    order = [key.upper() + ' asc' for key in ('norad_cat_id', 'epoch', 'file')
+             if key in keys]
+    if not order:
+        raise ValueError('Please give an orderby for {} queries!'.format(
+            request_class))
+    return ','.join(order)
+
+
+def paginate(client, request_class: str, page_size: int = 1000,
+             orderby: str = None, prefetch: int = 2, **kwargs):
+    """ Yields the results of a query in pages, using limit and offset.
+
+    Args:
+        client: the SpaceTrackClient to submit queries with.
+        request_class: the space-track.org request class, e.g. 'satcat'.
+
+    Kwargs:
+        page_size: the number of records per page. Default is 1000.
+        orderby: the sort order the pages are cut from, or None to use
+            default_orderby. Default is None.
+        prefetch: the number of pages downloading at once. Default is 2.
+
+    Any other keyword arguments are added to every query, as for
+    SpaceTrackClient.build_query, except limit, which is set for each page.
+
+    Yields:
+        Lists of records.
+
+    Raises:
+        ValueError: if the client's format cannot be paged.
+
+    """
+    _check_format(client)
+    kwargs.pop('limit', None)
+    if orderby is None:
+        orderby = default_orderby(request_class)
+    prefetch = max(1, prefetch)
+    offset = 0
+    pending = collections.deque()
+    with ThreadPoolExecutor(max_workers=prefetch) as pool:
+
+        def schedule():
+            nonlocal offset
+            query = client.build_query(request_class, orderby=orderby,
+                                       limit='{},{}'.format(page_size, offset),
+                                       **kwargs)
+            pending.append(pool.submit(_fetch_page, client, query))
+            offset += page_size
+
+        try:
+            for _ in range(prefetch):
+                schedule()
+            while pending:
+                page = pending.popleft().result()
+                if len(page) < page_size:
+                    if page:
+                        yield page
+                    return
+                schedule()
+                yield page
+        finally:
+            for future in pending:
+                future.cancel()
+
+
+def _to_datetime(value) -> datetime.datetime:
+    """ Converts a datetime or an ISO date string to a datetime. """
+    if isinstance(value, datetime.datetime):
+        return value
+    return datetime.datetime.fromisoformat(str(value))
+
+
+def epoch_range(start: datetime.datetime, end: datetime.datetime) -> str:
+    """ Returns an epoch range string covering [start, end).
+
+    space-track.org ranges include both ends, so the range stops one
+    microsecond short of `end` to keep adjacent windows from overlapping.
+
+    """
+    fmt = '%Y-%m-%d %H:%M:%S.%f'
+    last = end - datetime.timedelta(microseconds=1)
+    return '{}--{}'.format(start.strftime(fmt), last.strftime(fmt))
+
+
+def paginate_epochs(client, request_class: str, start, end,
+                    window: datetime.timedelta = datetime.timedelta(days=1),
+                    max_rows: int = 10000,
+                    min_window: datetime.timedelta = datetime.timedelta(
+                        minutes=1),
+                    prefetch: int = 2, **kwargs):
+    """ Yields the results of an epoch range in adaptive sub-windows.
+
+    Each window is fetched with limit set one above `max_rows`. A window that
+    overflows is thrown away and fetched again as two halves, and later windows
+    start at the smaller size. A window that comes back under a quarter full
+    doubles the size of the windows after it. A window no larger than
+    `min_window` that still overflows is paged with limit and offset instead.
+
+    Args:
+        client: the SpaceTrackClient to submit queries with.
+        request_class: a request class with an epoch predicate, e.g. 'tle'.
+        start: the start of the range, as a datetime or ISO date string.
+        end: the end of the range (excluded), likewise.
+
+    Kwargs:
+        window: the initial window length. Default is one day.
+        max_rows: the most records in one page. Default is 10000.
+        min_window: the smallest window to split. Default is one minute.
+        prefetch: the number of windows downloading at once. Default is 2.
+
+    Any other keyword arguments are added to every query, as for
+    SpaceTrackClient.build_query, except epoch and limit, which are set for
+    each window.
+
+    Yields:
+        Lists of records, in epoch order of their windows.
+
+    Raises:
+        ValueError: if the client's format cannot be paged.
+
+    """
+    _check_format(client)
+    for key in ('epoch', 'limit'):
+        kwargs.pop(key, None)
+    start, end = _to_datetime(start), _to_datetime(end)
+    prefetch = max(1, prefetch)
+    size = window
+    cursor = start
+    pending = collections.deque()
+    with ThreadPoolExecutor(max_workers=prefetch) as pool:
+
+        def launch(low, high):
+            query = client.build_query(request_class,
+                                       epoch=epoch_range(low, high),
+                                       limit=max_rows + 1, **kwargs)
+            return low, high, pool.submit(_fetch_page, client, query)
+
+        try:
+            while cursor < end or pending:
+                while cursor < end and len(pending) < prefetch:
+                    high = min(cursor + size, end)
+                    pending.append(launch(cursor, high))
+                    cursor = high
+                low, high, future = pending.popleft()
+                page = future.result()
+                if len(page) <= max_rows:
+                    if len(page) < max_rows // 4:
+                        size = max(size, (high - low) * 2)
+                    if page:
+                        yield page
+                elif high - low <= min_window:
+                    yield from paginate(client, request_class,
+                                        page_size=max_rows, prefetch=prefetch,
+                                        epoch=epoch_range(low, high),
+                                        **kwargs)
+                else:
+                    middle = low + (high - low) / 2
+                    size = min(size, middle - low)
+                    pending.appendleft(launch(middle, high))
+                    pending.appendleft(launch(low, middle))
+        finally:
+            for _, _, future in pending:
+                future.cancel()
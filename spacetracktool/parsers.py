@@ -0,0 +1,203 @@
+""" Incremental parsers for space-track.org responses.
+
+Each parser takes an iterable of text chunks, as they arrive from the network,
+and yields one record at a time, so memory use does not grow with the size of
+the response. The SpaceTrackClient uses these when submitting with
+stream=True::
+
+    import spacetracktool as st
+    client = st.SpaceTrackClient('username', 'password')
+    query = client.build_query('tle', epoch='>2018-01-01')
+    for record in client.submit(query, stream=True):
+        print(record['NORAD_CAT_ID'])
+
+JSON responses yield dicts, CSV responses yield dicts keyed by the header row,
+and 'tle'/'3le' responses yield tuples of two or three lines.
+
+"""
+
+
+import codecs
+import csv
+import json
+
+
+CHUNK_SIZE = 64 * 1024  # bytes read from the network at a time
+STREAMABLE_FORMATS = ('json', 'csv', 'tle', '3le')
+
+_WHITESPACE = ' \t\n\r'
+
+
+def iter_text(byte_chunks, encoding: str = None):
+    """ Decodes byte chunks into text, even if characters straddle chunks.
+
+    Args:
+        byte_chunks: iterable of bytes.
+
+    Kwargs:
+        encoding: the text encoding, or None for UTF-8. Default is None.
+
+    Yields:
+        Text chunks.
+
+    """
+    decoder = codecs.getincrementaldecoder(encoding or 'utf-8')('replace')
+    for chunk in byte_chunks:
+        text = decoder.decode(chunk)
+        if text:
+            yield text
+    text = decoder.decode(b'', final=True)
+    if text:
+        yield text
+
+
+def iter_lines(chunks, keepends: bool = False):
+    """ Splits text chunks into lines.
+
+    Args:
+        chunks: iterable of str.
+
+    Kwargs:
+        keepends: if True, lines keep their line endings. Default is False.
+
+    Yields:
+        Lines of text.
+
+    """
+    pending = ''
+    for chunk in chunks:
+        pending += chunk
+        if '\n' not in chunk:
+            continue
+        lines = pending.split('\n')
+        pending = lines.pop()
+        for line in lines:
+            yield line + '\n' if keepends else line.rstrip('\r')
+    if pending:
+        yield pending if keepends else pending.rstrip('\r')
+
+
+def iter_json_array(chunks):
+    """ Yields the elements of a JSON array as each one is completed.
+
+    Args:
+        chunks: iterable of str holding a JSON array.
+
+    Yields:
+        Decoded array elements.
+
+    Raises:
+        ValueError: if the text is not a JSON array.
+
+    """
+    decoder = json.JSONDecoder()
+    buffer = ''
+    pos = 0
+    started = False
+    for chunk in chunks:
+        buffer = buffer[pos:] + chunk
+        pos = 0
+        while True:
+            while pos < len(buffer) and buffer[pos] in _WHITESPACE:
+                pos += 1
+            if pos == len(buffer):
+                break
+            if not started:
+                if buffer[pos] != '[':
+                    raise ValueError('Response is not a JSON array!')
+                started = True
+                pos += 1
+                continue
+            if buffer[pos] in ',]':
+                pos += 1
+                continue
+            try:
+                value, end = decoder.raw_decode(buffer, pos)
+            except ValueError:
+                break  # element is not complete yet
+            if end == len(buffer):
+                break  # a number or literal may continue in the next chunk
+            pos = end
+            yield value
+    rest = buffer[pos:].strip()
+    while rest and rest != ']':
+        # the final element was held back waiting for a delimiter
+        value, end = decoder.raw_decode(rest)
+        yield value
+        rest = rest[end:].lstrip(_WHITESPACE + ',')
+    if not started:
+        raise ValueError('Response is not a JSON array!')
+
+
+def iter_csv(chunks):
+    """ Yields the rows of a CSV document as dicts keyed by its header.
+
+    Args:
+        chunks: iterable of str holding CSV text.
+
+    Yields:
+        One dict per row.
+
+    """
+    yield from csv.DictReader(iter_lines(chunks, keepends=True))
+
+
+def iter_tle(chunks, lines_per_record: int = 2):
+    """ Groups two-line or three-line element sets.
+
+    Args:
+        chunks: iterable of str holding element sets.
+
+    Kwargs:
+        lines_per_record: 2 for 'tle' or 3 for '3le' responses. Default is 2.
+
+    Yields:
+        Tuples of `lines_per_record` lines.
+
+    Raises:
+        ValueError: if the response ends partway through an element set.
+
+    """
+    record = []
+    for line in iter_lines(chunks):
+        if not line.strip():
+            continue
+        record.append(line)
+        if len(record) == lines_per_record:
+            yield tuple(record)
+            record = []
+    if record:
+        raise ValueError('Response ended partway through an element set!')
+
+
+def iter_records(response, fmt: str):
+    """ Yields the records of a streamed response, then closes it.
+
+    Args:
+        response: a requests Response opened with stream=True.
+        fmt: the format of the response: 'json', 'csv', 'tle' or '3le'.
+
+    Yields:
+        Records, as described for each format above.
+
+    Raises:
+        ValueError: if the format cannot be streamed.
+
+    """
+    if fmt == 'json':
+        parse = iter_json_array
+    elif fmt == 'csv':
+        parse = iter_csv
+    elif fmt == 'tle':
+        parse = iter_tle
+    elif fmt == '3le':
+        def parse(chunks):
+            return iter_tle(chunks, lines_per_record=3)
+    else:
+        raise ValueError('Cannot stream the {} format!'.format(fmt))
+    try:
+        chunks = iter_text(response.iter_content(CHUNK_SIZE),
+                           response.encoding)
+        yield from parse(chunks)
+    finally:
+        response.close()
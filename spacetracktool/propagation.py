@@ -0,0 +1,237 @@
+""" Propagates whole batches of element sets to grids of times with SGP4.
+
+propagate takes the element sets of a query, as a NumPy structured array, as
+TleRecords or as JSON rows, and a time array, and returns the position and
+velocity of every object at every time. The work runs in sgp4's compiled
+SatrecArray, one call per chunk of objects, with no Python loop over objects
+or times; large catalogs may be split across a process pool::
+
+    import numpy as np
+    import spacetracktool as st
+    from spacetracktool.propagation import propagate
+
+    client = st.SpaceTrackClient('username', 'password', fmt='tle')
+    elements = client.columns(client.build_query('tle_latest', ordinal=1))
+    times = np.datetime64('2024-01-01') + np.arange(1440) * np.timedelta64(
+        1, 'm')
+    ephemeris = propagate(elements, times, workers=8)
+    ephemeris.positions.shape  # (objects, 1440, 3)
+
+Positions are in kilometers and velocities in kilometers per second, in the
+TEME frame SGP4 works in. Times are UTC. This module requires NumPy and sgp4.
+
+"""
+
+
+import collections
+import math
+from concurrent.futures import Executor, ProcessPoolExecutor
+from multiprocessing import shared_memory
+from .columns import ELEMENT_DTYPE, from_records
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover
+    np = None
+
+try:
+    from sgp4.api import Satrec, SatrecArray, WGS72
+except ImportError:  # pragma: no cover
+    Satrec = None
+
+
+Ephemeris = collections.namedtuple('Ephemeris', [
+    'norad_cat_id', 'times', 'errors', 'positions', 'velocities'])
+Ephemeris.__doc__ = """ Positions and velocities of many objects at many times.
+
+Attributes:
+    norad_cat_id: int array of the objects' catalog numbers, shape (n,).
+    times: datetime64[us] array of the times, shape (m,).
+    errors: uint8 array of SGP4 error codes, 0 where propagation succeeded,
+        shape (n, m). See sgp4.api.SGP4_ERRORS.
+    positions: float array of TEME positions in km, NaN where propagation
+        failed, shape (n, m, 3).
+    velocities: float array of TEME velocities in km/s, shape (n, m, 3).
+
+"""
+
+_SGP4_EPOCH = '1949-12-31'  # day 0 of sgp4init epochs
+_UNIX_JD = 2440587.5  # Julian date of 1970-01-01
+_MINUTES_PER_DAY = 1440.
+
+
+def _require_sgp4():
+    """ Raises ImportError if NumPy or sgp4 is not installed. """
+    if np is None or Satrec is None:
+        raise ImportError('spacetracktool.propagation requires numpy and '
+                          'sgp4. Install them with pip install numpy sgp4.')
+
+
+def julian_dates(times) -> tuple:
+    """ Converts UTC times to the split Julian dates sgp4 takes.
+
+    Args:
+        times: array-like of datetime64 values, datetimes or ISO 8601
+            strings, or a single one.
+
+    Returns:
+        Tuple of float arrays of whole and fractional Julian days.
+
+    """
+    _require_sgp4()
+    times = np.atleast_1d(np.asarray(times, dtype='M8[us]'))
+    microseconds = times.astype(np.int64)
+    days, remainder = np.divmod(microseconds, 86400 * 10 ** 6)
+    return (days + _UNIX_JD, remainder / (86400. * 10 ** 6))
+
+
+def _satrecs(elements) -> list:
+    """ Builds a Satrec for each row of an ELEMENT_DTYPE array. """
+    epochs = (elements['epoch'] - np.datetime64(_SGP4_EPOCH, 'us')) / \
+        np.timedelta64(1, 'D')
+    radians = math.pi / 180.
+    per_minute = 2. * math.pi / _MINUTES_PER_DAY
+    satrecs = []
+    for row, epoch in zip(elements.tolist(), epochs.tolist()):
+        fields = dict(zip(elements.dtype.names, row))
+        satrec = Satrec()
+        satnum = fields['norad_cat_id']
+        satrec.sgp4init(
+            WGS72, 'i', satnum if 0 <= satnum <= 339999 else 0, epoch,
+            fields['bstar'],
+            fields['mean_motion_dot'] * per_minute / _MINUTES_PER_DAY,
+            fields['mean_motion_ddot'] * per_minute / _MINUTES_PER_DAY ** 2,
+            fields['eccentricity'], fields['arg_of_pericenter'] * radians,
+            fields['inclination'] * radians, fields['mean_anomaly'] * radians,
+            fields['mean_motion'] * per_minute,
+            fields['ra_of_asc_node'] * radians)
+        satrecs.append(satrec)
+    return satrecs
+
+
+def _propagate_chunk(elements, whole, fraction) -> tuple:
+    """ Propagates a chunk of element sets to every time.
+
+    Returns:
+        Tuple of the errors, positions and velocities arrays of the chunk.
+
+    """
+    return SatrecArray(_satrecs(elements)).sgp4(whole, fraction)
+
+
+def _result_arrays(buffers, count: int, times: int) -> tuple:
+    """ Returns the errors, positions and velocities arrays over buffers. """
+    return (np.ndarray((count, times), np.uint8, buffers[0]),
+            np.ndarray((count, times, 3), np.float64, buffers[1]),
+            np.ndarray((count, times, 3), np.float64, buffers[2]))
+
+
+def _propagate_shared(elements, whole, fraction, names: list, count: int,
+                      start: int):
+    """ Propagates a chunk into results held in shared memory.
+
+    Runs in a worker process, so that results are written once, in place,
+    instead of being pickled back to the parent.
+
+    Args:
+        elements: the chunk's rows of the ELEMENT_DTYPE array.
+        whole: whole Julian days of the times.
+        fraction: fractional Julian days of the times.
+        names: names of the shared memory blocks of the errors, positions
+            and velocities of every object.
+        count: the number of objects in all.
+        start: index of the chunk's first object.
+
+    """
+    blocks = [shared_memory.SharedMemory(name=name) for name in names]
+    try:
+        arrays = _result_arrays([block.buf for block in blocks], count,
+                                len(whole))
+        chunk = slice(start, start + len(elements))
+        for array, result in zip(arrays, _propagate_chunk(elements, whole,
+                                                          fraction)):
+            array[chunk] = result
+        del arrays, array  # release the buffers before closing
+    finally:
+        for block in blocks:
+            block.close()
+
+
+def propagate(elsets, times, workers=None,
+              chunk_size: int = 1000) -> Ephemeris:
+    """ Propagates every element set to every time.
+
+    Args:
+        elsets: a structured array with dtype
+            spacetracktool.columns.ELEMENT_DTYPE, or an iterable of
+            TleRecords or of JSON row dicts.
+        times: array-like of UTC times, as datetime64 values, datetimes or
+            ISO 8601 strings.
+
+    Kwargs:
+        workers: the number of worker processes to split the objects between,
+            or a concurrent.futures.Executor to run the chunks on. Workers
+            write their results straight into shared memory. None or 1
+            propagates in this process. Default is None.
+        chunk_size: the most objects propagated in one call. Smaller chunks
+            use less memory at once and spread better over workers. Default
+            is 1000.
+
+    Returns:
+        The Ephemeris of the objects, in the order given, at the times.
+
+    Raises:
+        ImportError: if NumPy or sgp4 is not installed.
+
+    """
+    _require_sgp4()
+    if not (isinstance(elsets, np.ndarray) and elsets.dtype == ELEMENT_DTYPE):
+        elsets = from_records(elsets)
+    times = np.atleast_1d(np.asarray(times, dtype='M8[us]'))
+    whole, fraction = julian_dates(times)
+    count = len(elsets)
+    chunks = [slice(start, start + chunk_size)
+              for start in range(0, count, max(1, chunk_size))]
+    if workers is None or workers == 1:
+        arrays = _result_arrays([None] * 3, count, len(times))
+        for chunk in chunks:
+            for array, result in zip(arrays, _propagate_chunk(
+                    elsets[chunk], whole, fraction)):
+                array[chunk] = result
+    else:
+        arrays = _propagate_parallel(elsets, whole, fraction, chunks,
+                                     workers)
+    return Ephemeris(elsets['norad_cat_id'].copy(), times, *arrays)
+
+
+def _propagate_parallel(elsets, whole, fraction, chunks: list,
+                        workers) -> tuple:
+    """ Propagates chunks of element sets on a pool of worker processes.
+
+    Returns:
+        Tuple of the errors, positions and velocities arrays.
+
+    """
+    count, times = len(elsets), len(whole)
+    sizes = (count * times, count * times * 3 * 8, count * times * 3 * 8)
+    blocks = [shared_memory.SharedMemory(create=True, size=max(1, size))
+              for size in sizes]
+    owned = not isinstance(workers, Executor)
+    pool = ProcessPoolExecutor(workers) if owned else workers
+    try:
+        names = [block.name for block in blocks]
+        futures = [pool.submit(_propagate_shared, elsets[chunk], whole,
+                               fraction, names, count, chunk.start)
+                   for chunk in chunks]
+        for future in futures:
+            future.result()
+        shared = _result_arrays([block.buf for block in blocks], count, times)
+        arrays = tuple(array.copy() for array in shared)
+        del shared  # release the buffers before closing
+    finally:
+        if owned:
+            pool.shutdown()
+        for block in blocks:
+            block.close()
+            block.unlink()
+    return arrays
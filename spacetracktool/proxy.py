@@ -0,0 +1,244 @@
+""" Serves space-track.org queries to local clients from one shared client.
+
+A SpaceTrackProxy answers the same /basicspacedata/query/... and
+/expandedspacedata/query/... URLs as space-track.org, passing each query on
+through a single SpaceTrackClient. That client keeps one authenticated, pooled
+session, queues every query through one rate limiter, answers repeated queries
+from one cache, and merges identical queries that arrive at the same time, for
+every process using the proxy. Run one with::
+
+    spacetracktool serve --port 8437 --username me@example.com
+
+which asks for the password, or reads it from the SPACETRACK_PASSWORD
+environment variable. Then point clients at it::
+
+    import spacetracktool as st
+    client = st.SpaceTrackClient('any', 'thing', persistent=True,
+                                 rate_limit=False,
+                                 base='http://127.0.0.1:8437')
+    result = client.tle_latest_query(norad_cat_id=25544, ordinal=1)
+
+The proxy accepts any login, since it queries space-track.org with its own
+credentials; only serve it where every client may use that account. Its
+responses carry an X-Cache header of HIT or MISS.
+
+"""
+
+
+import argparse
+import getpass
+import os
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlsplit
+import requests
+from .cache import ResponseCache
+from .spacetrackclient import SpaceTrackClient
+
+
+# Default TCP port of a SpaceTrackProxy.
+DEFAULT_PORT = 8437
+
+# Path prefixes of the query URLs the proxy passes on.
+QUERY_PREFIXES = ('/basicspacedata/query/', '/expandedspacedata/query/')
+
+
+class SpaceTrackProxy:
+    """ Local HTTP server passing space-track.org queries to one client.
+
+    Args:
+        client: the SpaceTrackClient to send queries through. It should be
+            persistent, and have a cache and coalescing enabled, e.g. as
+            built by make_client.
+
+    Kwargs:
+        host: the address to listen on. Default is '127.0.0.1'.
+        port: the TCP port to listen on, or 0 for any free port. Default is
+            DEFAULT_PORT.
+
+    """
+
+    def __init__(self, client: SpaceTrackClient, host: str = '127.0.0.1',
+                 port: int = DEFAULT_PORT):
+        self.client = client
+        self._server = ThreadingHTTPServer((host, port), _make_handler(self))
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base(self) -> str:
+        """ Returns the base URL clients should query. """
+        host, port = self._server.server_address[:2]
+        return 'http://{}:{}'.format(host, port)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def start(self) -> 'SpaceTrackProxy':
+        """ Starts serving from a background thread, and returns self. """
+        self._thread = threading.Thread(target=self._server.serve_forever,
+                                        kwargs={'poll_interval': 0.1},
+                                        daemon=True)
+        self._thread.start()
+        return self
+
+    def serve_forever(self):
+        """ Serves from the calling thread until interrupted. """
+        try:
+            self._server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.close()
+
+    def close(self):
+        """ Stops serving, and closes the client. """
+        if self._thread is not None:
+            self._server.shutdown()
+            self._thread.join()
+            self._thread = None
+        self._server.server_close()
+        self.client.close()
+
+    def query(self, path: str) -> tuple:
+        """ Answers one query.
+
+        Percent-encoded paths are decoded first, so that equivalent paths
+        share one cache entry.
+
+        Args:
+            path: the query URL's path, e.g.
+                '/basicspacedata/query/class/satcat/NORAD_CAT_ID/1'.
+
+        Returns:
+            Tuple of the status code, the body and a dict of headers. Errors
+            reaching space-track.org are answered with a 502, and any other
+            error with a 500.
+
+        """
+        try:
+            res = self.client.submit(self.client.base + unquote(path))
+        except requests.exceptions.RequestException as excep:
+            if excep.response is None:
+                return 502, str(excep).encode(), {}
+            res = excep.response
+        except Exception as excep:  # pylint: disable=broad-except
+            print('Error answering query {}! {}'.format(path, excep))
+            return 500, str(excep).encode(), {}
+        headers = {'X-Cache': 'HIT' if getattr(res, 'from_cache', False)
+                              else 'MISS'}
+        content_type = res.headers.get('Content-Type')
+        if content_type:
+            headers['Content-Type'] = content_type
+        return res.status_code, res.content, headers
+
+
+def _make_handler(proxy: SpaceTrackProxy):
+    """ Returns a request handler class bound to a SpaceTrackProxy. """
+
+    class Handler(BaseHTTPRequestHandler):
+        """ Answers one HTTP request. """
+        protocol_version = 'HTTP/1.1'
+        disable_nagle_algorithm = True  # headers and body go out separately
+
+        def log_message(self, *args):  # pylint: disable=arguments-differ
+            pass
+
+        def _send(self, status: int, body: bytes, headers: dict = None):
+            self.send_response(status)
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):  # pylint: disable=invalid-name
+            if self.path.startswith(QUERY_PREFIXES):
+                self._send(*proxy.query(self.path))
+            else:
+                self._send(404, b'Not found')
+
+        def do_POST(self):  # pylint: disable=invalid-name
+            length = int(self.headers.get('Content-Length', 0))
+            form = {key: values[0] for key, values in
+                    parse_qs(self.rfile.read(length).decode()).items()}
+            if self.path == '/ajaxauth/logout':
+                self._send(200, b'"Successfully logged out"')
+            elif self.path != '/ajaxauth/login':
+                self._send(404, b'Not found')
+            elif form.get('query'):  # a query sent with the credentials
+                path = urlsplit(form['query']).path
+                if path.startswith(QUERY_PREFIXES):
+                    self._send(*proxy.query(path))
+                else:
+                    self._send(404, b'Not found')
+            else:
+                self._send(200, b'""',
+                           {'Set-Cookie': 'chocolatechip=proxy; Path=/'})
+
+    return Handler
+
+
+def make_client(username: str, password: str, cache=True,
+                pool_size: int = 32, **kwargs) -> SpaceTrackClient:
+    """ Builds a SpaceTrackClient suited to serving a SpaceTrackProxy.
+
+    The client is persistent, coalesces identical queries, and caches results.
+
+    Args:
+        username: your space-track.org username.
+        password: the associated password.
+
+    Kwargs:
+        cache: a ResponseCache, or True for one with default settings.
+            Default is True.
+        pool_size: the number of connections kept open to space-track.org.
+            Default is 32.
+
+    Any other keyword arguments are passed to the SpaceTrackClient.
+
+    Returns:
+        The client.
+
+    """
+    if cache is True:
+        cache = ResponseCache()
+    return SpaceTrackClient(username, password, persistent=True,
+                            pool_size=pool_size, cache=cache, coalesce=True,
+                            **kwargs)
+
+
+def main(argv=None) -> int:
+    """ Runs a SpaceTrackProxy until interrupted. """
+    parser = argparse.ArgumentParser(
+        prog='spacetracktool serve',
+        description='Serves space-track.org queries to local clients through '
+                    'one shared, cached, rate-limited session.')
+    parser.add_argument('--host', default='127.0.0.1',
+                        help='address to listen on (default: 127.0.0.1)')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT,
+                        help='port to listen on (default: {})'.format(
+                            DEFAULT_PORT))
+    parser.add_argument('--username',
+                        default=os.environ.get('SPACETRACK_USERNAME'),
+                        help='space-track.org username (default: '
+                             '$SPACETRACK_USERNAME)')
+    parser.add_argument('--cache-dir',
+                        help='directory to keep cached results in, shared '
+                             'with other processes (default: memory only)')
+    args = parser.parse_args(argv)
+    if not args.username:
+        parser.error('a username is required')
+    password = os.environ.get('SPACETRACK_PASSWORD') or getpass.getpass(
+        'space-track.org password: ')
+    client = make_client(args.username, password,
+                         cache=ResponseCache(directory=args.cache_dir))
+    proxy = SpaceTrackProxy(client, args.host, args.port)
+    print('Serving space-track.org queries at {}'.format(proxy.base))
+    sys.stdout.flush()
+    proxy.serve_forever()
+    return 0
@@ -0,0 +1,353 @@
+""" Defines immutable space-track.org query objects.
+
+A Query holds everything needed to send one request to space-track.org: the
+base URL, the controller, the request class, the predicates and the format.
+Queries are built by SpaceTrackClient.build_query and never change once built,
+so one client may send many of them at once from different threads::
+
+    from concurrent.futures import ThreadPoolExecutor
+    import spacetracktool as st
+
+    client = st.SpaceTrackClient('username', 'password', persistent=True)
+    queries = [client.build_query('tle_latest', norad_cat_id=i, ordinal=1)
+               for i in (25544, 43013)]
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        results = list(pool.map(client.submit, queries))
+
+"""
+
+
+import collections
+import functools
+
+
+# Expected keys for each request class, in the order they appear in the URL.
+REQUEST_KEYS = {
+    'tle': ['comment', 'originator', 'norad_cat_id', 'object_name',
+            'object_type', 'classification_type', 'intldes', 'epoch',
+            'epoch_microseconds', 'mean_motion', 'eccentricity', 'inclination',
+            'ra_of_asc_node', 'arg_of_pericenter', 'mean_anomaly',
+            'ephemeris_type', 'element_set_no', 'rev_at_epoch', 'bstar',
+            'mean_motion_dot', 'mean_motion_ddot', 'file', 'tle_line0',
+            'tle_line1', 'tle_line2', 'object_id', 'object_number',
+            'semimajor_axis', 'period', 'apogee', 'perigee'],
+    'tle_latest': ['ordinal', 'comment', 'originator', 'norad_cat_id',
+                   'object_name', 'object_type', 'classification_type',
+                   'intldes', 'epoch', 'epoch_microseconds', 'mean_motion',
+                   'eccentricity', 'inclination', 'ra_of_asc_node',
+                   'arg_of_pericenter', 'mean_anomaly', 'ephemeris_type',
+                   'element_set_no', 'rev_at_epoch', 'bstar',
+                   'mean_motion_dot', 'mean_motion_ddot', 'file', 'tle_line0',
+                   'tle_line1', 'tle_line2', 'semimajor_axis', 'period',
+                   'apogee', 'perigee'],
+    'tle_publish': ['publish_epoch', 'tle_line1', 'tle_line2'],
+    'boxscore': ['country', 'spadoc_cd', 'orbital_tba',
+                 'orbital_payload_count', 'orbital_rocket_body_count',
+                 'orbital_debris_count', 'orbital_total_count',
+                 'decayed_payload_count', 'decayed_rocket_body_count',
+                 'decayed_debris_count', 'decayed_total_count',
+                 'country_total'],
+    'satcat': ['intldes', 'norad_cat_id', 'object_type', 'satname', 'country',
+               'launch', 'site', 'decay', 'period', 'inclination', 'apogee',
+               'perigee', 'comment', 'commentcode', 'rcsvalue', 'rcs_size',
+               'file', 'launch_year', 'launch_num', 'launch_piece', 'current',
+               'object_name', 'object_id', 'object_number'],
+    'launch_site': ['site_code', 'launch_site'],
+    'satcat_change': ['norad_cat_id', 'object_number', 'current_name',
+                      'previous_name', 'current_intldes', 'previous_intldes',
+                      'current_country', 'previous_country', 'current_launch',
+                      'previous_launch', 'current_decay', 'previous_decay',
+                      'change_made'],
+    'satcat_debut': ['intldes', 'norad_cat_id', 'satname', 'debut', 'country',
+                     'launch', 'site', 'decay', 'period', 'inclination',
+                     'apogee', 'perigee', 'comment', 'commentcode', 'rcsvalue',
+                     'rcs_size', 'launch_piece', 'current', 'object_name',
+                     'object_id', 'object_number'],
+    'decay': ['norad_cat_id', 'object_number', 'object_name', 'intldes',
+              'object_id', 'rcs', 'rcs_size', 'country', 'msg_epoch',
+              'decay_epoch', 'source', 'msg_type', 'precedence'],
+    'tip': ['norad_cat_id', 'msg_epoch', 'insert_epoch', 'decay_epoch',
+            'window', 'rev', 'direction', 'lat', 'lon', 'incl', 'next_report',
+            'id', 'high_interest', 'object_number'],
+    'announcement': ['announcement_type', 'announcement_text',
+                     'announcement_start', 'announcement_end'],
+    'cdm': ['constellation', 'cdm_id', 'filename', 'insert_epoch',
+            'ccsds_cdm_vers', 'creation_date', 'creation_date_fraction',
+            'originator', 'message_for', 'message_id',
+            'comment_emergency_reportable', 'tca', 'tca_fraction',
+            'miss_distance', 'miss_distance_unit', 'relative_speed',
+            'relative_speed_unit', 'relative_position_r',
+            'relative_position_r_unit', 'relative_position_t',
+            'relative_position_t_unit', 'relative_position_n',
+            'relative_position_n_unit', 'relative_velocity_r',
+            'relative_velocity_r_unit', 'relative_velocity_t',
+            'relative_velocity_t_unit', 'relative_velocity_n',
+            'relative_velocity_n_unit', 'collision_probability',
+            'collision_probability_method', 'sat1_object',
+            'sat1_object_designator', 'sat1_catalog_name', 'sat1_object_name',
+            'sat1_international_designator', 'sat1_object_type',
+            'sat1_operator_contact_position', 'sat1_operator_organization',
+            'sat1_operator_phone', 'sat1_operator_email',
+            'sat1_ephemeris_name', 'sat1_covariance_method',
+            'sat1_maneuverable', 'sat1_ref_frame', 'sat1_gravity_model',
+            'sat1_atmospheric_model', 'sat1_n_body_perturbations',
+            'sat1_solar_rad_pressure', 'sat1_earth_tides',
+            'sat1_intrack_thrust', 'sat1_time_lastob_start',
+            'sat1_time_lastob_start_fraction', 'sat1_time_lastob_end',
+            'sat1_time_lastob_end_fraction', 'sat1_recommended_od_span',
+            'sat1_recommended_od_span_unit', 'sat1_actual_od_span',
+            'sat1_actual_od_span_unit', 'sat1_obs_available', 'sat1_obs_used',
+            'sat1_residuals_accepted', 'sat1_residuals_accepted_unit',
+            'sat1_weighted_rms', 'sat1_comment_apogee', 'sat1_comment_perigee',
+            'sat1_comment_inclination', 'sat1_area_pc', 'sat1_area_pc_unit',
+            'sat1_cd_area_over_mass', 'sat1_cd_area_over_mass_unit',
+            'sat1_cr_area_over_mass', 'sat1_cr_area_over_mass_unit',
+            'sat1_thrust_acceleration', 'sat1_thrust_acceleration_unit',
+            'sat1_sedr', 'sat1_sedr_unit', 'sat1_x', 'sat1_x_unit', 'sat1_y',
+            'sat1_y_unit', 'sat1_z', 'sat1_z_unit', 'sat1_x_dot',
+            'sat1_x_dot_unit', 'sat1_y_dot', 'sat1_y_dot_unit', 'sat1_z_dot',
+            'sat1_z_dot_unit', 'sat1_cr_r', 'sat1_cr_r_unit', 'sat1_ct_r',
+            'sat1_ct_r_unit', 'sat1_ct_t', 'sat1_ct_t_unit', 'sat1_cn_r',
+            'sat1_cn_r_unit', 'sat1_cn_t', 'sat1_cn_t_unit', 'sat1_cn_n',
+            'sat1_cn_n_unit', 'sat1_crdot_r', 'sat1_crdot_r_unit',
+            'sat1_crdot_t', 'sat1_crdot_t_unit', 'sat1_crdot_n',
+            'sat1_crdot_n_unit', 'sat1_crdot_rdot', 'sat1_crdot_rdot_unit',
+            'sat1_ctdot_r', 'sat1_ctdot_r_unit', 'sat1_ctdot_t',
+            'sat1_ctdot_t_unit', 'sat1_ctdot_n', 'sat1_ctdot_n_unit',
+            'sat1_ctdot_rdot', 'sat1_ctdot_rdot_unit', 'sat1_ctdot_tdot',
+            'sat1_ctdot_tdot_unit', 'sat1_cndot_r', 'sat1_cndot_r_unit',
+            'sat1_cndot_t', 'sat1_cndot_t_unit', 'sat1_cndot_n',
+            'sat1_cndot_n_unit', 'sat1_cndot_rdot', 'sat1_cndot_rdot_unit',
+            'sat1_cndot_tdot', 'sat1_cndot_tdot_unit', 'sat1_cndot_ndot',
+            'sat1_cndot_ndot_unit', 'sat1_cdrg_r', 'sat1_cdrg_r_unit',
+            'sat1_cdrg_t', 'sat1_cdrg_t_unit', 'sat1_cdrg_n',
+            'sat1_cdrg_n_unit', 'sat1_cdrg_rdot', 'sat1_cdrg_rdot_unit',
+            'sat1_cdrg_tdot', 'sat1_cdrg_tdot_unit', 'sat1_cdrg_ndot',
+            'sat1_cdrg_ndot_unit', 'sat1_cdrg_drg', 'sat1_cdrg_drg_unit',
+            'sat1_csrp_r', 'sat1_csrp_r_unit', 'sat1_csrp_t',
+            'sat1_csrp_t_unit', 'sat1_csrp_n', 'sat1_csrp_n_unit',
+            'sat1_csrp_rdot', 'sat1_csrp_rdot_unit', 'sat1_csrp_tdot',
+            'sat1_csrp_tdot_unit', 'sat1_csrp_ndot', 'sat1_csrp_ndot_unit',
+            'sat1_csrp_drg', 'sat1_csrp_drg_unit', 'sat1_csrp_srp',
+            'sat1_csrp_srp_unit', 'sat2_object', 'sat2_object_designator',
+            'sat2_catalog_name', 'sat2_object_name',
+            'sat2_international_designator', 'sat2_object_type',
+            'sat2_operator_contact_position', 'sat2_operator_organization',
+            'sat2_operator_phone', 'sat2_operator_email',
+            'sat2_ephemeris_name', 'sat2_covariance_method',
+            'sat2_maneuverable', 'sat2_ref_frame', 'sat2_gravity_model',
+            'sat2_atmospheric_model', 'sat2_n_body_perturbations',
+            'sat2_solar_rad_pressure', 'sat2_earth_tides',
+            'sat2_intrack_thrust', 'sat2_time_lastob_start',
+            'sat2_time_lastob_start_fraction', 'sat2_time_lastob_end',
+            'sat2_time_lastob_end_fraction', 'sat2_recommended_od_span',
+            'sat2_recommended_od_span_unit', 'sat2_actual_od_span',
+            'sat2_actual_od_span_unit', 'sat2_obs_available', 'sat2_obs_used',
+            'sat2_residuals_accepted', 'sat2_residuals_accepted_unit',
+            'sat2_weighted_rms', 'sat2_comment_apogee', 'sat2_comment_perigee',
+            'sat2_comment_inclination', 'sat2_area_pc', 'sat2_area_pc_unit',
+            'sat2_cd_area_over_mass', 'sat2_cd_area_over_mass_unit',
+            'sat2_cr_area_over_mass', 'sat2_cr_area_over_mass_unit',
+            'sat2_thrust_acceleration', 'sat2_thrust_acceleration_unit',
+            'sat2_sedr', 'sat2_sedr_unit', 'sat2_x', 'sat2_x_unit', 'sat2_y',
+            'sat2_y_unit', 'sat2_z', 'sat2_z_unit', 'sat2_x_dot',
+            'sat2_x_dot_unit', 'sat2_y_dot', 'sat2_y_dot_unit', 'sat2_z_dot',
+            'sat2_z_dot_unit', 'sat2_cr_r', 'sat2_cr_r_unit', 'sat2_ct_r',
+            'sat2_ct_r_unit', 'sat2_ct_t', 'sat2_ct_t_unit', 'sat2_cn_r',
+            'sat2_cn_r_unit', 'sat2_cn_t', 'sat2_cn_t_unit', 'sat2_cn_n',
+            'sat2_cn_n_unit', 'sat2_crdot_r', 'sat2_crdot_r_unit',
+            'sat2_crdot_t', 'sat2_crdot_t_unit', 'sat2_crdot_n',
+            'sat2_crdot_n_unit', 'sat2_crdot_rdot', 'sat2_crdot_rdot_unit',
+            'sat2_ctdot_r', 'sat2_ctdot_r_unit', 'sat2_ctdot_t',
+            'sat2_ctdot_t_unit', 'sat2_ctdot_n', 'sat2_ctdot_n_unit',
+            'sat2_ctdot_rdot', 'sat2_ctdot_rdot_unit', 'sat2_ctdot_tdot',
+            'sat2_ctdot_tdot_unit', 'sat2_cndot_r', 'sat2_cndot_r_unit',
+            'sat2_cndot_t', 'sat2_cndot_t_unit', 'sat2_cndot_n',
+            'sat2_cndot_n_unit', 'sat2_cndot_rdot', 'sat2_cndot_rdot_unit',
+            'sat2_cndot_tdot', 'sat2_cndot_tdot_unit', 'sat2_cndot_ndot',
+            'sat2_cndot_ndot_unit', 'sat2_cdrg_r', 'sat2_cdrg_r_unit',
+            'sat2_cdrg_t', 'sat2_cdrg_t_unit', 'sat2_cdrg_n',
+            'sat2_cdrg_n_unit', 'sat2_cdrg_rdot', 'sat2_cdrg_rdot_unit',
+            'sat2_cdrg_tdot', 'sat2_cdrg_tdot_unit', 'sat2_cdrg_ndot',
+            'sat2_cdrg_ndot_unit', 'sat2_cdrg_drg', 'sat2_cdrg_drg_unit',
+            'sat2_csrp_r', 'sat2_csrp_r_unit', 'sat2_csrp_t',
+            'sat2_csrp_t_unit', 'sat2_csrp_n', 'sat2_csrp_n_unit',
+            'sat2_csrp_rdot', 'sat2_csrp_rdot_unit', 'sat2_csrp_tdot',
+            'sat2_csrp_tdot_unit', 'sat2_csrp_ndot', 'sat2_csrp_ndot_unit',
+            'sat2_csrp_drg', 'sat2_csrp_drg_unit', 'sat2_csrp_srp',
+            'sat2_csrp_srp_unit', 'gid'],
+    'organization': ['gid', 'org_name', 'constellation', 'info_id',
+                     'info_type', 'info_label', 'info_value', 'info_modified',
+                     'object_count', 'object'],
+}
+
+# REST controls accepted by every request class. They follow the predicates in
+# the URL and, unlike predicates, keep their lower-case names.
+CONTROL_KEYS = ('orderby', 'limit', 'distinct', 'emptyresult', 'metadata',
+                'predicates')
+
+# Request classes served by the expandedspacedata controller.
+EXPANDED_CLASSES = ('cdm', 'organization')
+
+# Request classes that can be sent in the compact 'tle' and '3le' formats.
+ELEMENT_CLASSES = ('tle', 'tle_latest')
+
+# Predicates added to a request class when the caller does not give them.
+REQUEST_DEFAULTS = {
+    'decay': {'precedence': 2},  # default to decay announcements
+}
+
+
+class QuerySchema:
+    """ The keys of one request class, precomputed for building queries.
+
+    Built once per request class, so that building a query only costs a
+    lookup per keyword argument given, however many keys the class accepts.
+
+    Args:
+        request_class: the space-track.org request class.
+        keys: the class's predicate keys, in URL order.
+
+    Attributes:
+        request_class: the space-track.org request class.
+        keys: tuple of the predicate keys, in URL order.
+        names: frozenset of every keyword accepted, predicates and controls.
+        controller: 'basicspacedata' or 'expandedspacedata'.
+
+    """
+    __slots__ = ('request_class', 'keys', 'names', 'controller', '_order')
+
+    def __init__(self, request_class: str, keys):
+        self.request_class = request_class
+        self.keys = tuple(keys)
+        self.names = frozenset(self.keys).union(CONTROL_KEYS)
+        if request_class in EXPANDED_CLASSES:
+            self.controller = 'expandedspacedata'
+        else:
+            self.controller = 'basicspacedata'
+        # keyword -> (position in the URL, name in the URL)
+        self._order = {key: (index, key.upper())
+                       for index, key in enumerate(self.keys)}
+        self._order.update({key: (len(self.keys) + index, key)
+                            for index, key in enumerate(CONTROL_KEYS)})
+
+    def predicates(self, kwargs: dict) -> tuple:
+        """ Turns keyword arguments into Query predicates, in URL order.
+
+        Args:
+            kwargs: dictionary of keyword arguments.
+
+        Returns:
+            Tuple of (KEY, value) string pairs, as in Query.predicates.
+
+        Raises:
+            KeyError: if a key is given that the request class does not accept
+
+        """
+        order = self._order
+        try:
+            ranked = sorted([order[key] + (key,) for key in kwargs])
+        except KeyError as excep:
+            raise KeyError('Unexpected argument {} given! '.format(
+                excep.args[0]) + 'If you believe this is a valid key, '
+                'please submit a pull request or open an issue on '
+                'GitHub.') from None
+        return tuple([(name, str(kwargs[key])) for _, name, key in ranked])
+
+
+# Precomputed schema of each request class.
+REQUEST_SCHEMAS = {request_class: QuerySchema(request_class, keys)
+                   for request_class, keys in REQUEST_KEYS.items()}
+
+
+@functools.lru_cache(maxsize=None)
+def url_prefix(base: str, controller: str, request_class: str) -> str:
+    """ Returns the start of every query URL of a request class.
+
+    Args:
+        base: base URL of the server.
+        controller: 'basicspacedata' or 'expandedspacedata'.
+        request_class: the space-track.org request class.
+
+    Returns:
+        The URL up to and including the request class.
+
+    """
+    return '/'.join((base, controller, 'query', 'class', request_class))
+
+
+class Query(collections.namedtuple('Query', ['base', 'controller',
+                                             'request_class', 'predicates',
+                                             'fmt'])):
+    """ An immutable query to space-track.org.
+
+    Attributes:
+        base: base URL of the server, e.g. 'https://www.space-track.org'.
+        controller: 'basicspacedata' or 'expandedspacedata'.
+        request_class: the space-track.org request class, e.g. 'tle'.
+        predicates: tuple of (KEY, value) string pairs, in URL order. REST
+            controls such as ('orderby', 'EPOCH desc') are included.
+        fmt: the format of the returned message, e.g. 'json'.
+
+    """
+    __slots__ = ()
+
+    @property
+    def url(self) -> str:
+        """ Returns the full query URL. """
+        parts = [url_prefix(self.base, self.controller, self.request_class)]
+        for predicate in self.predicates:
+            parts += predicate
+        parts += ('format', self.fmt)
+        return '/'.join(parts)
+
+    @classmethod
+    def from_url(cls, url: str) -> 'Query':
+        """ Parses a query URL, such as one built by a Query, back into one.
+
+        Args:
+            url: the full query URL.
+
+        Returns:
+            The equivalent Query. If the URL names no format, it is 'json'.
+
+        Raises:
+            ValueError: if the URL is not a space-track.org query URL.
+
+        """
+        head, sep, tail = url.rstrip('/').partition('/query/class/')
+        if not sep:
+            raise ValueError('{} is not a query URL!'.format(url))
+        base, _, controller = head.rpartition('/')
+        parts = tail.split('/')
+        request_class, parts = parts[0], parts[1:]
+        if len(parts) % 2:
+            raise ValueError('{} has a predicate with no value!'.format(url))
+        predicates = []
+        fmt = 'json'
+        for key, value in zip(parts[::2], parts[1::2]):
+            if key == 'format':
+                fmt = value
+            else:
+                predicates.append((key, value))
+        return cls(base, controller, request_class, tuple(predicates), fmt)
+
+    def compact(self, fmt: str = 'tle') -> 'Query':
+        """ Returns the query in a compact element-set format.
+
+        The 'tle' format is a fraction of the size of 'json' for the same
+        element sets, and '3le' adds only the object name. Queries for classes
+        other than ELEMENT_CLASSES, or already in a compact format, are
+        returned unchanged.
+
+        Kwargs:
+            fmt: 'tle' or '3le'. Default is 'tle'.
+
+        """
+        if self.request_class not in ELEMENT_CLASSES or \
+                self.fmt in ('tle', '3le'):
+            return self
+        return self._replace(fmt=fmt)
+
+    def __str__(self):
+        return self.url
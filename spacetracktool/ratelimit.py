@@ -0,0 +1,107 @@
+""" Defines a client-side rate limiter for space-track.org requests.
+
+space-track.org throttles accounts that make more than 30 requests per minute
+or 300 requests per hour. A RateLimiter queues requests so that they go out as
+fast as those limits allow, and no faster. One limiter is shared by all query
+methods of a client, and the same limiter may be shared between clients, threads
+and asyncio tasks::
+
+    import spacetracktool as st
+    limiter = st.RateLimiter()
+    client_a = st.SpaceTrackClient('username', 'password', rate_limit=limiter)
+    client_b = st.SpaceTrackClient('username', 'password', rate_limit=limiter)
+
+"""
+
+
+import asyncio
+import collections
+import threading
+import time
+
+
+# space-track.org's published limits as (requests, period in seconds) pairs.
+SPACE_TRACK_LIMITS = ((30, 60.), (300, 3600.))
+
+
+class RateLimiter:
+    """ Token-bucket rate limiter with first-come, first-served queuing.
+
+    Each limit is a bucket holding `requests` tokens. Every request spends one
+    token from each bucket, and a spent token returns to its bucket `period`
+    seconds later, so no window of `period` seconds ever holds more than
+    `requests` requests. A request that finds a bucket empty is given the
+    earliest slot at which every bucket has a token again, and never a slot
+    ahead of a request that queued before it.
+
+    Kwargs:
+        limits: iterable of (requests, period) pairs, with period in seconds.
+            Default is space-track.org's 30 per minute and 300 per hour.
+        clock: function returning the current time in seconds. Default is
+            time.monotonic.
+
+    Raises:
+        ValueError: if any limit is not a positive count and period.
+
+    """
+
+    def __init__(self, limits=SPACE_TRACK_LIMITS, clock=time.monotonic):
+        self._limits = tuple((int(count), float(period))
+                             for count, period in limits)
+        for count, period in self._limits:
+            if count < 1 or period <= 0:
+                raise ValueError('Rate limits must have a positive request '
+                                 'count and period!')
+        self._clock = clock
+        self._spent = [collections.deque() for _ in self._limits]
+        self._last = float('-inf')  # slot given to the latest request
+        self._lock = threading.Lock()
+
+    @property
+    def limits(self) -> tuple:
+        """ Returns the (requests, period) limits enforced by the limiter. """
+        return self._limits
+
+    def reserve(self) -> float:
+        """ Reserves the next free slot without waiting for it.
+
+        Returns:
+            The number of seconds to wait before the slot is reached.
+
+        """
+        with self._lock:
+            now = self._clock()
+            slot = max(now, self._last)
+            for (count, period), spent in zip(self._limits, self._spent):
+                if len(spent) >= count:
+                    slot = max(slot, spent[0] + period)
+            for (count, period), spent in zip(self._limits, self._spent):
+                if len(spent) >= count:
+                    spent.popleft()
+                spent.append(slot)
+            self._last = slot
+            return slot - now
+
+    def acquire(self) -> float:
+        """ Blocks the calling thread until the request may be sent.
+
+        Returns:
+            The number of seconds the request waited in the queue.
+
+        """
+        delay = self.reserve()
+        if delay > 0:
+            time.sleep(delay)
+        return delay
+
+    async def acquire_async(self) -> float:
+        """ Suspends the calling task until the request may be sent.
+
+        Returns:
+            The number of seconds the request waited in the queue.
+
+        """
+        delay = self.reserve()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        return delay
@@ -0,0 +1,260 @@
+""" Defines a compact, typed record for element sets.
+
+Query results arrive as strings: JSON and CSV rows hold every field, numeric or
+not, as text, and the 'tle'/'3le' formats pack the elements into fixed
+columns. A TleRecord converts each field once, when it is parsed, and stores it
+in __slots__, so a large catalog takes a fraction of the memory of the
+equivalent list of dicts::
+
+    import spacetracktool as st
+    from spacetracktool import records
+
+    client = st.SpaceTrackClient('username', 'password', fmt='3le')
+    query = client.build_query('tle_latest', ordinal=1, epoch='>now-1')
+    elsets = list(client.records(query))
+    print(elsets[0].norad_cat_id, elsets[0].inclination, elsets[0].epoch)
+
+Epochs are naive datetimes in UTC, as space-track.org reports them. Angles are
+in degrees, mean motion in revolutions per day, and apogee and perigee are
+altitudes in kilometers.
+
+"""
+
+
+import datetime
+
+
+EARTH_RADIUS = 6378.135  # km, WGS-72 as used for TLEs
+EARTH_MU = 398600.8  # km^3/s^2, WGS-72
+
+_ALPHA5 = 'ABCDEFGHJKLMNPQRSTUVWXYZ'  # I and O are skipped
+
+
+def _float(value):
+    """ Converts a field to float, or None if it is empty. """
+    if value is None or value == '':
+        return None
+    return float(value)
+
+
+def _int(value):
+    """ Converts a field to int, or None if it is empty. """
+    if value is None or value == '':
+        return None
+    return int(value)
+
+
+def _implied_decimal(field: str) -> float:
+    """ Converts a TLE field like ' 12345-3' (0.12345e-3) to float. """
+    field = field.strip()
+    if not field:
+        return 0.
+    sign = -1. if field[0] == '-' else 1.
+    field = field.lstrip('+-')
+    mantissa, exponent = field[:-2], field[-2:]
+    return sign * float('0.' + mantissa.strip()) * 10. ** int(exponent)
+
+
+def _satnum(field: str) -> int:
+    """ Converts a TLE catalog number, including Alpha-5 numbers, to int. """
+    field = field.strip()
+    if field and field[0].isalpha():
+        return (_ALPHA5.index(field[0].upper()) + 10) * 10000 + int(field[1:])
+    return int(field)
+
+
+def _tle_epoch(field: str) -> datetime.datetime:
+    """ Converts a TLE epoch 'YYDDD.DDDDDDDD' to a datetime. """
+    year = int(field[:2])
+    year += 2000 if year < 57 else 1900
+    start = datetime.datetime(year, 1, 1)
+    return start + datetime.timedelta(days=float(field[2:]) - 1.)
+
+
+def _epoch(value: str, microseconds: str = None) -> datetime.datetime:
+    """ Converts a space-track.org EPOCH string to a datetime. """
+    if not value:
+        return None
+    epoch = datetime.datetime.fromisoformat(value)
+    if microseconds:
+        epoch = epoch.replace(microsecond=int(microseconds))
+    return epoch
+
+
+def _altitudes(mean_motion: float, eccentricity: float) -> tuple:
+    """ Returns the (apogee, perigee) altitudes in km from the elements. """
+    if not mean_motion:
+        return None, None
+    radians_per_second = mean_motion * 2. * 3.141592653589793 / 86400.
+    semimajor_axis = (EARTH_MU / radians_per_second ** 2) ** (1. / 3.)
+    return (semimajor_axis * (1. + eccentricity) - EARTH_RADIUS,
+            semimajor_axis * (1. - eccentricity) - EARTH_RADIUS)
+
+
+class TleRecord:
+    """ One element set, with every field converted to its natural type.
+
+    Records are built with the from_dict and from_lines class methods, or in
+    bulk with parse_records.
+
+    """
+    __slots__ = ('norad_cat_id', 'object_name', 'classification_type',
+                 'intldes', 'epoch', 'mean_motion', 'eccentricity',
+                 'inclination', 'ra_of_asc_node', 'arg_of_pericenter',
+                 'mean_anomaly', 'ephemeris_type', 'element_set_no',
+                 'rev_at_epoch', 'bstar', 'mean_motion_dot',
+                 'mean_motion_ddot', 'file', 'apogee', 'perigee')
+
+    def __init__(self, **fields):
+        for name in self.__slots__:
+            setattr(self, name, fields.pop(name, None))
+        if fields:
+            raise TypeError('Unexpected fields {}!'.format(sorted(fields)))
+        if self.apogee is None and self.mean_motion is not None:
+            self.apogee, self.perigee = _altitudes(self.mean_motion,
+                                                   self.eccentricity or 0.)
+
+    @classmethod
+    def from_dict(cls, row: dict):
+        """ Builds a record from a JSON or CSV row of a TLE query.
+
+        Args:
+            row: dict keyed by upper-case space-track.org field names.
+
+        Returns:
+            The parsed record.
+
+        """
+        get = row.get
+        return cls(norad_cat_id=_int(get('NORAD_CAT_ID')),
+                   object_name=get('OBJECT_NAME'),
+                   classification_type=get('CLASSIFICATION_TYPE'),
+                   intldes=get('INTLDES', get('OBJECT_ID')),
+                   epoch=_epoch(get('EPOCH'), get('EPOCH_MICROSECONDS')),
+                   mean_motion=_float(get('MEAN_MOTION')),
+                   eccentricity=_float(get('ECCENTRICITY')),
+                   inclination=_float(get('INCLINATION')),
+                   ra_of_asc_node=_float(get('RA_OF_ASC_NODE')),
+                   arg_of_pericenter=_float(get('ARG_OF_PERICENTER')),
+                   mean_anomaly=_float(get('MEAN_ANOMALY')),
+                   ephemeris_type=_int(get('EPHEMERIS_TYPE')),
+                   element_set_no=_int(get('ELEMENT_SET_NO')),
+                   rev_at_epoch=_int(get('REV_AT_EPOCH')),
+                   bstar=_float(get('BSTAR')),
+                   mean_motion_dot=_float(get('MEAN_MOTION_DOT')),
+                   mean_motion_ddot=_float(get('MEAN_MOTION_DDOT')),
+                   file=_int(get('FILE')),
+                   apogee=_float(get('APOGEE')),
+                   perigee=_float(get('PERIGEE')))
+
+    @classmethod
+    def from_lines(cls, line1: str, line2: str, name: str = None):
+        """ Builds a record from the fixed columns of a two-line element set.
+
+        Args:
+            line1: the first line of the element set.
+            line2: the second line of the element set.
+
+        Kwargs:
+            name: the name line of a three-line element set, with or without
+                its leading '0 '. Default is None.
+
+        Returns:
+            The parsed record.
+
+        Raises:
+            ValueError: if the lines are not lines 1 and 2 of an element set.
+
+        """
+        if line1[:2] != '1 ' or line2[:2] != '2 ':
+            raise ValueError('Not a two-line element set!')
+        if name is not None and name.startswith('0 '):
+            name = name[2:]
+        rev = line2[63:68].strip()
+        return cls(norad_cat_id=_satnum(line1[2:7]),
+                   object_name=name.strip() if name is not None else None,
+                   classification_type=line1[7],
+                   intldes=line1[9:17].strip(),
+                   epoch=_tle_epoch(line1[18:32]),
+                   mean_motion_dot=float(line1[33:43]),
+                   mean_motion_ddot=_implied_decimal(line1[44:52]),
+                   bstar=_implied_decimal(line1[53:61]),
+                   ephemeris_type=int(line1[62] if line1[62] != ' ' else 0),
+                   element_set_no=int(line1[64:68]),
+                   inclination=float(line2[8:16]),
+                   ra_of_asc_node=float(line2[17:25]),
+                   eccentricity=float('0.' + line2[26:33].strip()),
+                   arg_of_pericenter=float(line2[34:42]),
+                   mean_anomaly=float(line2[43:51]),
+                   mean_motion=float(line2[52:63]),
+                   rev_at_epoch=int(rev) if rev else 0)
+
+    def as_dict(self) -> dict:
+        """ Returns the record's fields as a dict keyed by lower-case name. """
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def __eq__(self, other):
+        if not isinstance(other, TleRecord):
+            return NotImplemented
+        return all(getattr(self, name) == getattr(other, name)
+                   for name in self.__slots__)
+
+    __hash__ = None
+
+    def __repr__(self):
+        return 'TleRecord(norad_cat_id={!r}, epoch={!r})'.format(
+            self.norad_cat_id, self.epoch)
+
+
+def parse_tle(lines):
+    """ Parses two-line or three-line element sets from lines of text.
+
+    Name lines are detected by position: any line that is not followed by a
+    '1 ' line and a '2 ' line is taken as the name of the next element set.
+
+    Args:
+        lines: iterable of lines, or a single string holding them all.
+
+    Yields:
+        TleRecords.
+
+    """
+    if isinstance(lines, str):
+        lines = lines.splitlines()
+    name = None
+    line1 = None
+    for line in lines:
+        line = line.rstrip('\r\n')
+        if not line.strip():
+            continue
+        if line1 is not None:
+            if line.startswith('2 '):
+                yield TleRecord.from_lines(line1, line, name)
+                name = line1 = None
+                continue
+            name, line1 = line1, None  # it was a name after all
+        if line.startswith('1 '):
+            line1 = line
+        else:
+            name = line
+
+
+def parse_records(rows):
+    """ Converts parsed query results to TleRecords.
+
+    Args:
+        rows: iterable of dicts from JSON or CSV results, or of line tuples
+            from 'tle'/'3le' results, as yielded by
+            SpaceTrackClient.submit(..., stream=True).
+
+    Yields:
+        TleRecords.
+
+    """
+    for row in rows:
+        if isinstance(row, dict):
+            yield TleRecord.from_dict(row)
+        elif len(row) == 3:
+            yield TleRecord.from_lines(row[1], row[2], name=row[0])
+        else:
+            yield TleRecord.from_lines(row[0], row[1])
@@ -0,0 +1,243 @@
+""" Retries transient failures and stops calling a server that is down.
+
+A RetryPolicy decides whether a failed query is worth repeating, and how long
+to wait first: exponential backoff with full jitter, or the server's
+Retry-After header when it sends one. Only queries to the read-only query
+controllers are retried, and each policy carries a budget that caps the number
+of retries in any period, so one client cannot turn an outage into a flood.
+
+A CircuitBreaker counts consecutive failures. Once there are too many, it
+opens and every request fails at once with CircuitOpenError until a cool-down
+has passed. After that, a single trial request decides whether the circuit
+closes again::
+
+    import spacetracktool as st
+    policy = st.RetryPolicy(max_retries=5, backoff=2.)
+    breaker = st.CircuitBreaker(failure_threshold=10, reset_timeout=300.)
+    client = st.SpaceTrackClient('username', 'password', retry=policy,
+                                 circuit_breaker=breaker)
+
+"""
+
+
+import collections
+import email.utils
+import random
+import threading
+import time
+import requests
+
+
+# Status codes worth repeating a request for.
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+# Controllers whose requests only read data, and so may be repeated.
+IDEMPOTENT_CONTROLLERS = ('basicspacedata', 'expandedspacedata')
+
+# Exceptions that mean the request may never have reached the server.
+RETRY_EXCEPTIONS = (requests.exceptions.ConnectionError,
+                    requests.exceptions.Timeout)
+
+
+class CircuitOpenError(requests.exceptions.RequestException):
+    """ Raised instead of sending a request while the circuit is open. """
+
+
+def parse_retry_after(value, now: float = None) -> float:
+    """ Converts a Retry-After header to seconds.
+
+    Args:
+        value: the header value, either a number of seconds or an HTTP date,
+            or None.
+
+    Kwargs:
+        now: the current time in seconds since the epoch, or None to use
+            time.time(). Default is None.
+
+    Returns:
+        The number of seconds to wait, or None if the header is missing or
+        cannot be read.
+
+    """
+    if not value:
+        return None
+    try:
+        return max(0., float(value))
+    except (TypeError, ValueError):
+        pass
+    try:
+        date = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if date is None:
+        return None
+    now = time.time() if now is None else now
+    return max(0., date.timestamp() - now)
+
+
+def is_idempotent(url: str) -> bool:
+    """ Returns True if a query URL only reads data. """
+    return any('/{}/'.format(name) in url for name in IDEMPOTENT_CONTROLLERS)
+
+
+class RetryPolicy:
+    """ Exponential backoff with jitter, Retry-After and a retry budget.
+
+    The wait before retry number n (counting from 0) is a random time between
+    zero and min(max_backoff, backoff * 2 ** n), unless the server asked for a
+    specific wait with Retry-After. All methods are safe to call from several
+    threads at once.
+
+    Kwargs:
+        max_retries: the most retries of a single request. Default is 3.
+        backoff: the base wait in seconds. Default is 1.
+        max_backoff: the longest wait in seconds. Default is 60.
+        jitter: if True, randomize waits as described above. If False, wait
+            the full backoff. Default is True.
+        statuses: status codes to retry. Default is RETRY_STATUSES.
+        budget: the most retries allowed in any `budget_period`, across all
+            requests using this policy, or None for no limit. Default is 10.
+        budget_period: the length of the budget window in seconds. Default
+            is 60.
+        clock: function returning the current time in seconds. Default is
+            time.monotonic.
+
+    """
+
+    def __init__(self, max_retries: int = 3, backoff: float = 1.,
+                 max_backoff: float = 60., jitter: bool = True,
+                 statuses=RETRY_STATUSES, budget: int = 10,
+                 budget_period: float = 60., clock=time.monotonic):
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.jitter = jitter
+        self.statuses = frozenset(statuses)
+        self._budget = budget
+        self._budget_period = budget_period
+        self._clock = clock
+        self._spent = collections.deque()
+        self._lock = threading.Lock()
+
+    def is_retryable(self, status_code: int) -> bool:
+        """ Returns True if a response status is worth retrying. """
+        return status_code in self.statuses
+
+    def allow(self, url: str, attempt: int) -> bool:
+        """ Decides whether to retry a failed request, spending budget if so.
+
+        Args:
+            url: the query URL of the failed request.
+            attempt: the number of retries already made for it.
+
+        Returns:
+            True if the request should be retried.
+
+        """
+        if attempt >= self.max_retries or not is_idempotent(url):
+            return False
+        if self._budget is None:
+            return True
+        with self._lock:
+            now = self._clock()
+            while self._spent and self._spent[0] <= now - self._budget_period:
+                self._spent.popleft()
+            if len(self._spent) >= self._budget:
+                return False
+            self._spent.append(now)
+            return True
+
+    def delay(self, attempt: int, retry_after: float = None) -> float:
+        """ Returns the number of seconds to wait before a retry.
+
+        Args:
+            attempt: the number of retries already made for the request.
+
+        Kwargs:
+            retry_after: the wait the server asked for, in seconds, or None.
+                Default is None.
+
+        """
+        if retry_after is not None:
+            return min(retry_after, self.max_backoff)
+        ceiling = min(self.max_backoff, self.backoff * 2 ** attempt)
+        return random.uniform(0., ceiling) if self.jitter else ceiling
+
+
+class CircuitBreaker:
+    """ Fails fast while a server keeps failing.
+
+    The circuit starts closed. After `failure_threshold` consecutive failures
+    it opens, and before_request raises CircuitOpenError for `reset_timeout`
+    seconds. Then one trial request is let through: success closes the circuit
+    and failure opens it again. All methods are safe to call from several
+    threads at once.
+
+    Kwargs:
+        failure_threshold: consecutive failures that open the circuit.
+            Default is 5.
+        reset_timeout: seconds the circuit stays open. Default is 60.
+        clock: function returning the current time in seconds. Default is
+            time.monotonic.
+
+    """
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half-open'
+
+    def __init__(self, failure_threshold: int = 5,
+                 reset_timeout: float = 60., clock=time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self._failures = 0
+        self._opened_at = None
+        self._trial = False  # a half-open trial request is in flight
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        """ Returns 'closed', 'open' or 'half-open'. """
+        with self._lock:
+            return self._state()
+
+    def _state(self) -> str:
+        """ Returns the state; the caller must hold the lock. """
+        if self._opened_at is None:
+            return self.CLOSED
+        if self._clock() - self._opened_at < self.reset_timeout:
+            return self.OPEN
+        return self.HALF_OPEN
+
+    def before_request(self):
+        """ Lets a request through, or fails fast.
+
+        Raises:
+            CircuitOpenError: if the circuit is open, or half-open with a
+                trial request already in flight.
+
+        """
+        with self._lock:
+            state = self._state()
+            if state == self.CLOSED:
+                return
+            if state == self.HALF_OPEN and not self._trial:
+                self._trial = True
+                return
+            raise CircuitOpenError('space-track.org is failing; not sending '
+                                   'requests for now.')
+
+    def record_success(self):
+        """ Closes the circuit after a successful request. """
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial = False
+
+    def record_failure(self):
+        """ Counts a failed request, opening the circuit if there are many. """
+        with self._lock:
+            self._failures += 1
+            if self._trial or self._failures >= self.failure_threshold:
+                self._opened_at = self._clock()
+            self._trial = False
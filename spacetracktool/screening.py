@@ -0,0 +1,315 @@
+""" Screens a whole catalog for close approaches.
+
+screen finds every pair of objects that pass within a threshold distance of
+each other over a time span, without comparing every pair at every time::
+
+    import numpy as np
+    import spacetracktool as st
+    from spacetracktool.screening import screen
+
+    client = st.SpaceTrackClient('username', 'password', fmt='tle')
+    elements = client.columns(client.build_query('tle_latest', ordinal=1,
+                                                 epoch='>now-30'))
+    start = np.datetime64('2024-01-01')
+    events = screen(elements, start, start + np.timedelta64(1, 'D'),
+                    threshold=5., workers=8)
+    for event in np.sort(events, order='distance')[:10]:
+        print(event['norad_cat_id_1'], event['norad_cat_id_2'],
+              event['time'], event['distance'])
+
+The screen runs in three stages. First, objects whose altitude shells, from
+perigee to apogee widened by the threshold, overlap no other object's are
+dropped, with one sweep over the shells sorted by perigee. Then every
+remaining object is propagated to each time step, and the pairs within reach
+of each other at each step are found with a k-d tree (scipy's cKDTree), or a
+grid hash where scipy is not installed, in O(N log N) time per step. Pairs
+from different shells are dropped. Last, the closest approach of each pair
+around each step is found from the relative motion, and kept if it is within
+the threshold. Time steps are split between worker processes.
+
+These are candidates for a closer look, e.g. with CDMs from cdm_query, not
+collision probabilities. This module requires NumPy and sgp4.
+
+"""
+
+
+import itertools
+from concurrent.futures import Executor, ProcessPoolExecutor
+from .columns import ELEMENT_DTYPE, from_records
+from .propagation import _propagate_chunk, _require_sgp4, julian_dates
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover
+    np = None
+
+try:
+    from scipy.spatial import cKDTree
+except ImportError:  # pragma: no cover
+    cKDTree = None
+
+
+CONJUNCTION_DTYPE = [('norad_cat_id_1', 'i8'), ('norad_cat_id_2', 'i8'),
+                     ('time', 'M8[us]'), ('distance', 'f8'),
+                     ('relative_speed', 'f8')]
+
+# Fastest relative speed of two Earth orbiters, in km/s, with a margin.
+MAX_RELATIVE_SPEED = 16.
+
+# Neighboring grid cells visited from each cell, so each pair of cells is
+# visited once; the cell itself is handled separately.
+_HALF_NEIGHBORS = [offset for offset in itertools.product((-1, 0, 1),
+                                                          repeat=3)
+                   if offset > (0, 0, 0)]
+_CELL_BITS = 21  # bits of each cell coordinate in a grid key
+
+
+def overlapping_shells(perigee, apogee, pad: float = 0.):
+    """ Finds the objects whose altitude shell overlaps another's.
+
+    Each object's shell runs from its perigee to its apogee, widened by `pad`
+    on both sides. The shells are sorted by their lower bounds and swept
+    once, so this takes O(N log N) time.
+
+    Args:
+        perigee: array of perigee altitudes in km.
+        apogee: array of apogee altitudes in km.
+
+    Kwargs:
+        pad: km to widen each shell by. Default is 0.
+
+    Returns:
+        Boolean array, True for each object whose shell overlaps at least one
+        other object's. Objects with unknown altitudes are kept.
+
+    """
+    low = np.asarray(perigee, dtype=np.float64) - pad
+    high = np.asarray(apogee, dtype=np.float64) + pad
+    unknown = np.isnan(low) | np.isnan(high)
+    low = np.where(unknown, -np.inf, low)
+    high = np.where(unknown, np.inf, high)
+    order = np.argsort(low, kind='stable')
+    low, high = low[order], high[order]
+    result = np.zeros(len(low), dtype=bool)
+    if len(low) > 1:
+        reach = np.maximum.accumulate(high)  # highest shell top so far
+        result[1:] |= low[1:] <= reach[:-1]  # overlaps an earlier shell
+        result[:-1] |= high[:-1] >= low[1:]  # overlaps the next shell
+    overlaps = np.empty_like(result)
+    overlaps[order] = result
+    return overlaps | unknown
+
+
+def kdtree_pairs(points, radius: float):
+    """ Finds the pairs of points within a distance, with a k-d tree.
+
+    Args:
+        points: float array of positions, shape (n, 3).
+        radius: the distance.
+
+    Returns:
+        Int array of index pairs (i, j) with i < j, shape (pairs, 2).
+
+    Raises:
+        ImportError: if scipy is not installed.
+
+    """
+    if cKDTree is None:
+        raise ImportError('kdtree_pairs requires scipy. Install it with pip '
+                          'install scipy, or use grid_pairs.')
+    return cKDTree(points).query_pairs(radius, output_type='ndarray')
+
+
+def grid_pairs(points, radius: float):
+    """ Finds the pairs of points within a distance, with a grid hash.
+
+    Points are binned into cubic cells as wide as the distance, so only
+    points in the same or neighboring cells need be compared. Needs only
+    NumPy.
+
+    Args:
+        points: float array of positions, shape (n, 3).
+        radius: the distance.
+
+    Returns:
+        Int array of index pairs (i, j) with i < j, shape (pairs, 2).
+
+    """
+    count = len(points)
+    if count < 2:
+        return np.empty((0, 2), dtype=np.intp)
+    cells = np.floor(points / radius).astype(np.int64)
+    cells += 1 << (_CELL_BITS - 1)  # make every coordinate positive
+    keys = (cells[:, 0] << 2 * _CELL_BITS) | (cells[:, 1] << _CELL_BITS) | \
+        cells[:, 2]
+    order = np.argsort(keys, kind='stable')
+    keys = keys[order]
+    positions = np.arange(count)
+    firsts, seconds = [], []
+    for offset in [(0, 0, 0)] + _HALF_NEIGHBORS:
+        shift = (offset[0] << 2 * _CELL_BITS) + (offset[1] << _CELL_BITS) + \
+            offset[2]
+        stop = np.searchsorted(keys, keys + shift, side='right')
+        if shift:
+            start = np.searchsorted(keys, keys + shift, side='left')
+        else:
+            start = positions + 1  # later points in the same cell
+        counts = np.maximum(stop - start, 0)
+        total = counts.sum()
+        if not total:
+            continue
+        ends = np.cumsum(counts)
+        partners = np.arange(total) - np.repeat(ends - counts, counts) + \
+            np.repeat(start, counts)
+        firsts.append(order[np.repeat(positions, counts)])
+        seconds.append(order[partners])
+    if not firsts:
+        return np.empty((0, 2), dtype=np.intp)
+    first, second = np.concatenate(firsts), np.concatenate(seconds)
+    near = np.einsum('ij,ij->i', points[first] - points[second],
+                     points[first] - points[second]) <= radius * radius
+    first, second = first[near], second[near]
+    return np.stack([np.minimum(first, second), np.maximum(first, second)],
+                    axis=1)
+
+
+def _screen_block(elements, times, step: float, threshold: float,
+                  radius: float, method: str) -> tuple:
+    """ Screens element sets over a block of time steps.
+
+    Runs in worker processes too.
+
+    Returns:
+        Tuple of arrays of the first and second object indices, the time of
+        closest approach in microseconds from each step, the miss distance
+        and the relative speed of each approach.
+
+    """
+    whole, fraction = julian_dates(times)
+    errors, positions, velocities = _propagate_chunk(elements, whole,
+                                                     fraction)
+    low = elements['perigee'] - threshold
+    high = elements['apogee'] + threshold
+    find_pairs = kdtree_pairs if method == 'kdtree' else grid_pairs
+    results = []
+    for index in range(len(times)):
+        valid = np.flatnonzero(errors[:, index] == 0)
+        pairs = find_pairs(positions[valid, index], radius)
+        first, second = valid[pairs[:, 0]], valid[pairs[:, 1]]
+        # Objects whose shells never meet cannot come closer than this.
+        apart = (low[first] > high[second]) | (low[second] > high[first])
+        first, second = first[~apart], second[~apart]
+        offset = positions[second, index] - positions[first, index]
+        motion = velocities[second, index] - velocities[first, index]
+        speed2 = np.einsum('ij,ij->i', motion, motion)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            tca = -np.einsum('ij,ij->i', offset, motion) / speed2
+        tca = np.clip(np.nan_to_num(tca), -step / 2., step / 2.)
+        miss = np.linalg.norm(offset + motion * tca[:, None], axis=1)
+        close = miss <= threshold
+        results.append((first[close], second[close],
+                        (times[index].astype(np.int64) +
+                         np.round(tca[close] * 1e6).astype(np.int64)),
+                        miss[close], np.sqrt(speed2[close])))
+    return tuple(np.concatenate(column) for column in zip(*results))
+
+
+def _merge_events(first, second, when, miss, speed, step: float):
+    """ Keeps the closest approach of each run of steps of one pair. """
+    order = np.lexsort((when, second, first))
+    first, second, when = first[order], second[order], when[order]
+    miss, speed = miss[order], speed[order]
+    new = np.ones(len(first), dtype=bool)
+    new[1:] = (first[1:] != first[:-1]) | (second[1:] != second[:-1]) | \
+        (when[1:] - when[:-1] > 1.5 * step * 1e6)
+    group = np.cumsum(new)
+    best = np.lexsort((miss, group))
+    keep = best[np.concatenate(([True], group[best][1:] !=
+                                group[best][:-1]))]
+    return first[keep], second[keep], when[keep], miss[keep], speed[keep]
+
+
+def screen(elsets, start, stop, step: float = 60., threshold: float = 5.,
+           method: str = None, workers=None, block: int = 30,
+           max_relative_speed: float = MAX_RELATIVE_SPEED):
+    """ Finds close approaches between every pair of objects.
+
+    Args:
+        elsets: a structured array with dtype
+            spacetracktool.columns.ELEMENT_DTYPE, or an iterable of
+            TleRecords or of JSON row dicts. Apogee and perigee are used to
+            prefilter objects.
+        start: the first time to screen, in UTC, as a datetime64, datetime or
+            ISO 8601 string.
+        stop: the end of the screened span, in UTC.
+
+    Kwargs:
+        step: seconds between time steps. Approaches between steps are found
+            from the objects' relative motion. Default is 60.
+        threshold: the miss distance in km within which an approach is
+            reported. Default is 5.
+        method: 'kdtree' or 'grid', the neighbor search to run at each step.
+            Default is 'kdtree' if scipy is installed, otherwise 'grid'.
+        workers: the number of worker processes to split the time steps
+            between, or a concurrent.futures.Executor to run them on. None or
+            1 screens in this process. Default is None.
+        block: time steps screened by one task. Default is 30.
+        max_relative_speed: the fastest two objects may close on each other,
+            in km/s. Pairs further apart than the threshold plus half a
+            step's travel at this speed are not compared. Default is
+            MAX_RELATIVE_SPEED.
+
+    Returns:
+        Structured array with dtype CONJUNCTION_DTYPE, one row per close
+        approach, in time order. Objects within the threshold over several
+        consecutive steps are reported once, at their closest.
+
+    Raises:
+        ImportError: if NumPy or sgp4 is not installed, or if method is
+            'kdtree' and scipy is not.
+        ValueError: if method is not 'kdtree', 'grid' or None.
+
+    """
+    _require_sgp4()
+    if method is None:
+        method = 'grid' if cKDTree is None else 'kdtree'
+    if method not in ('kdtree', 'grid'):
+        raise ValueError("method must be 'kdtree', 'grid' or None.")
+    if method == 'kdtree' and cKDTree is None:
+        raise ImportError("method 'kdtree' requires scipy. Install it with "
+                          "pip install scipy.")
+    if not (isinstance(elsets, np.ndarray) and elsets.dtype == ELEMENT_DTYPE):
+        elsets = from_records(elsets)
+    candidates = np.flatnonzero(overlapping_shells(
+        elsets['perigee'], elsets['apogee'], threshold))
+    elements = elsets[candidates]
+    times = np.arange(np.datetime64(start, 'us'), np.datetime64(stop, 'us'),
+                      np.timedelta64(int(round(step * 1e6)), 'us'))
+    radius = threshold + max_relative_speed * step / 2.
+    blocks = [times[index:index + block]
+              for index in range(0, len(times), max(1, block))]
+    if len(elements) < 2 or not blocks:
+        return np.zeros(0, dtype=CONJUNCTION_DTYPE)
+    arguments = (step, threshold, radius, method)
+    if workers is None or workers == 1:
+        results = [_screen_block(elements, times, *arguments)
+                   for times in blocks]
+    else:
+        owned = not isinstance(workers, Executor)
+        pool = ProcessPoolExecutor(workers) if owned else workers
+        try:
+            futures = [pool.submit(_screen_block, elements, times, *arguments)
+                       for times in blocks]
+            results = [future.result() for future in futures]
+        finally:
+            if owned:
+                pool.shutdown()
+    first, second, when, miss, speed = _merge_events(
+        *(np.concatenate(column) for column in zip(*results)), step)
+    events = np.zeros(len(first), dtype=CONJUNCTION_DTYPE)
+    events['norad_cat_id_1'] = elements['norad_cat_id'][first]
+    events['norad_cat_id_2'] = elements['norad_cat_id'][second]
+    events['time'] = when.astype('M8[us]')
+    events['distance'] = miss
+    events['relative_speed'] = speed
+    return np.sort(events, order='time', kind='stable')
@@ -1,16 +1,134 @@
 """ Defines the space-track.org query client.
 
 Queries to space-track.org are made by first creating a client instance, and
-then calling the appropriate method for your desired query type. Multiple
-queries may be created with the same client, but each new query type overwrites
-the previous query (cannot run multiple concurrent queries with a singel submit
-command).
+then calling the appropriate method for your desired query type. Each query is
+built into an immutable Query object before it is submitted, so one client may
+run many queries at once from different threads.
 
 """
 
 
+import gzip
+import os
+import threading
+import time
 import warnings
 import requests
+from requests.structures import CaseInsensitiveDict
+from . import columns, operations, parsers
+from .cache import ResponseCache, request_class_of
+from .coalesce import SingleFlight
+from .instrument import RequestEvent, redact
+from .query import Query, REQUEST_SCHEMAS, REQUEST_DEFAULTS
+from .ratelimit import RateLimiter
+from .records import parse_records
+from .retry import (CircuitBreaker, RetryPolicy, RETRY_EXCEPTIONS,
+                    RETRY_STATUSES, parse_retry_after)
+
+try:
+    import brotli  # lets urllib3 decode brotli responses
+except ImportError:  # pragma: no cover
+    try:
+        import brotlicffi as brotli
+    except ImportError:
+        brotli = None
+
+# Content codings the client asks space-track.org to compress results with.
+# The body is decoded as it is read, so streamed results stay streamed.
+ACCEPT_ENCODING = 'gzip, deflate'
+if brotli is not None:
+    ACCEPT_ENCODING += ', br'
+
+
+def _make_response(url: str, status_code: int, content: bytes,
+                   headers: dict=None, reason: str=None) -> requests.models.Response:
+    """ Builds a requests Response from an already-downloaded body.
+
+    Used wherever a result did not come straight from a requests call, so that
+    callers always get the same object back from submit.
+
+    Args:
+        url: the query URL the content belongs to.
+        status_code: HTTP status code of the response.
+        content: the raw response body.
+
+    Keyword Args:
+        headers (dict): response headers, or None. Default is None.
+        reason (str): HTTP reason phrase, or None. Default is None.
+
+    Returns:
+        The assembled response.
+
+    """
+    res = requests.models.Response()
+    res.url = url
+    res.status_code = status_code
+    res.reason = reason
+    # pylint: disable=protected-access
+    res._content = content
+    res._content_consumed = True
+    res.headers = CaseInsensitiveDict(headers or {})
+    res.encoding = requests.utils.get_encoding_from_headers(res.headers)
+    return res
+
+
+def _cache_headers(headers) -> dict:
+    """ Returns the response headers worth keeping alongside cached content. """
+    return {key: headers[key] for key in ('Content-Type',) if key in headers}
+
+
+def _write_body(res: requests.models.Response, out, compress: bool,
+                chunk_size: int) -> int:
+    """ Copies a streamed response body to a file, chunk by chunk.
+
+    Args:
+        res: the response, sent with stream set.
+        out: the writable binary file-like object to write to.
+        compress: if True, gzip the body. A gzipped body is copied as is.
+        chunk_size: bytes read from the connection at a time.
+
+    Returns:
+        The number of body bytes read from the connection.
+
+    """
+    encoding = res.headers.get('Content-Encoding', '').strip().lower()
+    if compress and encoding == 'gzip':
+        chunks = res.raw.stream(chunk_size, decode_content=False)
+        compress = False
+    else:
+        chunks = res.iter_content(chunk_size)
+    if compress:
+        out = gzip.GzipFile(fileobj=out, mode='wb')
+    received = 0
+    try:
+        for chunk in chunks:
+            out.write(chunk)
+            received += len(chunk)
+    finally:
+        if compress:
+            out.close()  # finishes the gzip stream, not the file
+    return received
+
+
+def _url_format(url: str) -> str:
+    """ Returns the format requested by a query URL ('json' if none is). """
+    parts = url.rstrip('/').split('/')
+    if len(parts) > 1 and parts[-2] == 'format':
+        return parts[-1]
+    return 'json'
+
+
+def _merge_records(results) -> list:
+    """ Returns the JSON records of responses, keeping each only once. """
+    records = []
+    seen = set()
+    for result in results:
+        for record in result.json():
+            fingerprint = tuple(sorted(record.items()))
+            if fingerprint not in seen:
+                seen.add(fingerprint)
+                records.append(record)
+    return records
 
 
 # pylint: disable=unused-variable
@@ -25,10 +143,56 @@ class SpaceTrackClient:
         fmt: string specifying format for returned message. Can be one of
             'xml', 'json', 'html', 'csv', 'tle', '3le', 'kvn', or None.
             None is the same as 'json'. Default is None.
+        persistent: if True, log in once through a pooled requests.Session and
+            reuse the authentication cookie for every subsequent query. The
+            client transparently logs in again if the cookie expires. Close
+            the client (or use it as a context manager) to log out. Default
+            is False, which posts the credentials along with every query.
+        pool_size: the number of connections the persistent session keeps open
+            to space-track.org. Set this to at least the number of threads
+            sharing the client. Default is 10.
+        rate_limit: True to queue queries so they stay within space-track.org's
+            request limits, a RateLimiter instance to share one limiter between
+            clients, or False to send queries immediately. Default is True.
+        retry: a RetryPolicy for transient failures such as 503 responses and
+            dropped connections, True for a RetryPolicy with default settings,
+            or None to never retry. Default is True.
+        circuit_breaker: a CircuitBreaker that fails fast while space-track.org
+            is down, True for a CircuitBreaker with default settings, or None.
+            Share one between clients to have them back off together. Default
+            is True.
+        cache: a ResponseCache to answer repeated queries from, True for an
+            in-memory ResponseCache with default settings, or None to always
+            ask space-track.org. Default is None.
+        hooks: list of instrumentation hooks, each a callable taking a
+            spacetracktool.instrument.RequestEvent, called once each query
+            submitted has finished. Default is None.
+        coalesce: if True, identical queries submitted from several threads
+            at the same time share one request and one response. See
+            spacetracktool.coalesce. Default is False.
+        store: a spacetracktool.store.CatalogStore that the lookup method
+            answers from, and saves the records it queries to. Default is
+            None.
+        compact: if True, the records and columns methods fetch element sets
+            in the 'tle' format, the smallest one space-track.org offers, and
+            parse it into the same records. The 'tle' format has no object
+            name or catalog fields such as FILE and APOGEE; pass '3le' to keep
+            the object name. Queries for other classes are not changed.
+            Default is False, which uses each query's own format.
+        coordinator: a spacetracktool.coordination coordinator shared with
+            clients in other processes. Queries spend from its request budget
+            instead of rate_limit's, and a persistent client shares one login
+            with the others through it, and does not log out when closed.
+            Default is None.
+        base: base URL of the server to query, such as a
+            spacetracktool.proxy.SpaceTrackProxy, or None for
+            space-track.org. The login and logout URLs are derived from it.
+            Default is None.
 
     Properties:
         result: the result string returned from space-track.org by the last-run
-            submit command.
+            submit command. When several threads share the client, use the
+            value returned by each query instead.
 
     Examples::
 
@@ -38,7 +202,13 @@ class SpaceTrackClient:
         >> result = client.tle_query(norad_cat_id=12345)
 
         >> date_range = ops.make_range_string('2018-01-01', '2018-01-31')
-        >> result = client.tle_query(epoch=date_range)  # throws out previous query!
+        >> result = client.tle_query(epoch=date_range)
+
+        >> query = client.build_query('satcat', norad_cat_id=12345)
+        >> result = client.submit(query)  # build now, submit later
+
+        >> with SpaceTrackClient(username, password, persistent=True) as client:
+        ..     result = client.tle_query(norad_cat_id=12345)  # logs in once
 
     """
     _base = 'https://www.space-track.org'  # base URL for requests
@@ -46,11 +216,16 @@ class SpaceTrackClient:
     _logout_url = 'https://www.space-track.org/ajaxauth/logout'
     _null = 'null-val'  # string used by space-track for null values
 
-    def __init__(self, username: str, password: str, fmt: str=None):
+    def __init__(self, username: str, password: str, fmt: str=None,
+                 persistent: bool=False, rate_limit=True, pool_size: int=10,
+                 retry=True, circuit_breaker=True, cache=None, hooks=None,
+                 coalesce=False, store=None, compact=False, coordinator=None,
+                 base: str=None):
         """ Initializes the API.
 
         Raises:
-            ValueError: if provided fmt is not one of the specified options.
+            ValueError: if provided fmt or compact is not one of the specified
+                options.
 
         """
         valid_fmt = ['xml', 'json', 'html', 'csv', 'tle', '3le', 'kvn']
@@ -62,10 +237,127 @@ class SpaceTrackClient:
                                  'csv', 'tle', '3le', 'kvn', or None.")
         else:
             self._fmt = 'json'
+        if compact is True:
+            compact = 'tle'
+        if compact not in (False, None, 'tle', '3le'):
+            raise ValueError("compact must be True, False, 'tle' or '3le'.")
+        self._compact = compact or None
+        if base is not None:
+            self._base = base.rstrip('/')
+            self._login_url = self._base + '/ajaxauth/login'
+            self._logout_url = self._base + '/ajaxauth/logout'
         self._username = username
         self._password = password
-        self._query = []  # placeholder for our query string
+        self._last_query = None  # most recently built query
         self.result = None  # placeholder for the query result
+        self._session = None
+        if persistent:
+            self._session = requests.Session()
+            self._session.headers['Accept-Encoding'] = ACCEPT_ENCODING
+            adapter = requests.adapters.HTTPAdapter(pool_connections=1,
+                                                    pool_maxsize=pool_size)
+            self._session.mount('https://', adapter)
+            self._session.mount('http://', adapter)
+        if rate_limit is True:
+            rate_limit = RateLimiter()
+        self._rate_limiter = rate_limit or None
+        self._coordinator = coordinator
+        if coordinator is not None:
+            self._rate_limiter = coordinator
+        if retry is True:
+            retry = RetryPolicy()
+        self._retry = retry or None
+        if circuit_breaker is True:
+            circuit_breaker = CircuitBreaker()
+        self._breaker = circuit_breaker or None
+        if cache is True:
+            cache = ResponseCache()
+        self._cache = cache or None
+        self._hooks = list(hooks or ())
+        self._single_flight = SingleFlight() if coalesce else None
+        self._store = store
+        self._logged_in = False
+        self._login_count = 0  # bumped on every login, to spot stale cookies
+        self._login_lock = threading.Lock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def _http(self):
+        """ Returns the object used to make HTTP requests.
+
+        This is the persistent session if there is one, otherwise the
+        requests module itself.
+
+        """
+        return self._session if self._session is not None else requests
+
+    def _login(self) -> requests.models.Response:
+        """ Logs in to space-track.org, storing the cookie in the session.
+
+        Returns:
+            Response from space-track.org
+
+        Raises:
+            requests.exceptions.HTTPError: if the login is rejected.
+
+        """
+        payload = {'identity': self._username, 'password': self._password}
+        res = self._http().post(self.login_url, data=payload)
+        # space-track.org answers a bad login with 200 and a "Failed" body.
+        if not res.ok or 'Failed' in res.text:
+            print('Error logging in! Status code {}'.format(res.status_code))
+            if res.ok:
+                raise requests.exceptions.HTTPError('Login failed!',
+                                                    response=res)
+            res.raise_for_status()
+        self._logged_in = True
+        self._login_count += 1
+        return res
+
+    def _ensure_login(self, stale: int=None) -> int:
+        """ Logs in if the session does not hold a valid cookie.
+
+        Keyword Args:
+            stale (int): login count at the time a request was rejected by the
+                server, or None. If no other thread has logged in since, a new
+                login is forced. Default is None.
+
+        Returns:
+            The login count of the cookie now held by the session.
+
+        """
+        with self._login_lock:
+            if not self._logged_in or stale == self._login_count:
+                if self._coordinator is not None:
+                    self._shared_login(stale if self._logged_in else None)
+                else:
+                    self._logged_in = False
+                    self._login()
+            return self._login_count
+
+    def _shared_login(self, stale: int=None):
+        """ Installs the coordinator's cookies, logging in if they are stale.
+
+        Keyword Args:
+            stale (int): generation of the cookies the server rejected, or
+                None. Default is None.
+
+        """
+        def login():
+            self._session.cookies.clear()
+            self._login()
+            return self._session.cookies.get_dict()
+
+        generation, cookies = self._coordinator.login(stale, login)
+        self._session.cookies.clear()
+        for name, value in cookies.items():
+            self._session.cookies.set(name, value)
+        self._logged_in = True
+        self._login_count = generation
 
     def _logout(self) -> requests.models.Response:
         """ Logs out of the space-track.org session.
@@ -74,131 +366,684 @@ class SpaceTrackClient:
             Response from space-track.org
 
         """
-        res = requests.post(self.logout_url)
+        res = self._http().post(self.logout_url)
         if not res.ok:
             print('Error logging out! Status code {}'.format(res.status_code))
+        self._logged_in = False
         return res
 
-    def _basic(self):
-        """ Adds 'basicspacedata' to the query. """
-        self._query = [self._base, 'basicspacedata']
-
-    def _expanded(self):
-        """ Adds 'expandedspacedata' to the query. """
-        self._query = [self._base, 'expandedspacedata']
-
-    def _start_query(self):
-        """ Builds the start of a basic space data query. """
-        self._basic()  # restarts the query string
-        self._query.append('query')
-
-    def _start_expanded_query(self):
-        """ Builds the start of an expanded space data query. """
-        self._expanded()  # restarts the query string
-        self._query.append('query')
+    def close(self):
+        """ Logs out (if logged in) and closes the persistent session. """
+        if self._session is None:
+            return
+        if self._logged_in and self._coordinator is None:
+            self._logout()
+        self._session.close()
 
     def _compile_query(self) -> str:
-        """ Compiles the query (list of strings) into a '/'-separated string.
+        """ Compiles the most recently built query into a URL string.
 
         Returns:
             The query string with each element separated by a forward-slash.
 
+        Raises:
+            IndexError: if no query has been built yet.
+
         """
-        if self._fmt not in self._query:
-            self._query.extend(['format', self._fmt])
-        return '/'.join(self._query)
+        if self._last_query is None:
+            raise IndexError('No query has been built yet!')
+        return self._last_query.url
 
     def print_query(self):
-        """ Prints the query to the screen.
+        """ Prints the most recently built query to the screen.
 
-        Note that at this stage the format string has not been applied to the
-        query. This string gets applied at the very end prior to submitting the
-        POST request.
+        Returns:
+            The query URL, including the format string.
 
         """
         query_string = self._compile_query()
         print(query_string)
         return query_string
 
-    def submit(self, url: str = None) -> requests.models.Response:
-        """ Submits the generated query to space-track.org.
+    def submit(self, url=None, stream: bool=False):
+        """ Submits a query to space-track.org.
+
+        This method keeps no per-query state besides the result property, so it
+        is safe to call from many threads at once with different queries.
+
+        Keyword Args:
+            url (str, Query): Query URL for space-track.org, a Query built by
+                build_query, or None to submit the most recently built query.
+                Default is None.
+            stream (bool): if True, return an iterator that parses records
+                out of the response as it downloads, instead of the response
+                itself. Only the 'json', 'csv', 'tle' and '3le' formats can be
+                streamed. See spacetracktool.parsers. Default is False.
+
+        Returns:
+            Response from space-track.org. Its queue_wait attribute holds the
+            number of seconds the query waited on the rate limiter, its
+            retries attribute the number of retries made, and its from_cache
+            attribute is True if it came from the client's cache.
+            If stream is True, an iterator over the records of the response
+            instead.
+
+        Raises:
+            ValueError: if stream is True and the format cannot be streamed.
+
+        """
+        if not url:
+            url = self._compile_query()
+        elif isinstance(url, Query):
+            url = url.url
+        fmt = _url_format(url)
+        if stream and fmt not in parsers.STREAMABLE_FORMATS:
+            raise ValueError('Cannot stream the {} format!'.format(fmt))
+        start = time.perf_counter()
+        res = self._cached(url)
+        if res is not None:
+            self.result = res
+            self._emit(url, start, res)
+            return parsers.iter_records(res, fmt) if stream else res
+        try:
+            if self._single_flight is not None and not stream:
+                res = self._single_flight.do(url, self._submit_url, url)
+            else:
+                res = self._submit_url(url, stream)
+        except requests.exceptions.RequestException as excep:
+            self._emit(url, start, excep.response, error=excep)
+            raise
+        if stream:
+            records = parsers.iter_records(res, fmt)
+            if self._hooks:
+                records = self._stream_events(records, url, start, res)
+            return records
+        self._emit(url, start, res)
+        return res
+
+    def submit_to_file(self, target, url=None, compress: bool=False,
+                       resume: bool=True, chunk_size: int=2 ** 20):
+        """ Submits a query and writes its result straight to a file.
+
+        The body is written chunk by chunk as it downloads, so only about
+        `chunk_size` bytes of it are in memory at once, however large the
+        result. It never passes through the result property or a string.
+
+        When `target` is a path, the body is written to `target` + '.part',
+        which is renamed to `target` only once complete, so `target` never
+        holds a partial result. If the download fails part-way, the partial
+        file is kept; the client resumes from where it stopped, with an HTTP
+        Range request, as soon as the retry policy allows, and the next call
+        for the same target does the same. If the server sends the whole body
+        instead, the download starts over. Resuming assumes the result has
+        not changed in between, as for a TLE history bounded by epoch::
+
+            >> import spacetracktool as st
+            >> client = st.SpaceTrackClient('username', 'password', fmt='3le',
+            ..                              persistent=True)
+            >> query = client.build_query('tle', epoch='<2010-01-01')
+            >> client.submit_to_file('history.3le.gz', query, compress=True)
+
+        Args:
+            target: path of the file to write, or a writable binary file-like
+                object.
+
+        Keyword Args:
+            url (str, Query): the query to submit, as for submit. Default is
+                None.
+            compress (bool): if True, gzip the body on its way to the file. A
+                body the server sent gzipped is written as it arrived, without
+                decompressing it. Default is False.
+            resume (bool): if True, resume interrupted downloads. Only
+                uncompressed downloads to a path can be resumed. Default is
+                True.
+            chunk_size (int): bytes read from the connection at a time.
+                Default is 1 MiB.
+
+        Returns:
+            Response from space-track.org, its body already consumed. Its
+            bytes_received attribute holds the number of body bytes received
+            by this call, and its retries attribute the number of retries and
+            resumes made.
+
+        Raises:
+            requests.exceptions.HTTPError: if space-track.org returned an
+                error status.
+            requests.exceptions.ConnectionError: if the download was
+                interrupted and could not be resumed.
+
+        """
+        if not url:
+            url = self._compile_query()
+        elif isinstance(url, Query):
+            url = url.url
+        part = None
+        if not hasattr(target, 'write'):
+            part = os.fspath(target) + '.part'
+        resume = resume and part is not None and not compress
+        start = time.perf_counter()
+        resumes = 0
+        while True:
+            offset = 0
+            if resume and os.path.exists(part):
+                offset = os.path.getsize(part)
+            headers = None
+            if offset:
+                # Byte offsets count the decoded body, so ask for it as is.
+                headers = {'Range': 'bytes={}-'.format(offset),
+                           'Accept-Encoding': 'identity'}
+            try:
+                res = self._submit_url(url, stream=True, headers=headers)
+            except requests.exceptions.HTTPError as excep:
+                if offset and excep.response.status_code == 416:
+                    os.remove(part)  # partial file is stale; start over
+                    continue
+                self._emit(url, start, excep.response, error=excep)
+                raise
+            except requests.exceptions.RequestException as excep:
+                self._emit(url, start, excep.response, error=excep)
+                raise
+            if res.status_code != 206:
+                offset = 0
+            began = time.perf_counter()
+            try:
+                if part is None:
+                    received = _write_body(res, target, compress, chunk_size)
+                else:
+                    with open(part, 'ab' if offset else 'wb') as out:
+                        received = _write_body(res, out, compress, chunk_size)
+                        out.flush()
+                        os.fsync(out.fileno())
+            except (requests.exceptions.ChunkedEncodingError,
+                    requests.exceptions.ConnectionError) as excep:
+                res.close()
+                if (not resume or self._retry is None
+                        or not self._retry.allow(url, res.retries + resumes)):
+                    self._emit(url, start, res, error=excep,
+                               download=time.perf_counter() - began)
+                    raise
+                print('Download interrupted! {}; resuming.'.format(excep))
+                time.sleep(self._retry.delay(res.retries + resumes))
+                resumes += 1
+                continue
+            break
+        if part is not None:
+            os.replace(part, os.fspath(target))
+        res.bytes_received = received
+        res.retries += resumes
+        self._emit(url, start, res, download=time.perf_counter() - began)
+        return res
+
+    def add_hook(self, hook):
+        """ Adds an instrumentation hook.
+
+        Args:
+            hook: callable taking a spacetracktool.instrument.RequestEvent,
+                called once each query submitted has finished.
+
+        """
+        self._hooks.append(hook)
+
+    def _stream_events(self, records, url: str, start: float, res):
+        """ Yields streamed records, then reports the finished query. """
+        began = time.perf_counter()
+        error = None
+        try:
+            yield from records
+        except Exception as excep:
+            error = excep
+            raise
+        finally:
+            self._emit(url, start, res, error=error,
+                       download=time.perf_counter() - began)
+
+    def _emit(self, url: str, start: float, res=None, error=None,
+              download: float=None):
+        """ Calls the instrumentation hooks with a query's RequestEvent.
+
+        Args:
+            url: the query URL.
+            start: time.perf_counter() when the query was submitted.
 
         Keyword Args:
-            url (str): Query URL for space-track.org or None. If not None, this
-                will override whatever query was built by the API. Default is
+            res: the response, or None if there was none. Default is None.
+            error: the exception raised by the query, or None. Default is
                 None.
+            download (float): seconds spent reading a streamed body, or None
+                to work it out from the response. Default is None.
+
+        """
+        if not self._hooks:
+            return
+        status = ttfb = login = response_bytes = wire_bytes = None
+        from_cache = False
+        retries = 0
+        if res is not None:
+            streamed = download is not None
+            status = res.status_code
+            from_cache = getattr(res, 'from_cache', False)
+            retries = getattr(res, 'retries', 0)
+            login = getattr(res, 'login_time', None)
+            if not from_cache:
+                ttfb = res.elapsed.total_seconds()
+                request_time = getattr(res, 'request_time', None)
+                if download is None and request_time is not None:
+                    download = max(0., request_time - ttfb - (login or 0.))
+            if not streamed:
+                response_bytes = len(res.content)
+            length = res.headers.get('Content-Length')
+            if length is not None and not from_cache:
+                wire_bytes = int(length)
+        event = RequestEvent(
+            request_class=request_class_of(url), url=redact(url),
+            status=status, total=time.perf_counter() - start,
+            queue_wait=getattr(res, 'queue_wait', None), login=login,
+            dns=getattr(res, 'dns_time', None),
+            connect=getattr(res, 'connect_time', None), ttfb=ttfb,
+            download=None if from_cache else download,
+            response_bytes=response_bytes, wire_bytes=wire_bytes,
+            retries=retries, from_cache=from_cache, error=error)
+        for hook in self._hooks:
+            try:
+                hook(event)
+            except Exception as excep:  # pylint: disable=broad-except
+                warnings.warn('Instrumentation hook {!r} failed: {}'.format(
+                    hook, excep))
+
+    def _submit_url(self, url: str, stream: bool=False,
+                    headers: dict=None) -> requests.models.Response:
+        """ Sends a query and checks and caches its response.
+
+        Args:
+            url: the full query URL.
+
+        Keyword Args:
+            stream (bool): if True, do not download the body yet. Default is
+                False.
+            headers (dict): extra request headers, or None. Default is None.
 
         Returns:
             Response from space-track.org
 
         """
-        if url:
-            payload = {'identity': self._username,
-                       'password': self._password,
-                       'query': url}
-        else:
-            payload = {'identity': self._username,
-                       'password': self._password,
-                       'query': self._compile_query()}
-        self.result = requests.post(self.login_url, data=payload)
-        if not self.result.ok:
+        res = self._send(url, stream, headers)
+        res.from_cache = False
+        self.result = res
+        if not res.ok:
             print('Error posting request! Status code {}'.format(
-                self.result.status_code))
+                res.status_code))
             # pylint: disable=not-callable
-            self.result.raise_for_status()  # raise HTTP error
-        # self._logout()
-        return self.result
+            res.raise_for_status()  # raise HTTP error
+        if self._cache is not None and not stream:
+            self._cache.put(url, res.content, _cache_headers(res.headers))
+        return res
+
+    def _send(self, url: str, stream: bool,
+              headers: dict=None) -> requests.models.Response:
+        """ Sends a query, retrying transient failures.
 
-    def _value_query(self, key: str, value: str):
-        """ Specifies a "value equals ___" query.
+        Each attempt waits its turn on the rate limiter and checks the circuit
+        breaker first. Failed attempts are retried as the retry policy allows.
 
         Args:
-            key: the key to add to the query string
-            value: the value to search for
+            url: the full query URL.
+            stream: if True, do not download the body yet.
+
+        Keyword Args:
+            headers (dict): extra request headers, or None. Default is None.
+
+        Returns:
+            The last response received. Its queue_wait attribute holds the
+            total seconds spent waiting on the rate limiter, and its retries
+            attribute the number of retries made.
 
         Raises:
-            ValueError: if key or value are not of type string and cannot be
-                coerced into a string.
+            CircuitOpenError: if the circuit breaker is open.
+            requests.exceptions.ConnectionError: if the connection failed on
+                the last attempt allowed.
 
         """
-        if not isinstance(key, str):
-            try:
-                key = str(key)
-            except Exception as excep:
-                print(excep)
-                raise ValueError('key argument must be a string or',
-                                 'coercable to string!')
-        if not isinstance(value, str):
+        wait = 0.
+        attempt = 0
+        while True:
+            if self._breaker is not None:
+                self._breaker.before_request()
             try:
-                value = str(value)
-            except Exception as excep:
-                print(excep)
-                raise ValueError('value argument must be a string or',
-                                 'coercable to string!')
-        self._query.extend([key, value])
-
-    def _make_query(self, key_list: list, kwargs: dict):
+                if self._rate_limiter is not None:
+                    wait += self._rate_limiter.acquire()
+                sent = time.perf_counter()
+                if self._session is not None:
+                    res = self._session_get(url, stream, headers)
+                else:
+                    payload = {'identity': self._username,
+                               'password': self._password,
+                               'query': url}
+                    post_headers = {'Accept-Encoding': ACCEPT_ENCODING}
+                    post_headers.update(headers or {})
+                    res = requests.post(self.login_url, data=payload,
+                                        stream=stream, headers=post_headers)
+                res.request_time = time.perf_counter() - sent
+            except RETRY_EXCEPTIONS as excep:
+                if self._breaker is not None:
+                    self._breaker.record_failure()
+                if self._retry is None or not self._retry.allow(url, attempt):
+                    raise
+                print('Error posting request! {}; retrying.'.format(excep))
+                time.sleep(self._retry.delay(attempt))
+                attempt += 1
+                continue
+            except BaseException:
+                # Any other error still ends the attempt, so that a half-open
+                # circuit does not wait for its trial forever.
+                if self._breaker is not None:
+                    self._breaker.record_failure()
+                raise
+            if self._breaker is not None:
+                if res.status_code in RETRY_STATUSES:
+                    self._breaker.record_failure()
+                else:
+                    self._breaker.record_success()
+            if (self._retry is None
+                    or not self._retry.is_retryable(res.status_code)
+                    or not self._retry.allow(url, attempt)):
+                break
+            print('Error posting request! Status code {}; retrying.'.format(
+                res.status_code))
+            retry_after = parse_retry_after(
+                res.headers.get('Retry-After'))
+            res.close()
+            time.sleep(self._retry.delay(attempt, retry_after))
+            attempt += 1
+        res.queue_wait = wait
+        res.retries = attempt
+        return res
+
+    def records(self, url=None):
+        """ Submits a TLE query and yields its results as TleRecords.
+
+        The response is streamed, so records are parsed as they arrive. Any
+        streamable format may be used; the compact 'tle' and '3le' formats are
+        the cheapest to download and parse, and are used for element-set
+        queries if the client was created with compact set.
+
+        Keyword Args:
+            url (str, Query): the query to submit, as for submit. Default is
+                None.
+
+        Returns:
+            An iterator over spacetracktool.records.TleRecord objects.
+
+        """
+        return parse_records(self.submit(self._element_url(url), stream=True))
+
+    def columns(self, url=None):
+        """ Submits a TLE query and returns its results as a NumPy array.
+
+        Results in the 'tle' or '3le' format are converted without creating
+        any per-row Python objects. See spacetracktool.columns.
+
+        Keyword Args:
+            url (str, Query): the query to submit, as for submit. Default is
+                None.
+
+        Returns:
+            Structured array with dtype spacetracktool.columns.ELEMENT_DTYPE.
+
+        Raises:
+            ImportError: if NumPy is not installed.
+
+        """
+        url = self._element_url(url)
+        res = self.submit(url)
+        return columns.from_response(res.content, _url_format(url))
+
+    def _element_url(self, url=None) -> str:
+        """ Returns the URL of an element-set query, compacted if enabled.
+
+        Keyword Args:
+            url (str, Query): the query, as for submit. Default is None.
+
+        Returns:
+            The query URL, in the client's compact format if it has one and
+            the query is for one of ELEMENT_CLASSES.
+
+        """
+        query = url if isinstance(url, Query) else None
+        if query is not None:
+            url = query.url
+        elif not url:
+            url = self._compile_query()
+        if self._compact is None:
+            return url
+        if query is None:
+            query = Query.from_url(url)
+        compacted = query.compact(self._compact)
+        return url if compacted is query else compacted.url
+
+    def _cached(self, url: str) -> requests.models.Response:
+        """ Returns the cached response for a URL, or None on a miss. """
+        if self._cache is None:
+            return None
+        entry = self._cache.get(url)
+        if entry is None:
+            return None
+        res = _make_response(url, 200, entry[0], headers=entry[1],
+                             reason='OK')
+        res.queue_wait = 0.
+        res.from_cache = True
+        return res
+
+    def _session_get(self, url: str, stream: bool=False,
+                     headers: dict=None) -> requests.models.Response:
+        """ GETs a query through the persistent, authenticated session.
+
+        Logs in first if needed, and logs in again and retries once if the
+        server reports that the session cookie has expired.
+
+        Args:
+            url: the full query URL.
+
+        Keyword Args:
+            stream (bool): if True, do not download the body yet. Default is
+                False.
+            headers (dict): extra request headers, or None. Default is None.
+
+        Returns:
+            Response from space-track.org
+
+        """
+        start = time.perf_counter()
+        login = self._ensure_login()
+        login_time = time.perf_counter() - start
+        res = self._session.get(url, stream=stream, headers=headers)
+        if res.status_code == 401:
+            res.close()
+            start = time.perf_counter()
+            self._ensure_login(stale=login)
+            login_time += time.perf_counter() - start
+            res = self._session.get(url, stream=stream, headers=headers)
+        res.login_time = login_time
+        return res
+
+    def _make_query(self, request_class: str, kwargs: dict) -> Query:
         """ Forms a query using expected keys and provided keyword args.
 
         Args:
-            key_list: list of expected, possible keys.
+            request_class: the space-track.org request class.
             kwargs: dictionary of provided keyword args.
 
+        Returns:
+            The built query.
+
         Raises:
             KeyError: if a key is given that is not in the key list
 
         """
-        # pylint: disable=not-callable
-        for k in kwargs.keys():
-            if k not in key_list:
-                err_msg = ('Unexpected argument {} given! '.format(k) +
-                           'If you believe this is a valid key, please ' +
-                           'submit a pull request or open an issue on GitHub.')
-                raise KeyError(err_msg)
-        for key in key_list:
-            # pylint: disable=not-callable
-            if key in kwargs.keys():
-                self._value_query(key.upper(), kwargs.pop(key))
+        schema = REQUEST_SCHEMAS[request_class]
+        return Query(self._base, schema.controller, request_class,
+                     schema.predicates(kwargs), self._fmt)
+
+    def build_query(self, request_class: str, **kwargs) -> Query:
+        """ Builds a query without submitting it.
+
+        Takes the same keyword arguments as the matching *_query method, plus
+        the REST controls orderby, limit, distinct, emptyresult, metadata and
+        predicates, which every request class accepts. The returned Query is
+        immutable, and may be passed to submit from any thread::
+
+            >> import spacetracktool as st
+            >> client = st.SpaceTrackClient('username', 'password')
+            >> query = client.build_query('tle_latest', norad_cat_id=12345)
+            >> result = client.submit(query)
+
+        Args:
+            request_class: the space-track.org request class, e.g. 'tle',
+                'tle_latest', 'satcat' or 'boxscore'.
+
+        Returns:
+            The built query.
+
+        Raises:
+            ValueError: if request_class is not a known request class
+            IndexError: if no keyword arguments are provided
+            KeyError: if any provided key is not in the expected argument list
+
+        """
+        if request_class not in REQUEST_SCHEMAS:
+            raise ValueError('Unknown request class {}!'.format(request_class))
+        if len(kwargs) == 0:
+            raise IndexError('Must supply at least one keyword argument!')
+        defaults = REQUEST_DEFAULTS.get(request_class)
+        if defaults:
+            for key, value in defaults.items():
+                kwargs.setdefault(key, value)
+        query = self._make_query(request_class, kwargs)
+        self._last_query = query
+        return query
+
+    def batch_query(self, request_class: str, ids, key: str='norad_cat_id',
+                    max_url_length: int=2000, **kwargs) -> list:
+        """ Queries many catalog IDs in as few requests as possible.
+
+        The IDs are packed into comma-separated lists and ranges with
+        spacetracktool.operations.make_id_list_strings, split so that no query
+        URL is longer than `max_url_length`, and submitted one chunk at a time.
+        Records returned by more than one chunk are only kept once::
+
+            >> import spacetracktool as st
+            >> client = st.SpaceTrackClient('username', 'password')
+            >> records = client.batch_query('tle_latest', range(1, 20000),
+            ..                              ordinal=1)
+
+        Args:
+            request_class: the space-track.org request class, e.g.
+                'tle_latest' or 'satcat'.
+            ids: iterable of catalog IDs.
+
+        Keyword Args:
+            key (str): the predicate the IDs are matched against. Default is
+                'norad_cat_id'.
+            max_url_length (int): the maximum length of each query URL.
+                Default is 2000.
+
+        Any other keyword arguments are added to every query, as for
+        build_query.
+
+        Returns:
+            List of the returned records, parsed from JSON.
+
+        Raises:
+            ValueError: if the client's format is not 'json', or if the other
+                arguments leave no room in the URL for any IDs.
+
+        """
+        return _merge_records(
+            self.submit(query) for query in self._batch_queries(
+                request_class, ids, key, max_url_length, kwargs))
+
+    def _batch_queries(self, request_class: str, ids, key: str,
+                       max_url_length: int, kwargs: dict) -> list:
+        """ Builds the queries of a batch_query.
+
+        Returns:
+            List of Queries, each for one chunk of the IDs.
+
+        Raises:
+            ValueError: if the client's format is not 'json', or if the other
+                arguments leave no room in the URL for any IDs.
+
+        """
+        if self._fmt != 'json':
+            raise ValueError("batch_query requires the 'json' format!")
+        kwargs[key] = ''
+        budget = max_url_length - len(self.build_query(request_class,
+                                                       **kwargs).url)
+        if budget <= 0:
+            raise ValueError('max_url_length leaves no room for any IDs!')
+        queries = []
+        for chunk in operations.make_id_list_strings(ids, max_length=budget):
+            kwargs[key] = chunk
+            queries.append(self.build_query(request_class, **kwargs))
+        return queries
+
+    def lookup(self, request_class: str, ids, max_age: float=None) -> dict:
+        """ Looks up records by catalog ID, locally first.
+
+        IDs found in the client's store are answered from it. Only the rest
+        are queried from space-track.org, with batch_query, and the results
+        are saved to the store for next time::
+
+            >> import spacetracktool as st
+            >> from spacetracktool.store import CatalogStore
+            >> client = st.SpaceTrackClient('username', 'password',
+            ..                              store=CatalogStore('catalog.db'))
+            >> elsets = client.lookup('tle_latest', [25544, 43013])
+
+        Args:
+            request_class: 'tle_latest' for the latest element set of each
+                object, or 'satcat'.
+            ids: iterable of catalog IDs.
+
+        Keyword Args:
+            max_age (float): query stored records again once they are more
+                than this many seconds old, or None to always use them.
+                Default is None.
+
+        Returns:
+            Dict mapping each catalog ID found to its record, parsed from
+            JSON.
+
+        Raises:
+            ValueError: if the client's format is not 'json'.
+
+        """
+        found, missing = self._stored(request_class, ids, max_age)
+        if missing:
+            kwargs = {'ordinal': 1} if request_class == 'tle_latest' else {}
+            self._remember(request_class, found, self.batch_query(
+                request_class, missing, **kwargs))
+        return found
+
+    def _stored(self, request_class: str, ids, max_age: float) -> tuple:
+        """ Returns the stored records of a lookup, and the IDs missing.
+
+        Returns:
+            Tuple of a dict mapping each catalog ID found in the store to its
+            record, and the sorted list of the other IDs.
+
+        """
+        ids = {int(norad_id) for norad_id in ids}
+        found = {}
+        if self._store is not None:
+            found = self._store.get(request_class, ids, max_age=max_age)
+        return found, sorted(ids.difference(found))
+
+    def _remember(self, request_class: str, found: dict, records: list):
+        """ Saves queried records to the store, and adds them to found. """
+        if self._store is not None:
+            self._store.upsert(records, request_class)
+        for record in records:
+            found[int(record['NORAD_CAT_ID'])] = record
 
     def tle_query(self, **kwargs):
         """ Initiates a TLE query request.
@@ -279,7 +1124,8 @@ class SpaceTrackClient:
                 be a single value or a range.
             perigee (float, str): The radius when furthest from the Earth. May
                 be a single value or a range.
-            limit (int): The maximum number of responses returned.
+            limit (int, str): The maximum number of responses returned, or
+                'count,offset' to skip the first offset responses.
 
         Returns:
             The result of the query to space-track.org
@@ -289,21 +1135,7 @@ class SpaceTrackClient:
             KeyError: if any provided key is not in the expected argument list
 
         """
-        if len(kwargs) == 0:
-            raise IndexError('Must supply at least one keyword argument!')
-        key_list = ['comment', 'originator', 'norad_cat_id', 'object_name',
-                    'object_type', 'classification_type', 'intldes', 'epoch',
-                    'epoch_microseconds', 'mean_motion', 'eccentricity',
-                    'inclination', 'ra_of_asc_node', 'arg_of_pericenter',
-                    'mean_anomaly', 'ephemeris_type', 'element_set_no',
-                    'rev_at_epoch', 'bstar', 'mean_motion_dot',
-                    'mean_motion_ddot', 'file', 'tle_line0', 'tle_line1',
-                    'tle_line2', 'object_id', 'object_number',
-                    'semimajor_axis', 'period', 'apogee', 'perigee', 'limit']
-        self._start_query()
-        self._query.extend(['class', 'tle'])
-        self._make_query(key_list, kwargs)
-        return self.submit()
+        return self.submit(self.build_query('tle', **kwargs))
 
     def tle_latest_query(self, **kwargs):
         """ Initiates a TLE_latest query request.
@@ -394,21 +1226,7 @@ class SpaceTrackClient:
             KeyError: if any provided key is not in the expected argument list
 
         """
-        if len(kwargs) == 0:
-            raise IndexError('Must supply at least one keyword argument!')
-        key_list = ['ordinal', 'comment', 'originator', 'norad_cat_id',
-                    'object_name', 'object_type', 'classification_type',
-                    'intldes', 'epoch', 'epoch_microseconds' 'mean_motion',
-                    'eccentricity', 'inclination', 'ra_of_asc_node',
-                    'arg_of_pericenter', 'mean_anomaly', 'ephemeris_type',
-                    'element_set_no', 'rev_at_epoch', 'bstar',
-                    'mean_motion_dot', 'mean_motion_ddot', 'file', 'tle_line0',
-                    'tle_line1', 'tle_line2', 'semimajor_axis', 'period',
-                    'apogee', 'perigee']
-        self._start_query()
-        self._query.extend(['class', 'tle_latest'])
-        self._make_query(key_list, kwargs)
-        return self.submit()
+        return self.submit(self.build_query('tle_latest', **kwargs))
 
     def tle_publish_query(self, **kwargs):
         """ Initiates a tle_publish query request.
@@ -421,13 +1239,7 @@ class SpaceTrackClient:
             KeyError: if any provided key is not in the expected argument list
 
         """
-        if len(kwargs) == 0:
-            raise IndexError('Must supply at least one keyword argument!')
-        key_list = ['publish_epoch', 'tle_line1', 'tle_line2']
-        self._start_query()
-        self._query.extend(['class', 'tle_publish'])
-        self._make_query(key_list, kwargs)
-        return self.submit()
+        return self.submit(self.build_query('tle_publish', **kwargs))
 
     def box_score_query(self, **kwargs):
         """ Initiates a boxscore query request.
@@ -440,18 +1252,7 @@ class SpaceTrackClient:
             KeyError: if any provided key is not in the expected argument list
 
         """
-        if len(kwargs) == 0:
-            raise IndexError('Must supply at least one keyword argument!')
-        key_list = ['country', 'spadoc_cd', 'orbital_tba',
-                    'orbital_payload_count', 'orbital_rocket_body_count',
-                    'orbital_debris_count', 'orbital_total_count',
-                    'decayed_payload_count', 'decayed_rocket_body_count',
-                    'decayed_debris_count', 'decayed_total_count',
-                    'country_total']
-        self._start_query()
-        self._query.extend(['class', 'boxscore'])
-        self._make_query(key_list, kwargs)
-        return self.submit()
+        return self.submit(self.build_query('boxscore', **kwargs))
 
     def satcat_query(self, **kwargs):
         """ Initiates a satcat query request.
@@ -464,18 +1265,7 @@ class SpaceTrackClient:
             KeyError: if any provided key is not in the expected argument list
 
         """
-        if len(kwargs) == 0:
-            raise IndexError('Must supply at least one keyword argument!')
-        key_list = ['intldes', 'norad_cat_id', 'object_type', 'satname',
-                    'country', 'launch', 'site', 'decay', 'period',
-                    'inclination', 'apogee', 'perigee', 'comment',
-                    'commentcode', 'rcsvalue', 'rcs_size', 'file',
-                    'launch_year', 'launch_num', 'launch_piece', 'current',
-                    'object_name', 'object_id', 'object_number']
-        self._start_query()
-        self._query.extend(['class', 'satcat'])
-        self._make_query(key_list, kwargs)
-        return self.submit()
+        return self.submit(self.build_query('satcat', **kwargs))
 
     def launch_site_query(self, **kwargs):
         """ Initiates a launch_site request.
@@ -488,13 +1278,7 @@ class SpaceTrackClient:
             KeyError: if any provided key is not in the expected argument list
 
         """
-        if len(kwargs) == 0:
-            raise IndexError('Must supply at least one keyword argument!')
-        key_list = ['site_code', 'launch_site']
-        self._start_query()
-        self._query.extend(['class', 'launch_site'])
-        self._make_query(key_list, kwargs)
-        return self.submit()
+        return self.submit(self.build_query('launch_site', **kwargs))
 
     def satcat_change_query(self, **kwargs):
         """ Initiates a satcat_change request.
@@ -507,17 +1291,7 @@ class SpaceTrackClient:
             KeyError: if any provided key is not in the expected argument list
 
         """
-        if len(kwargs) == 0:
-            raise IndexError('Must supply at least one keyword argument!')
-        key_list = ['norad_cat_id', 'object_number', 'current_name',
-                    'previous_name', 'current_intldes', 'previous_intldes',
-                    'current_country', 'previous_country', 'current_launch',
-                    'previous_launch', 'current_decay', 'previous_decay',
-                    'change_made']
-        self._start_query()
-        self._query.extend(['class', 'satcat_change'])
-        self._make_query(key_list, kwargs)
-        return self.submit()
+        return self.submit(self.build_query('satcat_change', **kwargs))
 
     def satcat_debut_query(self, **kwargs):
         """ Initiates a satcat_debut request.
@@ -530,17 +1304,7 @@ class SpaceTrackClient:
             KeyError: if any provided key is not in the expected argument list
 
         """
-        if len(kwargs) == 0:
-            raise IndexError('Must supply at least one keyword argument!')
-        key_list = ['intldes', 'norad_cat_id', 'satname', 'debut', 'country',
-                    'launch', 'site', 'decay', 'period', 'inclination',
-                    'apogee', 'perigee', 'comment', 'commentcode', 'rcsvalue',
-                    'rcs_size', 'launch_piece', 'current', 'object_name',
-                    'object_id', 'object_number']
-        self._start_query()
-        self._query.extend(['class', 'satcat_debut'])
-        self._make_query(key_list, kwargs)
-        return self.submit()
+        return self.submit(self.build_query('satcat_debut', **kwargs))
 
     def decay_query(self, **kwargs):
         """ Initiates a decay request.
@@ -557,17 +1321,7 @@ class SpaceTrackClient:
             KeyError: if any provided key is not in the expected argument list
 
         """
-        if len(kwargs) == 0:
-            raise IndexError('Must supply at least one keyword argument!')
-        key_list = ['norad_cat_id', 'object_number', 'object_name', 'intldes',
-                    'object_id', 'rcs', 'rcs_size', 'country', 'msg_epoch',
-                    'decay_epoch', 'source', 'msg_type', 'precedence']
-        if 'precedence' not in list(kwargs.keys()):
-            kwargs['precedence'] = 2  # default to decay announcements
-        self._start_query()
-        self._query.extend(['class', 'decay'])
-        self._make_query(key_list, kwargs)
-        return self.submit()
+        return self.submit(self.build_query('decay', **kwargs))
 
     def tip_query(self, **kwargs):
         """ Initiates a tracking and impact prediction (TIP) request.
@@ -580,15 +1334,7 @@ class SpaceTrackClient:
             KeyError: if any provided key is not in the expected argument list
 
         """
-        if len(kwargs) == 0:
-            raise IndexError('Must supply at least one keyword argument!')
-        key_list = ['norad_cat_id', 'msg_epoch', 'insert_epoch', 'decay_epoch',
-                    'window', 'rev', 'direction', 'lat', 'lon', 'incl',
-                    'next_report', 'id', 'high_interest', 'object_number']
-        self._start_query()
-        self._query.extend(['class', 'tip'])
-        self._make_query(key_list, kwargs)
-        return self.submit()
+        return self.submit(self.build_query('tip', **kwargs))
 
     def announcement_query(self, **kwargs):
         """ Initiates a announcement request.
@@ -601,14 +1347,7 @@ class SpaceTrackClient:
             KeyError: if any provided key is not in the expected argument list
 
         """
-        if len(kwargs) == 0:
-            raise IndexError('Must supply at least one keyword argument!')
-        key_list = ['announcement_type', 'announcement_text',
-                    'announcement_start', 'announcement_end']
-        self._start_query()
-        self._query.extend(['class', 'announcement'])
-        self._make_query(key_list, kwargs)
-        return self.submit()
+        return self.submit(self.build_query('announcement', **kwargs))
 
     def cdm_query(self, **kwargs):
         """ Initiates a cdm request.
@@ -623,135 +1362,7 @@ class SpaceTrackClient:
         """
         warnings.warn('Expanded space data queries are not supported at this time.',
                       Warning)
-        if len(kwargs) == 0:
-            raise IndexError('Must supply at least one keyword argument!')
-        key_list = ['constellation', 'cdm_id', 'filename', 'insert_epoch',
-                    'ccsds_cdm_vers', 'creation_date', 'creation_date_fraction',
-                    'originator', 'message_for', 'message_id',
-                    'comment_emergency_reportable', 'tca', 'tca_fraction',
-                    'miss_distance', 'miss_distance_unit', 'relative_speed',
-                    'relative_speed_unit', 'relative_position_r',
-                    'relative_position_r_unit', 'relative_position_t',
-                    'relative_position_t_unit', 'relative_position_n',
-                    'relative_position_n_unit', 'relative_velocity_r',
-                    'relative_velocity_r_unit', 'relative_velocity_t',
-                    'relative_velocity_t_unit', 'relative_velocity_n',
-                    'relative_velocity_n_unit', 'collision_probability',
-                    'collision_probability_method', 'sat1_object',
-                    'sat1_object_designator', 'sat1_catalog_name',
-                    'sat1_object_name', 'sat1_international_designator',
-                    'sat1_object_type', 'sat1_operator_contact_position',
-                    'sat1_operator_organization', 'sat1_operator_phone',
-                    'sat1_operator_email', 'sat1_ephemeris_name',
-                    'sat1_covariance_method', 'sat1_maneuverable',
-                    'sat1_ref_frame', 'sat1_gravity_model',
-                    'sat1_atmospheric_model', 'sat1_n_body_perturbations',
-                    'sat1_solar_rad_pressure', 'sat1_earth_tides',
-                    'sat1_intrack_thrust', 'sat1_time_lastob_start',
-                    'sat1_time_lastob_start_fraction', 'sat1_time_lastob_end',
-                    'sat1_time_lastob_end_fraction', 'sat1_recommended_od_span',
-                    'sat1_recommended_od_span_unit', 'sat1_actual_od_span',
-                    'sat1_actual_od_span_unit', 'sat1_obs_available',
-                    'sat1_obs_used', 'sat1_residuals_accepted',
-                    'sat1_residuals_accepted_unit', 'sat1_weighted_rms',
-                    'sat1_comment_apogee', 'sat1_comment_perigee',
-                    'sat1_comment_inclination', 'sat1_area_pc',
-                    'sat1_area_pc_unit', 'sat1_cd_area_over_mass',
-                    'sat1_cd_area_over_mass_unit', 'sat1_cr_area_over_mass',
-                    'sat1_cr_area_over_mass_unit', 'sat1_thrust_acceleration',
-                    'sat1_thrust_acceleration_unit', 'sat1_sedr',
-                    'sat1_sedr_unit', 'sat1_x', 'sat1_x_unit', 'sat1_y',
-                    'sat1_y_unit', 'sat1_z', 'sat1_z_unit', 'sat1_x_dot',
-                    'sat1_x_dot_unit', 'sat1_y_dot', 'sat1_y_dot_unit',
-                    'sat1_z_dot', 'sat1_z_dot_unit', 'sat1_cr_r',
-                    'sat1_cr_r_unit', 'sat1_ct_r', 'sat1_ct_r_unit',
-                    'sat1_ct_t', 'sat1_ct_t_unit', 'sat1_cn_r',
-                    'sat1_cn_r_unit', 'sat1_cn_t', 'sat1_cn_t_unit',
-                    'sat1_cn_n', 'sat1_cn_n_unit', 'sat1_crdot_r',
-                    'sat1_crdot_r_unit', 'sat1_crdot_t', 'sat1_crdot_t_unit',
-                    'sat1_crdot_n', 'sat1_crdot_n_unit', 'sat1_crdot_rdot',
-                    'sat1_crdot_rdot_unit', 'sat1_ctdot_r',
-                    'sat1_ctdot_r_unit', 'sat1_ctdot_t', 'sat1_ctdot_t_unit',
-                    'sat1_ctdot_n', 'sat1_ctdot_n_unit', 'sat1_ctdot_rdot',
-                    'sat1_ctdot_rdot_unit', 'sat1_ctdot_tdot',
-                    'sat1_ctdot_tdot_unit', 'sat1_cndot_r',
-                    'sat1_cndot_r_unit', 'sat1_cndot_t', 'sat1_cndot_t_unit',
-                    'sat1_cndot_n', 'sat1_cndot_n_unit', 'sat1_cndot_rdot',
-                    'sat1_cndot_rdot_unit', 'sat1_cndot_tdot',
-                    'sat1_cndot_tdot_unit', 'sat1_cndot_ndot',
-                    'sat1_cndot_ndot_unit', 'sat1_cdrg_r',
-                    'sat1_cdrg_r_unit', 'sat1_cdrg_t', 'sat1_cdrg_t_unit',
-                    'sat1_cdrg_n', 'sat1_cdrg_n_unit', 'sat1_cdrg_rdot',
-                    'sat1_cdrg_rdot_unit', 'sat1_cdrg_tdot',
-                    'sat1_cdrg_tdot_unit', 'sat1_cdrg_ndot',
-                    'sat1_cdrg_ndot_unit', 'sat1_cdrg_drg',
-                    'sat1_cdrg_drg_unit', 'sat1_csrp_r',
-                    'sat1_csrp_r_unit', 'sat1_csrp_t', 'sat1_csrp_t_unit',
-                    'sat1_csrp_n', 'sat1_csrp_n_unit', 'sat1_csrp_rdot',
-                    'sat1_csrp_rdot_unit', 'sat1_csrp_tdot',
-                    'sat1_csrp_tdot_unit', 'sat1_csrp_ndot',
-                    'sat1_csrp_ndot_unit', 'sat1_csrp_drg',
-                    'sat1_csrp_drg_unit', 'sat1_csrp_srp', 'sat1_csrp_srp_unit',
-                    'sat2_object', 'sat2_object_designator',
-                    'sat2_catalog_name', 'sat2_object_name',
-                    'sat2_international_designator',
-                    'sat2_object_type', 'sat2_operator_contact_position',
-                    'sat2_operator_organization', 'sat2_operator_phone',
-                    'sat2_operator_email', 'sat2_ephemeris_name',
-                    'sat2_covariance_method', 'sat2_maneuverable',
-                    'sat2_ref_frame', 'sat2_gravity_model',
-                    'sat2_atmospheric_model', 'sat2_n_body_perturbations',
-                    'sat2_solar_rad_pressure', 'sat2_earth_tides',
-                    'sat2_intrack_thrust', 'sat2_time_lastob_start',
-                    'sat2_time_lastob_start_fraction', 'sat2_time_lastob_end',
-                    'sat2_time_lastob_end_fraction', 'sat2_recommended_od_span',
-                    'sat2_recommended_od_span_unit', 'sat2_actual_od_span',
-                    'sat2_actual_od_span_unit', 'sat2_obs_available',
-                    'sat2_obs_used', 'sat2_residuals_accepted',
-                    'sat2_residuals_accepted_unit', 'sat2_weighted_rms',
-                    'sat2_comment_apogee', 'sat2_comment_perigee',
-                    'sat2_comment_inclination', 'sat2_area_pc',
-                    'sat2_area_pc_unit', 'sat2_cd_area_over_mass',
-                    'sat2_cd_area_over_mass_unit', 'sat2_cr_area_over_mass',
-                    'sat2_cr_area_over_mass_unit', 'sat2_thrust_acceleration',
-                    'sat2_thrust_acceleration_unit', 'sat2_sedr',
-                    'sat2_sedr_unit', 'sat2_x', 'sat2_x_unit', 'sat2_y',
-                    'sat2_y_unit', 'sat2_z', 'sat2_z_unit', 'sat2_x_dot',
-                    'sat2_x_dot_unit', 'sat2_y_dot', 'sat2_y_dot_unit',
-                    'sat2_z_dot', 'sat2_z_dot_unit', 'sat2_cr_r',
-                    'sat2_cr_r_unit', 'sat2_ct_r', 'sat2_ct_r_unit',
-                    'sat2_ct_t', 'sat2_ct_t_unit', 'sat2_cn_r',
-                    'sat2_cn_r_unit', 'sat2_cn_t', 'sat2_cn_t_unit',
-                    'sat2_cn_n', 'sat2_cn_n_unit', 'sat2_crdot_r',
-                    'sat2_crdot_r_unit', 'sat2_crdot_t', 'sat2_crdot_t_unit',
-                    'sat2_crdot_n', 'sat2_crdot_n_unit', 'sat2_crdot_rdot',
-                    'sat2_crdot_rdot_unit', 'sat2_ctdot_r',
-                    'sat2_ctdot_r_unit', 'sat2_ctdot_t', 'sat2_ctdot_t_unit',
-                    'sat2_ctdot_n', 'sat2_ctdot_n_unit', 'sat2_ctdot_rdot',
-                    'sat2_ctdot_rdot_unit', 'sat2_ctdot_tdot',
-                    'sat2_ctdot_tdot_unit', 'sat2_cndot_r',
-                    'sat2_cndot_r_unit', 'sat2_cndot_t', 'sat2_cndot_t_unit',
-                    'sat2_cndot_n', 'sat2_cndot_n_unit', 'sat2_cndot_rdot',
-                    'sat2_cndot_rdot_unit', 'sat2_cndot_tdot',
-                    'sat2_cndot_tdot_unit', 'sat2_cndot_ndot',
-                    'sat2_cndot_ndot_unit', 'sat2_cdrg_r',
-                    'sat2_cdrg_r_unit', 'sat2_cdrg_t', 'sat2_cdrg_t_unit',
-                    'sat2_cdrg_n', 'sat2_cdrg_n_unit', 'sat2_cdrg_rdot',
-                    'sat2_cdrg_rdot_unit', 'sat2_cdrg_tdot',
-                    'sat2_cdrg_tdot_unit', 'sat2_cdrg_ndot',
-                    'sat2_cdrg_ndot_unit', 'sat2_cdrg_drg',
-                    'sat2_cdrg_drg_unit', 'sat2_csrp_r',
-                    'sat2_csrp_r_unit', 'sat2_csrp_t', 'sat2_csrp_t_unit',
-                    'sat2_csrp_n', 'sat2_csrp_n_unit', 'sat2_csrp_rdot',
-                    'sat2_csrp_rdot_unit', 'sat2_csrp_tdot',
-                    'sat2_csrp_tdot_unit', 'sat2_csrp_ndot',
-                    'sat2_csrp_ndot_unit', 'sat2_csrp_drg',
-                    'sat2_csrp_drg_unit', 'sat2_csrp_srp', 'sat2_csrp_srp_unit',
-                    'gid']
-        self._start_expanded_query()
-        self._query.extend(['class', 'cdm'])
-        self._make_query(key_list, kwargs)
-        return self.submit()
+        return self.submit(self.build_query('cdm', **kwargs))
 
     def organization_query(self, **kwargs):
         """ Initiates a organization request.
@@ -766,30 +1377,27 @@ class SpaceTrackClient:
         """
         warnings.warn('Expanded space data queries are not supported at this time.',
                       Warning)
-        if len(kwargs) == 0:
-            raise IndexError('Must supply at least one keyword argument!')
-        key_list = ['gid', 'org_name', 'constellation', 'info_id', 'info_type',
-                    'info_label', 'info_value', 'info_modified', 'object_count',
-                    'object']
-        self._start_expanded_query()
-        self._query.extend(['class', 'organization'])
-        self._make_query(key_list, kwargs)
-        return self.submit()
+        return self.submit(self.build_query('organization', **kwargs))
+
+    @property
+    def fmt(self):
+        """ Returns the format requested for returned messages. """
+        return self._fmt
 
     @property
     def base(self):
         """ Returns URL base string. """
-        return type(self)._base
+        return self._base
 
     @property
     def login_url(self):
         """ Returns login URL string. """
-        return type(self)._login_url
+        return self._login_url
 
     @property
     def logout_url(self):
         """ Returns logout URL string. """
-        return type(self)._logout_url
+        return self._logout_url
 
     @property
     def null(self):
@@ -0,0 +1,305 @@
+""" Keeps query results in a local, indexed SQLite catalog.
+
+A CatalogStore saves element sets and satellite catalog entries as they come
+back from space-track.org, so later questions can be answered locally::
+
+    import spacetracktool as st
+    from spacetracktool.store import CatalogStore
+
+    store = CatalogStore('catalog.sqlite')
+    client = st.SpaceTrackClient('username', 'password', persistent=True,
+                                 store=store)
+    elsets = client.lookup('tle_latest', [25544, 43013])  # asks space-track
+    elsets = client.lookup('tle_latest', [25544, 43013])  # answered locally
+    sun_sync = store.find('tle_latest', inclination=(97., 99.))
+
+Element sets are keyed by NORAD_CAT_ID and EPOCH, and catalog entries by
+NORAD_CAT_ID; storing a record again replaces the old copy. Lookups by catalog
+ID, epoch, object type and each orbital element use an index. The store also
+implements get_state and set_state, so it can be kept up to date by a
+spacetracktool.sync.TleSync. Results may be exported to Parquet, which
+requires pyarrow.
+
+"""
+
+
+import json
+import sqlite3
+import threading
+import time
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:  # pragma: no cover
+    pyarrow = None
+
+
+# Indexed columns of each table, with their SQLite types. Every record is also
+# kept whole, as JSON, in a DATA column.
+ELSET_COLUMNS = (('NORAD_CAT_ID', 'INTEGER'), ('EPOCH', 'TEXT'),
+                 ('OBJECT_TYPE', 'TEXT'), ('FILE', 'INTEGER'),
+                 ('MEAN_MOTION', 'REAL'), ('ECCENTRICITY', 'REAL'),
+                 ('INCLINATION', 'REAL'), ('RA_OF_ASC_NODE', 'REAL'),
+                 ('ARG_OF_PERICENTER', 'REAL'), ('MEAN_ANOMALY', 'REAL'),
+                 ('BSTAR', 'REAL'), ('APOGEE', 'REAL'), ('PERIGEE', 'REAL'))
+SATCAT_COLUMNS = (('NORAD_CAT_ID', 'INTEGER'), ('OBJECT_TYPE', 'TEXT'),
+                  ('COUNTRY', 'TEXT'), ('LAUNCH', 'TEXT'), ('DECAY', 'TEXT'),
+                  ('PERIOD', 'REAL'), ('INCLINATION', 'REAL'),
+                  ('APOGEE', 'REAL'), ('PERIGEE', 'REAL'))
+
+# Table and primary key holding the records of each request class.
+TABLES = {
+    'tle': ('elset', ELSET_COLUMNS, ('NORAD_CAT_ID', 'EPOCH')),
+    'tle_latest': ('elset', ELSET_COLUMNS, ('NORAD_CAT_ID', 'EPOCH')),
+    'satcat': ('satcat', SATCAT_COLUMNS, ('NORAD_CAT_ID',)),
+}
+
+_CASTS = {'INTEGER': int, 'REAL': float, 'TEXT': str}
+
+
+def _epoch_key(row: dict) -> str:
+    """ Returns a record's epoch as sortable text, including microseconds. """
+    epoch = row.get('EPOCH')
+    if not epoch:
+        return epoch
+    epoch = epoch.replace('T', ' ')
+    micros = row.get('EPOCH_MICROSECONDS')
+    if micros and '.' not in epoch:
+        epoch = '{}.{:06d}'.format(epoch, int(micros))
+    return epoch
+
+
+def _cast(value, sql_type: str):
+    """ Converts a field from a JSON row to the column's type, or None. """
+    if value is None or value == '':
+        return None
+    try:
+        return _CASTS[sql_type](value)
+    except ValueError:
+        return None
+
+
+class CatalogStore:
+    """ Indexed SQLite store of element sets and catalog entries.
+
+    All methods are safe to call from several threads at once.
+
+    Kwargs:
+        path: path of the SQLite database file, created if needed, or
+            ':memory:' for a store that lasts as long as the object. Default
+            is ':memory:'.
+
+    """
+
+    def __init__(self, path: str = ':memory:'):
+        self._path = path
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._db:
+            if path != ':memory:':
+                self._db.execute('PRAGMA journal_mode=WAL')
+            for table, columns, key in set(TABLES.values()):
+                self._create(table, columns, key)
+            self._db.execute('CREATE TABLE IF NOT EXISTS state '
+                             '(NAME TEXT PRIMARY KEY, VALUE TEXT)')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def _create(self, table: str, columns: tuple, key: tuple):
+        """ Creates a table and its indexes if they do not exist. """
+        definitions = ', '.join('{} {}'.format(*column) for column in columns)
+        self._db.execute(
+            'CREATE TABLE IF NOT EXISTS {} ({}, FETCHED REAL, DATA TEXT, '
+            'PRIMARY KEY ({}))'.format(table, definitions, ', '.join(key)))
+        for name, _ in columns:
+            if name != key[0]:
+                self._db.execute(
+                    'CREATE INDEX IF NOT EXISTS {0}_{1} ON {0} ({1})'.format(
+                        table, name))
+
+    def close(self):
+        """ Closes the database. """
+        with self._lock:
+            self._db.close()
+
+    def upsert(self, records: list, request_class: str = 'tle'):
+        """ Stores records, replacing any stored copies.
+
+        Args:
+            records: list of record dicts, as returned by space-track.org in
+                the 'json' format.
+
+        Kwargs:
+            request_class: the class the records were queried from: 'tle',
+                'tle_latest' or 'satcat'. Default is 'tle'.
+
+        Raises:
+            KeyError: if the store does not keep records of the class.
+
+        """
+        table, columns, _ = self._table(request_class)
+        fetched = time.time()
+        rows = []
+        for record in records:
+            values = [_epoch_key(record) if name == 'EPOCH'
+                      else _cast(record.get(name), sql_type)
+                      for name, sql_type in columns]
+            rows.append(values + [fetched, json.dumps(record)])
+        names = [name for name, _ in columns] + ['FETCHED', 'DATA']
+        sql = 'INSERT OR REPLACE INTO {} ({}) VALUES ({})'.format(
+            table, ', '.join(names), ', '.join('?' * len(names)))
+        with self._lock, self._db:
+            self._db.executemany(sql, rows)
+
+    def find(self, request_class: str = 'tle_latest', max_age: float = None,
+             **criteria) -> list:
+        """ Returns the stored records matching some criteria.
+
+        Each keyword argument names an indexed column, in lower case as for
+        SpaceTrackClient.build_query, and gives either a value to match, a
+        (low, high) tuple for an inclusive range in which either bound may be
+        None, or a list or set of values to match any of::
+
+            >> store.find('tle_latest', inclination=(97., 99.),
+            ..            object_type='PAYLOAD')
+            >> store.find('tle', norad_cat_id=25544,
+            ..            epoch=('2018-01-01', '2018-02-01'))
+
+        Kwargs:
+            request_class: 'tle' for every stored element set, 'tle_latest'
+                for the latest one of each object, or 'satcat'. Default is
+                'tle_latest'.
+            max_age: ignore records stored more than this many seconds ago,
+                or None to keep all of them. Default is None.
+
+        Returns:
+            List of record dicts, ordered by NORAD_CAT_ID and then EPOCH.
+
+        Raises:
+            KeyError: if a criterion does not name an indexed column.
+
+        """
+        table, columns, key = self._table(request_class)
+        known = {name for name, _ in columns}
+        clauses = []
+        params = []
+        if request_class == 'tle_latest':
+            clauses.append('EPOCH = (SELECT MAX(EPOCH) FROM elset AS latest '
+                           'WHERE latest.NORAD_CAT_ID = elset.NORAD_CAT_ID)')
+        if max_age is not None:
+            clauses.append('FETCHED >= ?')
+            params.append(time.time() - max_age)
+        for name, value in criteria.items():
+            column = name.upper()
+            if column not in known:
+                raise KeyError('{} is not an indexed column of {}!'.format(
+                    name, request_class))
+            if isinstance(value, tuple):
+                low, high = value
+                if low is not None:
+                    clauses.append('{} >= ?'.format(column))
+                    params.append(low)
+                if high is not None:
+                    clauses.append('{} <= ?'.format(column))
+                    params.append(high)
+            elif isinstance(value, (list, set, frozenset)):
+                clauses.append('{} IN ({})'.format(
+                    column, ', '.join('?' * len(value))))
+                params.extend(value)
+            else:
+                clauses.append('{} = ?'.format(column))
+                params.append(value)
+        sql = 'SELECT DATA FROM {}'.format(table)
+        if clauses:
+            sql += ' WHERE ' + ' AND '.join(clauses)
+        sql += ' ORDER BY ' + ', '.join(key)
+        with self._lock:
+            rows = self._db.execute(sql, params).fetchall()
+        return [json.loads(data) for data, in rows]
+
+    def get(self, request_class: str, norad_cat_ids,
+            max_age: float = None) -> dict:
+        """ Looks up records by catalog ID.
+
+        Args:
+            request_class: 'tle_latest' or 'satcat'.
+            norad_cat_ids: iterable of catalog IDs.
+
+        Kwargs:
+            max_age: ignore records stored more than this many seconds ago,
+                or None to keep all of them. Default is None.
+
+        Returns:
+            Dict mapping each catalog ID found to its record. IDs with no
+            stored record are left out.
+
+        """
+        ids = sorted({int(norad_id) for norad_id in norad_cat_ids})
+        found = {}
+        # Stay well below SQLite's limit on the number of bound parameters.
+        for start in range(0, len(ids), 500):
+            for row in self.find(request_class, max_age=max_age,
+                                 norad_cat_id=ids[start:start + 500]):
+                found[int(row['NORAD_CAT_ID'])] = row
+        return found
+
+    def records(self, request_class: str = 'tle'):
+        """ Yields every stored record of a class, ordered by its key. """
+        yield from self.find(request_class)
+
+    def get_state(self, name: str):
+        """ Returns a stored state value, or None if it was never set. """
+        with self._lock:
+            row = self._db.execute('SELECT VALUE FROM state WHERE NAME = ?',
+                                   (name,)).fetchone()
+        return None if row is None else json.loads(row[0])
+
+    def set_state(self, name: str, value):
+        """ Stores a JSON-serializable state value. """
+        with self._lock, self._db:
+            self._db.execute('INSERT OR REPLACE INTO state VALUES (?, ?)',
+                             (name, json.dumps(value)))
+
+    def to_parquet(self, path: str, request_class: str = 'tle', **criteria):
+        """ Writes stored records to a Parquet file.
+
+        Indexed columns are written with their numeric types, and every other
+        field as a string.
+
+        Args:
+            path: path of the Parquet file to write.
+
+        Kwargs:
+            request_class: the records to export, as for find. Default is
+                'tle'.
+
+        Any other keyword arguments select records, as for find.
+
+        Raises:
+            ImportError: if pyarrow is not installed.
+
+        """
+        if pyarrow is None:
+            raise ImportError('to_parquet requires pyarrow. Install it with '
+                              'pip install pyarrow.')
+        _, columns, _ = self._table(request_class)
+        rows = self.find(request_class, **criteria)
+        for row in rows:
+            for name, sql_type in columns:
+                if name != 'EPOCH':
+                    row[name] = _cast(row.get(name), sql_type)
+        pyarrow.parquet.write_table(pyarrow.Table.from_pylist(rows), path)
+
+    @staticmethod
+    def _table(request_class: str) -> tuple:
+        """ Returns the table, columns and key used for a request class. """
+        try:
+            return TABLES[request_class]
+        except KeyError:
+            raise KeyError('The store does not keep {} records!'.format(
+                request_class))
@@ -0,0 +1,179 @@
+""" Keeps a local mirror of the TLE catalog up to date.
+
+Every element set on space-track.org carries a FILE number, which increases
+each time space-track.org publishes a new batch of element sets. A TleSync
+remembers the highest FILE number it has seen, and each run asks only for
+element sets with a higher one, so a steady-state refresh downloads only what
+is new::
+
+    import spacetracktool as st
+    from spacetracktool.sync import JsonLinesStore, TleSync
+
+    client = st.SpaceTrackClient('username', 'password', persistent=True)
+    sync = TleSync(client, JsonLinesStore('catalog.jsonl'))
+    sync.run()  # the first run pulls the latest element set of every object
+    sync.run()  # later runs pull only newer element sets
+
+The store may be any object with upsert(records), get_state(name) and
+set_state(name, value) methods, such as the JsonLinesStore below or an indexed
+spacetracktool.store.CatalogStore.
+
+"""
+
+
+import json
+import os
+import tempfile
+
+
+def _record_key(record: dict) -> tuple:
+    """ Returns the key identifying an element set in a JsonLinesStore. """
+    return (str(record.get('NORAD_CAT_ID')), str(record.get('FILE')),
+            str(record.get('EPOCH')))
+
+
+class JsonLinesStore:
+    """ Minimal local store that appends records to a JSON-lines file.
+
+    Element sets are keyed by NORAD_CAT_ID, FILE and EPOCH, and one already in
+    the file is not written again, so a sync interrupted before it recorded
+    its high-water mark may safely fetch the same element sets again. Sync
+    state, such as the high-water mark, is kept in a small JSON file next to
+    the records.
+
+    Args:
+        path: path of the JSON-lines file holding the records.
+
+    """
+
+    def __init__(self, path: str):
+        self._path = os.path.abspath(os.path.expanduser(path))
+        self._state_path = self._path + '.state.json'
+        self._keys = None  # keys of the stored records, read on first upsert
+
+    def upsert(self, records: list):
+        """ Appends the records not already in the store.
+
+        Args:
+            records: list of record dicts.
+
+        """
+        if self._keys is None:
+            self._keys = {_record_key(record) for record in self.records()}
+        with open(self._path, 'a') as store_file:
+            for record in records:
+                key = _record_key(record)
+                if key not in self._keys:
+                    self._keys.add(key)
+                    store_file.write(json.dumps(record) + '\n')
+
+    def records(self):
+        """ Yields every stored record, oldest first. """
+        if not os.path.exists(self._path):
+            return
+        with open(self._path) as store_file:
+            for line in store_file:
+                if line.strip():
+                    yield json.loads(line)
+
+    def _read_state(self) -> dict:
+        """ Returns the whole state dict. """
+        try:
+            with open(self._state_path) as state_file:
+                return json.load(state_file)
+        except FileNotFoundError:
+            return {}
+
+    def get_state(self, name: str):
+        """ Returns a stored state value, or None if it was never set. """
+        return self._read_state().get(name)
+
+    def set_state(self, name: str, value):
+        """ Atomically stores a JSON-serializable state value. """
+        state = self._read_state()
+        state[name] = value
+        directory = os.path.dirname(self._state_path)
+        handle, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        with os.fdopen(handle, 'w') as state_file:
+            json.dump(state, state_file)
+        os.replace(tmp_path, self._state_path)
+
+
+class TleSync:
+    """ Fetches only element sets newer than the last one seen.
+
+    Args:
+        client: a SpaceTrackClient using the 'json' format.
+        store: where to merge the fetched element sets.
+
+    Kwargs:
+        batch_size: the number of records handed to the store at a time.
+            Default is 1000.
+
+    Any other keyword arguments are added to every query, as for
+    SpaceTrackClient.build_query, to mirror only part of the catalog (for
+    example object_type='PAYLOAD').
+
+    Raises:
+        ValueError: if the client's format is not 'json'.
+
+    """
+    state_key = 'tle_file'  # name of the high-water mark in the store
+
+    def __init__(self, client, store, batch_size: int = 1000, **kwargs):
+        if client.fmt != 'json':
+            raise ValueError("TleSync requires a client using the 'json' "
+                             "format!")
+        self._client = client
+        self._store = store
+        self._batch_size = batch_size
+        self._predicates = kwargs
+
+    @property
+    def high_water_mark(self) -> int:
+        """ Returns the highest FILE number synced so far, or None. """
+        return self._store.get_state(self.state_key)
+
+    def build_query(self):
+        """ Builds the query for the next run.
+
+        Returns:
+            A tle_latest query for the first run, otherwise a tle query for
+            element sets with a FILE number above the high-water mark.
+
+        """
+        mark = self.high_water_mark
+        if mark is None:
+            return self._client.build_query('tle_latest', ordinal=1,
+                                            **self._predicates)
+        return self._client.build_query('tle', file='>{}'.format(mark),
+                                        **self._predicates)
+
+    def run(self) -> int:
+        """ Fetches new element sets and merges them into the store.
+
+        The high-water mark is only advanced once every record of the run has
+        been stored, so a failed run is simply repeated by the next one.
+
+        Returns:
+            The number of element sets fetched.
+
+        """
+        mark = self.high_water_mark
+        batch = []
+        count = 0
+        for record in self._client.submit(self.build_query(), stream=True):
+            file_number = record.get('FILE')
+            if file_number is not None:
+                mark = max(int(file_number), mark or 0)
+            batch.append(record)
+            if len(batch) >= self._batch_size:
+                self._store.upsert(batch)
+                count += len(batch)
+                batch = []
+        if batch:
+            self._store.upsert(batch)
+            count += len(batch)
+        if mark is not None:
+            self._store.set_state(self.state_key, mark)
+        return count
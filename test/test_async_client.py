@@ -0,0 +1,243 @@
+import asyncio
+import gzip
+import os
+import tempfile
+import unittest
+import requests
+from .. import spacetracktool as st
+from ..spacetracktool import asyncclient
+from .test_ratelimit import FakeClock
+
+try:
+    from aiohttp import web
+except ImportError:
+    web = None
+
+
+@unittest.skipIf(web is None, 'aiohttp is not installed')
+class TestAsyncSpaceTrackClient(unittest.TestCase):
+    """ Tests the AsyncSpaceTrackClient against a local aiohttp server. """
+
+    def setUp(self):
+        self.logins = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.broken = False  # reject the cookie, then the login
+        self.data = bytes(range(256)) * 4
+        self.drop_after = None  # bytes of the body sent before dropping
+        self.ranges = []
+
+    async def _login(self, request):
+        if self.broken:
+            return web.Response(status=500)
+        self.logins += 1
+        response = web.Response(text='""')
+        response.set_cookie('chocolatechip', 'yum')
+        return response
+
+    async def _logout(self, request):
+        return web.Response(text='""')
+
+    async def _query(self, request):
+        if 'chocolatechip' not in request.cookies or self.broken:
+            return web.Response(status=401)
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        await asyncio.sleep(0.01)
+        self.in_flight -= 1
+        parts = request.path.split('/')
+        ids = parts[parts.index('NORAD_CAT_ID') + 1].split(',') \
+            if 'NORAD_CAT_ID' in parts else ['']
+        return web.json_response([{'PATH': request.path, 'NORAD_CAT_ID': i}
+                                  for i in ids])
+
+    async def _download(self, request):
+        if 'chocolatechip' not in request.cookies:
+            return web.Response(status=401)
+        self.ranges.append(request.headers.get('Range'))
+        offset, status = 0, 200
+        if 'Range' in request.headers:
+            offset = int(request.headers['Range'][6:-1])
+            status = 206
+        body = self.data[offset:]
+        response = web.StreamResponse(status=status)
+        response.content_length = len(body)
+        await response.prepare(request)
+        if self.drop_after is not None:
+            await response.write(body[:self.drop_after])
+            self.drop_after = None
+            request.transport.close()
+            return response
+        await response.write(body)
+        await response.write_eof()
+        return response
+
+    async def _run(self, coro_fn, **kwargs):
+        app = web.Application()
+        app.router.add_post('/ajaxauth/login', self._login)
+        app.router.add_post('/ajaxauth/logout', self._logout)
+        app.router.add_get('/basicspacedata/query/class/tle/{tail:.*}',
+                           self._download)
+        app.router.add_get('/{tail:.*}', self._query)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, '127.0.0.1', 0)
+        await site.start()
+        port = runner.addresses[0][1]
+        base = 'http://127.0.0.1:{}'.format(port)
+
+        class LocalClient(st.AsyncSpaceTrackClient):
+            _base = base
+            _login_url = base + '/ajaxauth/login'
+            _logout_url = base + '/ajaxauth/logout'
+
+        try:
+            async with LocalClient('user', 'pass', max_concurrency=4,
+                                   **kwargs) as client:
+                return await coro_fn(client)
+        finally:
+            await runner.cleanup()
+
+    def test_gather(self):
+        async def work(client):
+            return await client.gather(
+                *(client.tle_latest_query(norad_cat_id=i) for i in range(20)),
+                concurrency=3)
+
+        results = asyncio.run(self._run(work))
+        self.assertEqual(len(results), 20, 'gather lost results!')
+        self.assertEqual(results[7].json()[0]['PATH'],
+                         '/basicspacedata/query/class/tle_latest/NORAD_CAT_ID/7/format/json',
+                         'results were not returned in query order!')
+        self.assertEqual(self.logins, 1, 'client logged in more than once!')
+        self.assertLessEqual(self.max_in_flight, 3,
+                             'gather did not respect its concurrency cap!')
+        self.assertGreater(self.max_in_flight, 1,
+                           'gather did not run queries concurrently!')
+
+    def test_hooks(self):
+        events = []
+
+        async def work(client):
+            await client.tle_latest_query(norad_cat_id=1)
+            await client.tle_latest_query(norad_cat_id=2)
+
+        asyncio.run(self._run(work, hooks=[events.append]))
+        self.assertEqual([event.status for event in events], [200, 200],
+                         'hooks were not called once per query!')
+        self.assertGreater(events[0].login, 0., 'login was not timed!')
+        for event in events:
+            self.assertIsNotNone(event.connect, 'connect was not timed!')
+            self.assertIsNotNone(event.ttfb, 'ttfb was not timed!')
+
+    def test_failed_trial_login(self):
+        clock = FakeClock()
+        breaker = st.CircuitBreaker(failure_threshold=1, reset_timeout=30.,
+                                    clock=clock)
+        states = []
+
+        async def work(client):
+            await client.tle_latest_query(norad_cat_id=1)
+            breaker.record_failure()
+            clock.now, self.broken = 31., True
+            with self.assertRaises(requests.exceptions.HTTPError,
+                                   msg='rejected login did not raise!'):
+                await client.tle_latest_query(norad_cat_id=1)
+            states.append(breaker.state)
+            clock.now, self.broken = 62., False
+            return await client.tle_latest_query(norad_cat_id=1)
+
+        result = asyncio.run(self._run(work, retry=None,
+                                       circuit_breaker=breaker))
+        self.assertEqual(states, ['open'],
+                         'failed trial did not open the circuit!')
+        self.assertTrue(result.ok, 'circuit stayed open after a failed trial!')
+
+    def test_records_and_lookup(self):
+        async def work(client):
+            records = await client.records(
+                client.build_query('tle_latest', norad_cat_id=3))
+            batch = await client.batch_query('satcat', [1, 2, 5],
+                                             max_url_length=90)
+            found = await client.lookup('satcat', [5, 9])
+            return records, batch, found
+
+        records, batch, found = asyncio.run(self._run(work))
+        self.assertEqual([record.norad_cat_id for record in records], [3],
+                         'records were not parsed!')
+        self.assertEqual(sorted(record['NORAD_CAT_ID'] for record in batch),
+                         ['1', '2', '5'], 'batch lost records!')
+        self.assertEqual(sorted(found), [5, 9], 'lookup lost records!')
+
+    def _download_to(self, path, drop_after=None, **kwargs):
+        self.drop_after = drop_after
+
+        async def work(client):
+            return await client.submit_to_file(
+                path, client.build_query('tle', norad_cat_id=1),
+                chunk_size=100, **kwargs)
+
+        return asyncio.run(self._run(
+            work, retry=st.RetryPolicy(backoff=0., budget=None)))
+
+    def _read(self, path):
+        with open(path, 'rb') as result:
+            return result.read()
+
+    def test_submit_to_file(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        path = os.path.join(tmp.name, 'tle.json')
+        res = self._download_to(path)
+        self.assertEqual(self._read(path), self.data,
+                         'file content was wrong!')
+        self.assertFalse(os.path.exists(path + '.part'),
+                         'partial file was left behind!')
+        self.assertEqual(res.bytes_received, len(self.data),
+                         'received bytes were not counted!')
+        self._download_to(path, compress=True)
+        self.assertEqual(gzip.decompress(self._read(path)), self.data,
+                         'body was not compressed!')
+
+    def test_submit_to_file_resumes(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        path = os.path.join(tmp.name, 'tle.json')
+        res = self._download_to(path, drop_after=400)
+        self.assertEqual(self._read(path), self.data,
+                         'resumed file content was wrong!')
+        self.assertEqual(self.ranges, [None, 'bytes=400-'],
+                         'download did not resume where it stopped!')
+        self.assertEqual(res.retries, 1, 'resume was not counted!')
+        os.remove(path)
+        with self.assertRaises(asyncclient.aiohttp.ClientPayloadError,
+                               msg='dropped connection was ignored!'):
+            self._download_to(path, drop_after=400, resume=False)
+        self.assertFalse(os.path.exists(path),
+                         'partial download was renamed into place!')
+
+    def test_sync_context_manager(self):
+        client = st.AsyncSpaceTrackClient('user', 'pass')
+        with self.assertRaisesRegex(TypeError, 'async with',
+                                    msg='sync with did not fail clearly!'):
+            with client:
+                pass
+
+    def test_max_concurrency(self):
+        async def work(client):
+            return await client.gather(
+                *(client.satcat_query(norad_cat_id=i) for i in range(20)))
+
+        asyncio.run(self._run(work))
+        self.assertLessEqual(self.max_in_flight, 4,
+                             'client did not respect max_concurrency!')
+
+    def test_missing_aiohttp(self):
+        aiohttp = asyncclient.aiohttp
+        asyncclient.aiohttp = None
+        try:
+            with self.assertRaisesRegex(ImportError, 'requires aiohttp',
+                                        msg='missing aiohttp was not reported!'):
+                st.AsyncSpaceTrackClient('user', 'pass')
+        finally:
+            asyncclient.aiohttp = aiohttp
@@ -0,0 +1,114 @@
+import os
+import shutil
+import tempfile
+import unittest
+import zlib
+from unittest import mock
+from .. import spacetracktool as st
+from ..spacetracktool import cache
+from .test_space_track_client import _response
+
+TLE_URL = 'https://www.space-track.org/basicspacedata/query/class/tle/NORAD_CAT_ID/1/format/json'
+SATCAT_URL = 'https://www.space-track.org/basicspacedata/query/class/satcat/NORAD_CAT_ID/1/format/json'
+
+
+class FakeClock:
+    """ Manually advanced clock for expiring entries. """
+
+    def __init__(self):
+        self.now = 1000.
+
+    def __call__(self):
+        return self.now
+
+
+class TestResponseCache(unittest.TestCase):
+    """ Tests the ResponseCache class of the cache module. """
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+
+    def test_request_class_of(self):
+        self.assertEqual(cache.request_class_of(TLE_URL), 'tle',
+                         'request class was not found in URL!')
+        self.assertIsNone(cache.request_class_of('https://example.com/'),
+                          'URL without a class returned one!')
+
+    def test_ttl_per_class(self):
+        rcache = cache.ResponseCache(ttls={'tle': 10., 'satcat': 100.},
+                                     clock=self.clock)
+        rcache.put(TLE_URL, b'[1]')
+        rcache.put(SATCAT_URL, b'[2]')
+        self.clock.now += 50.
+        self.assertIsNone(rcache.get(TLE_URL), 'expired entry was returned!')
+        self.assertEqual(rcache.get(SATCAT_URL), (b'[2]', {}),
+                         'fresh entry was not returned!')
+        self.assertEqual((rcache.hits, rcache.misses), (1, 1),
+                         'hit/miss counters were wrong!')
+
+    def test_lru_eviction(self):
+        rcache = cache.ResponseCache(max_entries=2, max_bytes=10,
+                                     clock=self.clock)
+        rcache.put('a/class/tle/', b'1234')
+        rcache.put('b/class/tle/', b'1234')
+        rcache.get('a/class/tle/')  # a is now most recently used
+        rcache.put('c/class/tle/', b'1234')
+        self.assertIsNone(rcache.get('b/class/tle/'),
+                          'least recently used entry was not evicted!')
+        self.assertIsNotNone(rcache.get('a/class/tle/'),
+                             'recently used entry was evicted!')
+        rcache.put('d/class/tle/', b'12345678')
+        self.assertLessEqual(rcache.stats['bytes'], 10,
+                             'cache grew past max_bytes!')
+
+    def test_shared_directory(self):
+        writer = cache.ResponseCache(directory=self.directory,
+                                     clock=self.clock)
+        reader = cache.ResponseCache(directory=self.directory,
+                                     clock=self.clock)
+        content = b'[' + b'{"A": "1"},' * 100 + b'{}]'
+        writer.put(TLE_URL, content, {'Content-Type': 'application/json'})
+        self.assertEqual(reader.get(TLE_URL),
+                         (content, {'Content-Type': 'application/json'}),
+                         'entry was not shared through the directory!')
+        files = os.listdir(self.directory)
+        self.assertEqual(len(files), 1, 'unexpected files in directory!')
+        with open(os.path.join(self.directory, files[0]), 'rb') as entry:
+            stored = entry.read().split(b'\n', 1)[1]
+        self.assertEqual(zlib.decompress(stored), content,
+                         'entry was not stored compressed!')
+        self.clock.now += 10 ** 6
+        self.assertIsNone(reader.get(TLE_URL), 'expired entry was returned!')
+        self.assertEqual(os.listdir(self.directory), [],
+                         'expired entry was not removed from disk!')
+
+    def test_max_disk_bytes(self):
+        rcache = cache.ResponseCache(directory=self.directory, compress=False,
+                                     max_disk_bytes=1000, clock=self.clock)
+        for i in range(10):
+            rcache.put('{}/class/tle/'.format(i), b'x' * 300)
+        total = sum(os.path.getsize(os.path.join(self.directory, name))
+                    for name in os.listdir(self.directory))
+        self.assertLessEqual(total, 1000, 'directory grew past its limit!')
+
+    @mock.patch('requests.Session')
+    def test_client_cache(self, session_cls):
+        session = session_cls.return_value
+        session.post.return_value = _response(text='""')
+        res = _response(text='[]')
+        res.content = b'[]'
+        res.headers = {'Content-Type': 'application/json'}
+        session.get.return_value = res
+        client = st.SpaceTrackClient('user', 'pass', persistent=True,
+                                     rate_limit=False, cache=True)
+        first = client.tle_query(norad_cat_id=1)
+        second = client.tle_query(norad_cat_id=1)
+        self.assertEqual(session.get.call_count, 1,
+                         'repeated query was not served from the cache!')
+        self.assertFalse(first.from_cache, 'first query came from cache!')
+        self.assertTrue(second.from_cache, 'second query missed the cache!')
+        self.assertEqual(second.json(), [], 'cached content was changed!')
+        self.assertEqual(list(client.submit(TLE_URL, stream=True)), [],
+                         'cached content could not be streamed!')
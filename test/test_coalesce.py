@@ -0,0 +1,95 @@
+import threading
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+from .. import spacetracktool as st
+from ..spacetracktool import coalesce
+from .test_space_track_client import _response
+
+
+class TestSingleFlight(unittest.TestCase):
+    """ Tests the SingleFlight class of the coalesce module. """
+
+    def test_shares_calls_in_flight(self):
+        flight = coalesce.SingleFlight()
+        release = threading.Event()
+        calls = []
+
+        def fetch():
+            calls.append(1)
+            release.wait(5.)
+            return 'result'
+
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            futures = [pool.submit(flight.do, 'url', fetch) for _ in range(4)]
+            while flight.shared < 3:
+                time.sleep(0.001)
+            release.set()
+            results = [future.result() for future in futures]
+        self.assertEqual(results, ['result'] * 4, 'result was not shared!')
+        self.assertEqual(len(calls), 1, 'identical calls were not merged!')
+        self.assertEqual(flight.do('url', lambda: 'again'), 'again',
+                         'finished call was reused!')
+
+    def test_shares_exceptions(self):
+        flight = coalesce.SingleFlight()
+        with self.assertRaises(KeyError, msg='exception was swallowed!'):
+            flight.do('url', {}.__getitem__, 'missing')
+
+    @mock.patch('requests.Session')
+    def test_client_coalesce(self, session_cls):
+        session = session_cls.return_value
+        session.post.return_value = _response(text='""')
+        release = threading.Event()
+
+        def get(url, **kwargs):
+            release.wait(5.)
+            return _response(text='[]')
+
+        session.get.side_effect = get
+        client = st.SpaceTrackClient('user', 'pass', persistent=True,
+                                     rate_limit=False, coalesce=True)
+        with ThreadPoolExecutor(max_workers=3) as pool:
+            futures = [pool.submit(client.satcat_query, norad_cat_id=1)
+                       for _ in range(3)]
+            while client._single_flight.shared < 2:
+                time.sleep(0.001)
+            release.set()
+            results = [future.result() for future in futures]
+        self.assertEqual(session.get.call_count, 1,
+                         'identical queries were not coalesced!')
+        self.assertIs(results[0], results[2], 'response was not shared!')
+
+
+class TestQueryBatcher(unittest.TestCase):
+    """ Tests the QueryBatcher class of the coalesce module. """
+
+    def setUp(self):
+        self.client = st.SpaceTrackClient('user', 'pass', rate_limit=False)
+        patcher = mock.patch.object(
+            self.client, 'batch_query',
+            side_effect=lambda request_class, ids, key, **kwargs: [
+                {'NORAD_CAT_ID': str(i), 'ORDINAL': '1'} for i in ids])
+        self.batch_query = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_batches_window(self):
+        batcher = coalesce.QueryBatcher(self.client, window=0.05)
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            results = list(pool.map(
+                lambda i: batcher.get('tle_latest', i, ordinal=1), range(8)))
+        self.assertEqual(self.batch_query.call_count, 1,
+                         'queries were not merged into one request!')
+        self.assertEqual(sorted(self.batch_query.call_args[0][1]),
+                         list(range(8)), 'batch lost an ID!')
+        self.assertEqual([rows[0]['NORAD_CAT_ID'] for rows in results],
+                         [str(i) for i in range(8)],
+                         'records were not split back out to callers!')
+
+    def test_max_batch(self):
+        batcher = coalesce.QueryBatcher(self.client, window=60.,
+                                        max_batch=1)
+        self.assertEqual(batcher.get('satcat', 5),
+                         [{'NORAD_CAT_ID': '5', 'ORDINAL': '1'}],
+                         'full batch was not sent at once!')
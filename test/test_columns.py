@@ -0,0 +1,67 @@
+import json
+import unittest
+from unittest import mock
+from .. import spacetracktool as st
+from ..spacetracktool import columns, records
+from .test_parsers import TLE
+from .test_records import ROW
+from .test_space_track_client import _response
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+@unittest.skipIf(np is None, 'numpy is not installed')
+class TestColumns(unittest.TestCase):
+    """ Tests the structured-array conversions of the columns module. """
+
+    def test_from_tle(self):
+        array = columns.from_tle(TLE.replace('\n', '\r\n'))
+        self.assertEqual(array.dtype, np.dtype(columns.ELEMENT_DTYPE),
+                         'wrong dtype!')
+        self.assertEqual(list(array['norad_cat_id']), [25544, 1],
+                         'catalog numbers were not parsed!')
+        expected = list(records.parse_tle(TLE))
+        for name, _ in columns.ELEMENT_DTYPE:
+            if name == 'epoch':
+                continue
+            for value, record in zip(array[name], expected):
+                self.assertAlmostEqual(value, getattr(record, name),
+                                       msg='{} differs from TleRecord!'
+                                       .format(name))
+        self.assertEqual(array['epoch'][0],
+                         np.datetime64('2018-01-01T12:00:00'),
+                         'epoch was not parsed!')
+        with self.assertRaisesRegex(ValueError, 'incomplete',
+                                    msg='truncated TLE was accepted!'):
+            columns.from_tle(TLE[:-70])
+
+    def test_from_response_json(self):
+        row = dict(ROW, EPOCH_MICROSECONDS='500000')
+        array = columns.from_response(json.dumps([row, {}]).encode(), 'json')
+        self.assertEqual(array['norad_cat_id'][0], 25544,
+                         'ID was not converted!')
+        self.assertEqual(array['epoch'][0],
+                         np.datetime64('2018-01-01T12:00:00.5'),
+                         'epoch was not converted!')
+        self.assertTrue(np.isnat(array['epoch'][1]),
+                        'missing epoch was not NaT!')
+        self.assertTrue(np.isnan(array['inclination'][1]),
+                        'missing element was not NaN!')
+        dict_columns = columns.to_columns(array)
+        self.assertEqual(dict_columns['inclination'][0], 51.6415,
+                         'column dict was wrong!')
+
+    @mock.patch('requests.Session')
+    def test_client_columns(self, session_cls):
+        session = session_cls.return_value
+        session.post.return_value = _response(text='""')
+        res = _response()
+        res.content = TLE.encode()
+        session.get.return_value = res
+        client = st.SpaceTrackClient('user', 'pass', fmt='3le',
+                                     persistent=True, rate_limit=False)
+        array = client.columns(client.build_query('tle_latest', ordinal=1))
+        self.assertEqual(len(array), 2, 'client did not return columns!')
@@ -0,0 +1,191 @@
+import os
+import tempfile
+import threading
+import unittest
+from unittest import mock
+import requests
+from .. import spacetracktool as st
+from ..spacetracktool import coordination
+from .test_space_track_client import _response
+
+
+class _CoordinatorTests:
+    """ Tests shared by every coordination backend. """
+
+    def make(self):
+        """ Returns a new coordinator sharing state with the others. """
+        raise NotImplementedError
+
+    def make_lapsing(self) -> tuple:
+        """ Returns two coordinators sharing leases that lapse at once. """
+        raise NotImplementedError
+
+    def test_shared_budget(self):
+        first, second = self.make(), self.make()
+        delays = [first.reserve(), second.reserve(), first.reserve()]
+        self.assertEqual(delays[:2], [0., 0.],
+                         'requests within the limit were delayed!')
+        self.assertGreater(delays[2], 50.,
+                           'clients did not share one budget!')
+
+    def test_shared_login(self):
+        first, second = self.make(), self.make()
+        logins = []
+
+        def login():
+            logins.append(1)
+            return {'chocolatechip': str(len(logins))}
+
+        self.assertEqual(first.login(None, login),
+                         (1, {'chocolatechip': '1'}),
+                         'first login was not published!')
+        self.assertEqual(second.login(None, login),
+                         (1, {'chocolatechip': '1'}),
+                         'published cookie was not shared!')
+        self.assertEqual(second.login(1, login)[0], 2,
+                         'stale cookie was not replaced!')
+        self.assertEqual(first.login(1, login), (2, {'chocolatechip': '2'}),
+                         'replacement cookie was not shared!')
+        self.assertEqual(len(logins), 2, 'clients logged in separately!')
+
+    def test_waits_for_login(self):
+        first, second = self.make(), self.make()
+        started, release = threading.Event(), threading.Event()
+
+        def slow_login():
+            started.set()
+            release.wait(5.)
+            return {'chocolatechip': 'slow'}
+
+        thread = threading.Thread(target=first.login,
+                                  args=(None, slow_login))
+        thread.start()
+        started.wait(5.)
+        threading.Timer(0.05, release.set).start()
+        result = second.login(None, lambda: {'chocolatechip': 'fast'})
+        thread.join()
+        self.assertEqual(result, (1, {'chocolatechip': 'slow'}),
+                         'client did not wait for the login in progress!')
+
+    def test_lapsed_lease(self):
+        old, new = self.make_lapsing()
+        self.assertIs(old._claim(None, 'old'), True, 'lease was not given!')
+        self.assertIs(new._claim(None, 'new'), True,
+                      'lapsed lease was not taken over!')
+        self.assertEqual(new._publish('new', {'a': 'new'}), (1, {'a': 'new'}),
+                         'lease holder could not publish!')
+        self.assertEqual(old._publish('old', {'a': 'old'}), (1, {'a': 'new'}),
+                         'lapsed lease replaced newer cookies!')
+
+    def test_claim_again(self):
+        first = self.make()
+        self.assertIs(first._claim(None, 'token'), True,
+                      'lease was not given!')
+        self.assertIs(first._claim(None, 'token'), True,
+                      'repeated claim lost the lease!')
+
+    def test_failed_login_releases_lease(self):
+        first, second = self.make(), self.make()
+
+        def fail():
+            raise requests.exceptions.HTTPError('Login failed!')
+
+        with self.assertRaises(requests.exceptions.HTTPError,
+                               msg='failed login was swallowed!'):
+            first.login(None, fail)
+        self.assertEqual(second.login(None, lambda: {'a': 'b'}),
+                         (1, {'a': 'b'}), 'failed login kept the lease!')
+
+
+class TestSQLiteCoordinator(_CoordinatorTests, unittest.TestCase):
+    """ Tests the SQLiteCoordinator class of the coordination module. """
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.path = os.path.join(tmp.name, 'coordination.sqlite')
+
+    def make(self):
+        coordinator = coordination.SQLiteCoordinator(
+            self.path, limits=((2, 60.),), poll=0.01)
+        self.addCleanup(coordinator.close)
+        return coordinator
+
+    def make_lapsing(self) -> tuple:
+        coordinators = tuple(coordination.SQLiteCoordinator(
+            self.path, lease_timeout=0.) for _ in range(2))
+        for coordinator in coordinators:
+            self.addCleanup(coordinator.close)
+        return coordinators
+
+    @mock.patch('requests.Session')
+    def test_clients_share_login(self, session_cls):
+        session = session_cls.return_value
+        session.cookies = requests.cookies.RequestsCookieJar()
+
+        def post(url, **kwargs):
+            session.cookies.set('chocolatechip', 'shared')
+            return _response(text='""')
+
+        session.post.side_effect = post
+        session.get.side_effect = lambda url, **kwargs: _response(text='[]')
+        clients = [st.SpaceTrackClient('user', 'pass', persistent=True,
+                                       coordinator=self.make())
+                   for _ in range(2)]
+        for client in clients:
+            client.satcat_query(norad_cat_id=1)
+            client.close()
+        self.assertEqual(session.post.call_count, 1,
+                         'clients did not share one login!')
+        self.assertIs(clients[0]._rate_limiter, clients[0]._coordinator,
+                      'client did not spend from the shared budget!')
+
+
+class TestTCPCoordinator(_CoordinatorTests, unittest.TestCase):
+    """ Tests the TCPCoordinator class of the coordination module. """
+
+    def setUp(self):
+        self.server = coordination.CoordinatorServer(
+            port=0, limits=((2, 60.),)).start()
+        self.addCleanup(self.server.close)
+
+    def make(self):
+        coordinator = coordination.TCPCoordinator(self.server.server_address,
+                                                  poll=0.01)
+        self.addCleanup(coordinator.close)
+        return coordinator
+
+    def make_lapsing(self) -> tuple:
+        server = coordination.CoordinatorServer(port=0,
+                                                lease_timeout=0.).start()
+        self.addCleanup(server.close)
+        coordinators = tuple(coordination.TCPCoordinator(
+            server.server_address) for _ in range(2))
+        for coordinator in coordinators:
+            self.addCleanup(coordinator.close)
+        return coordinators
+
+    def test_does_not_resend_reserve(self):
+        coordinator = self.make()
+        connection = mock.Mock()
+        connection.readline.return_value = b''  # the server hung up
+        with mock.patch.object(coordinator, '_connect',
+                               return_value=connection):
+            with self.assertRaises(ConnectionError,
+                                   msg='lost reserve did not raise!'):
+                coordinator.reserve()
+            self.assertEqual(connection.write.call_count, 1,
+                             'reserve was sent twice!')
+            with self.assertRaises(ConnectionError,
+                                   msg='lost release did not raise!'):
+                coordinator._release('token')
+            self.assertEqual(connection.write.call_count, 3,
+                             'release was not sent again!')
+
+    def test_limits(self):
+        self.assertEqual(self.make().limits, ((2, 60.),),
+                         'server limits were not reported!')
+
+    def test_bad_request(self):
+        with self.assertRaises(ValueError, msg='bad request was accepted!'):
+            self.make()._call('not_an_operation')
@@ -0,0 +1,101 @@
+import random
+import unittest
+from ..spacetracktool import records, store
+from ..spacetracktool.index import OrbitIndex
+from .test_records import ROW
+
+
+def _elset(norad_cat_id, perigee, apogee, inclination=51.6,
+           ra_of_asc_node=0., epoch=None):
+    """ Returns a TleRecord with the given orbital regime. """
+    return records.TleRecord(norad_cat_id=norad_cat_id, perigee=perigee,
+                             apogee=apogee, inclination=inclination,
+                             ra_of_asc_node=ra_of_asc_node, epoch=epoch)
+
+
+class TestOrbitIndex(unittest.TestCase):
+    """ Tests the OrbitIndex class of the index module. """
+
+    def setUp(self):
+        self.index = OrbitIndex([
+            _elset(1, 400., 420., 51.6, 10.),
+            _elset(2, 550., 560., 97.6, 200.),
+            _elset(3, 300., 35000., 27., 355.),
+            _elset(4, 35780., 35790., 0.05, 90.),
+        ])
+
+    def _ids(self, **criteria):
+        return [elset.norad_cat_id for elset in self.index.find(**criteria)]
+
+    def test_altitude(self):
+        self.assertEqual(self._ids(altitude=(500., 600.)), [2, 3],
+                         'wrong shells overlap the range!')
+        self.assertEqual(self._ids(altitude=410.), [1, 3],
+                         'wrong shells pass through the altitude!')
+        self.assertEqual(self._ids(altitude=(35700., None)), [4],
+                         'open range was not matched!')
+
+    def test_angles(self):
+        self.assertEqual(self._ids(inclination=(None, 2.)), [4],
+                         'wrong inclinations matched!')
+        self.assertEqual(self._ids(ra_of_asc_node=(350., 20.)), [1, 3],
+                         'range did not wrap through 360!')
+        self.assertEqual(self._ids(altitude=(35586., 35986.),
+                                   inclination=(None, 2.)), [4],
+                         'criteria were not combined!')
+        self.assertEqual(self._ids(), [1, 2, 3, 4],
+                         'no criteria did not match everything!')
+
+    def test_upsert(self):
+        self.index.upsert([_elset(2, 700., 710.), ROW])
+        self.assertEqual(self._ids(altitude=(500., 600.)), [3],
+                         'replaced shell is still indexed!')
+        self.assertEqual(self._ids(altitude=(700., 700.)), [2, 3],
+                         'new shell was not indexed!')
+        self.assertIn(25544, self.index, 'JSON row was not indexed!')
+        self.index.remove(25544)
+        self.assertEqual(len(self.index), 4, 'object was not removed!')
+        with self.assertRaises(KeyError, msg='missing object was removed!'):
+            self.index.remove(25544)
+
+    def test_keeps_latest(self):
+        new, old = records.TleRecord.from_dict(ROW), dict(ROW)
+        old['EPOCH'], old['INCLINATION'] = '2000-01-01 00:00:00', '10.0'
+        self.index.upsert([new, old])
+        self.assertIs(self.index.get(25544), new,
+                      'older element set replaced a newer one!')
+
+    def test_matches_scan(self):
+        rng = random.Random(0)
+        self.index = OrbitIndex()
+        elsets = {}
+        for step in range(3000):
+            norad_cat_id = rng.randrange(1000)
+            if step % 5 == 0 and norad_cat_id in elsets:
+                self.index.remove(norad_cat_id)
+                del elsets[norad_cat_id]
+                continue
+            perigee = rng.uniform(200., 2000.)
+            elsets[norad_cat_id] = _elset(
+                norad_cat_id, perigee, perigee + rng.expovariate(0.01),
+                rng.uniform(0., 180.), rng.uniform(0., 360.))
+            self.index.upsert([elsets[norad_cat_id]])
+        for _ in range(50):
+            low = rng.uniform(200., 2000.)
+            high = low + rng.uniform(0., 200.)
+            expected = sorted(norad_cat_id for norad_cat_id, elset
+                              in elsets.items()
+                              if elset.perigee <= high and
+                              elset.apogee >= low and
+                              elset.inclination <= 90.)
+            self.assertEqual(self._ids(altitude=(low, high),
+                                       inclination=(None, 90.)), expected,
+                             'index disagrees with a scan!')
+
+    def test_from_store(self):
+        catalog = store.CatalogStore()
+        self.addCleanup(catalog.close)
+        catalog.upsert([ROW])
+        index = OrbitIndex.from_store(catalog)
+        self.assertEqual(len(index.find(altitude=405.)), 1,
+                         'stored element set was not indexed!')
@@ -0,0 +1,119 @@
+import math
+import unittest
+from unittest import mock
+import requests
+from .. import spacetracktool as st
+from ..spacetracktool import instrument
+from ..spacetracktool.spacetrackclient import _make_response
+
+try:
+    import prometheus_client
+except ImportError:
+    prometheus_client = None
+
+
+def _event(**kwargs):
+    """ Builds a RequestEvent with every field defaulted. """
+    fields = dict.fromkeys(instrument.RequestEvent._fields)
+    fields.update(request_class='tle', status=200, total=0.2, retries=0,
+                  from_cache=False)
+    fields.update(kwargs)
+    return instrument.RequestEvent(**fields)
+
+
+class TestInstrument(unittest.TestCase):
+    """ Tests the hooks and collectors of the instrument module. """
+
+    def test_histogram(self):
+        histogram = instrument.Histogram(bounds=(1., 2., 4.))
+        for value in (0.5, 1.5, 1.5, 3.):
+            histogram.observe(value)
+        self.assertEqual(histogram.counts, [1, 2, 1, 0],
+                         'observations went in the wrong buckets!')
+        self.assertEqual(histogram.quantile(0.5), 1.5,
+                         'median was not interpolated in its bucket!')
+        self.assertTrue(math.isnan(instrument.Histogram().quantile(0.5)),
+                        'empty histogram had a quantile!')
+
+    def test_collector(self):
+        collector = instrument.HistogramCollector()
+        collector(_event(ttfb=0.1, response_bytes=100))
+        collector(_event(request_class='satcat', from_cache=True,
+                         response_bytes=50))
+        summary = collector.summary()
+        self.assertEqual(summary['*']['requests'], 2, 'requests were lost!')
+        self.assertEqual(summary['tle']['ttfb']['count'], 1,
+                         'ttfb was not recorded!')
+        self.assertEqual(collector.counters('satcat')['cache_hits'], 1,
+                         'cache hit was not counted!')
+        self.assertEqual(summary['*']['response_bytes'], 150,
+                         'bytes were not summed!')
+        collector(_event(request_class=None))
+        self.assertEqual(collector.counters('unknown')['requests'], 1,
+                         'query of no class was not kept as unknown!')
+        self.assertNotIn(None, collector.summary(),
+                         'query of no class was kept under None!')
+
+    def test_redact(self):
+        self.assertEqual(instrument.redact('https://u:p@host/a/b'),
+                         'https://host/a/b', 'credentials were not removed!')
+
+    @mock.patch('requests.Session')
+    def test_client_events(self, session_cls):
+        session = session_cls.return_value
+        session.post.return_value = _make_response('login', 200, b'""')
+        session.get.side_effect = lambda url, **kwargs: _make_response(
+            url, 200, b'[{"NORAD_CAT_ID": "1"}]',
+            headers={'Content-Length': '23'})
+        events = []
+        client = st.SpaceTrackClient('user', 'pass', persistent=True,
+                                     rate_limit=False, cache=True,
+                                     hooks=[events.append])
+        client.tle_query(norad_cat_id=1)
+        client.tle_query(norad_cat_id=1)
+        list(client.submit(client.build_query('satcat', norad_cat_id=1),
+                           stream=True))
+        self.assertEqual([event.from_cache for event in events],
+                         [False, True, False], 'cache hits were not reported!')
+        first = events[0]
+        self.assertEqual((first.request_class, first.status,
+                          first.response_bytes, first.wire_bytes),
+                         ('tle', 200, 23, 23), 'event fields were wrong!')
+        self.assertIsNotNone(first.login, 'login time was not reported!')
+        self.assertIsNotNone(events[2].download,
+                             'streamed download was not timed!')
+
+    @mock.patch('requests.Session')
+    def test_client_error_event(self, session_cls):
+        session = session_cls.return_value
+        session.post.return_value = _make_response('login', 200, b'""')
+        session.get.side_effect = lambda url, **kwargs: _make_response(
+            url, 500, b'')
+        events = []
+        client = st.SpaceTrackClient('user', 'pass', persistent=True,
+                                     rate_limit=False, retry=None,
+                                     hooks=[events.append])
+        with self.assertRaises(requests.exceptions.HTTPError,
+                               msg='500 did not raise!'):
+            client.tle_query(norad_cat_id=1)
+        self.assertEqual(events[0].status, 500, 'failure was not reported!')
+        self.assertIsNotNone(events[0].error, 'error was not attached!')
+
+    @unittest.skipIf(prometheus_client is None,
+                     'prometheus_client is not installed')
+    def test_prometheus(self):
+        registry = prometheus_client.CollectorRegistry()
+        exporter = instrument.PrometheusExporter(registry=registry)
+        exporter(_event(ttfb=0.1, response_bytes=100, retries=2))
+        value = registry.get_sample_value(
+            'spacetracktool_requests_total',
+            {'request_class': 'tle', 'status': '200', 'cache': 'miss'})
+        self.assertEqual(value, 1., 'request was not counted!')
+        self.assertEqual(registry.get_sample_value(
+            'spacetracktool_retries_total', {'request_class': 'tle'}), 2.,
+                         'retries were not counted!')
+        exporter(_event(request_class=None))
+        self.assertEqual(registry.get_sample_value(
+            'spacetracktool_requests_total',
+            {'request_class': 'unknown', 'status': '200', 'cache': 'miss'}),
+                         1., 'query of no class was not labelled unknown!')
@@ -0,0 +1,95 @@
+import datetime
+import unittest
+from .. import spacetracktool as st
+from ..spacetracktool import offline
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+ROWS = [
+    {'NORAD_CAT_ID': '25544', 'OBJECT_NAME': 'ISS (ZARYA)',
+     'OBJECT_TYPE': 'PAYLOAD', 'EPOCH': '2018-01-02 12:00:00',
+     'INCLINATION': '51.6415', 'DECAY': None},
+    {'NORAD_CAT_ID': '43013', 'OBJECT_NAME': 'NOAA 20',
+     'OBJECT_TYPE': 'PAYLOAD', 'EPOCH': '2018-01-01 06:00:00',
+     'INCLINATION': '98.7', 'DECAY': None},
+    {'NORAD_CAT_ID': '1', 'OBJECT_NAME': 'SL-1 R/B',
+     'OBJECT_TYPE': 'ROCKET BODY', 'EPOCH': '1957-12-01 00:00:00',
+     'INCLINATION': '65.1', 'DECAY': '1957-12-01'},
+]
+
+
+@unittest.skipIf(np is None, 'numpy is not installed')
+class TestRecordTable(unittest.TestCase):
+    """ Tests the RecordTable class of the offline module. """
+
+    def setUp(self):
+        self.client = st.SpaceTrackClient('user', 'pass')
+        self.table = offline.RecordTable(
+            ROWS, clock=lambda: datetime.datetime(2018, 1, 3))
+
+    def select(self, request_class='tle_latest', **kwargs):
+        query = self.client.build_query(request_class, **kwargs)
+        return [row['NORAD_CAT_ID'] for row in self.table.select(query)]
+
+    def test_comparisons(self):
+        self.assertEqual(self.select(inclination='>60'), ['43013', '1'],
+                         'numeric > was not applied!')
+        self.assertEqual(self.select(inclination='97--99'), ['43013'],
+                         'numeric range was not applied!')
+        self.assertEqual(self.select(norad_cat_id='1,25544'), ['25544', '1'],
+                         'list was not applied!')
+        self.assertEqual(self.select(norad_cat_id='<>1'), ['25544', '43013'],
+                         'not-equal was not applied!')
+        self.assertEqual(self.select(epoch='>2018-01-01'), ['25544', '43013'],
+                         'date comparison was not applied!')
+        self.assertEqual(self.select(epoch='>now-1'), ['25544'],
+                         'now offset was not applied!')
+
+    def test_iso_epochs(self):
+        table = offline.RecordTable(
+            [{'EPOCH': '2024-01-01T01:00:00'},
+             {'EPOCH': '2024-01-01T12:00:00'},
+             {'EPOCH': '2024-01-02T00:00:00'}],
+            clock=lambda: datetime.datetime(2024, 1, 2, 12))
+        self.assertEqual(table.mask('EPOCH', '>2024-01-01 12:00:00').tolist(),
+                         [False, False, True],
+                         "'T' epochs were compared as text!")
+        self.assertEqual(table.mask('EPOCH', '>now-1').tolist(),
+                         [False, False, True],
+                         'now offset matched its boundary instant!')
+        self.assertEqual(table.mask('EPOCH', '2024-01-01T12:00:00').tolist(),
+                         [False, True, False],
+                         "'T' predicate value was not matched!")
+
+    def test_text_and_null(self):
+        self.assertEqual(self.select(object_name='~~noaa'), ['43013'],
+                         'contains was not applied!')
+        self.assertEqual(self.select(object_name='^sl-'), ['1'],
+                         'starts-with was not applied!')
+        self.assertEqual(self.select(object_type='payload'),
+                         ['25544', '43013'], 'equality was case sensitive!')
+        self.assertEqual(self.select('satcat', decay=self.client.null),
+                         ['25544', '43013'], 'null-val was not applied!')
+        self.assertEqual(self.select('satcat', decay='<>null-val'), ['1'],
+                         'not-null was not applied!')
+
+    def test_controls(self):
+        self.assertEqual(self.select(orderby='EPOCH desc', limit=2),
+                         ['25544', '43013'], 'orderby or limit was ignored!')
+        self.assertEqual(self.select(orderby='NORAD_CAT_ID', limit='1,1'),
+                         ['25544'], 'numeric order or offset was wrong!')
+        query = self.client.build_query('tle_latest', object_type='PAYLOAD',
+                                        predicates='OBJECT_TYPE',
+                                        distinct='true')
+        self.assertEqual(self.table.select(query.url),
+                         [{'OBJECT_TYPE': 'PAYLOAD'}],
+                         'predicates or distinct were ignored!')
+
+    def test_from_url(self):
+        query = self.client.build_query('tle', norad_cat_id='1--5',
+                                        orderby='EPOCH desc')
+        self.assertEqual(st.Query.from_url(query.url), query,
+                         'URL did not parse back to its query!')
@@ -39,3 +39,19 @@ class TestOperations(unittest.TestCase):
                          'num_greater was not correct!')
         self.assertEqual(num_less, '<2',
                          'num_less was not correct!')
+
+    def test_make_id_list_strings(self):
+        ids = [7, 3, 1, 2, 3, 9, 10, 11, 12, '5']
+        self.assertEqual(ops.make_id_list_strings(ids), ['1--3,5,7,9--12'],
+                         'IDs were not folded into ranges!')
+        self.assertEqual(ops.make_id_list_strings([4, 5]), ['4,5'],
+                         'pair was folded into a range!')
+        chunks = ops.make_id_list_strings(range(0, 1000, 2), max_length=50)
+        self.assertTrue(all(len(c) <= 50 for c in chunks),
+                        'chunk exceeded max_length!')
+        packed = [int(i) for c in chunks for i in c.split(',')]
+        self.assertEqual(packed, list(range(0, 1000, 2)),
+                         'IDs were lost or reordered while chunking!')
+        with self.assertRaisesRegex(ValueError, 'coercable to int',
+                                    msg='bad ID was accepted!'):
+            ops.make_id_list_strings(['abc'])
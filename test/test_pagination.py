@@ -0,0 +1,98 @@
+import datetime
+import json
+import threading
+import unittest
+from unittest import mock
+from .. import spacetracktool as st
+from ..spacetracktool import pagination
+from ..spacetracktool.spacetrackclient import _make_response
+
+START = datetime.datetime(2018, 1, 1)
+
+
+class TestPagination(unittest.TestCase):
+    """ Tests the pagination module against a simulated catalog. """
+
+    def setUp(self):
+        # 500 elsets over 10 days, bunched up on the third day
+        self.rows = []
+        for i in range(500):
+            if 100 <= i < 400:
+                epoch = START + datetime.timedelta(days=2, seconds=i * 60)
+            else:
+                epoch = START + datetime.timedelta(hours=i * 0.48)
+            self.rows.append({'NORAD_CAT_ID': str(i), 'EPOCH':
+                              epoch.strftime('%Y-%m-%d %H:%M:%S.%f')})
+        self.rows.sort(key=lambda r: r['EPOCH'])
+        self.queries = []
+        self.lock = threading.Lock()
+        self.client = st.SpaceTrackClient('user', 'pass', rate_limit=False)
+        patcher = mock.patch.object(self.client, 'submit',
+                                    side_effect=self._submit)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _submit(self, query):
+        with self.lock:
+            self.queries.append(query)
+        predicates = dict(query.predicates)
+        rows = self.rows
+        if 'EPOCH' in predicates:
+            low, high = predicates['EPOCH'].split('--')
+            rows = [r for r in rows if low <= r['EPOCH'] <= high]
+        count, _, offset = predicates['limit'].partition(',')
+        rows = rows[int(offset or 0):int(offset or 0) + int(count)]
+        return _make_response(query.url, 200, json.dumps(rows).encode())
+
+    def test_paginate(self):
+        pages = list(pagination.paginate(self.client, 'tle', page_size=64,
+                                         prefetch=3))
+        self.assertTrue(all(len(p) <= 64 for p in pages), 'page too large!')
+        self.assertEqual([r for p in pages for r in p], self.rows,
+                         'pages lost or repeated records!')
+        orderby = dict(self.queries[0].predicates)['orderby']
+        self.assertEqual(orderby, 'NORAD_CAT_ID asc,EPOCH asc,FILE asc',
+                         'default sort order was not stable!')
+        self.assertLessEqual(len(self.queries), len(pages) + 3,
+                             'too many pages were prefetched!')
+
+    def test_paginate_epochs(self):
+        pages = list(pagination.paginate_epochs(
+            self.client, 'tle', START, START + datetime.timedelta(days=10),
+            window=datetime.timedelta(days=2), max_rows=50,
+            min_window=datetime.timedelta(minutes=30)))
+        self.assertTrue(all(len(p) <= 50 for p in pages), 'page too large!')
+        self.assertEqual([r for p in pages for r in p], self.rows,
+                         'windows lost or repeated records!')
+        sizes = [len(dict(q.predicates).get('EPOCH', '')) for q in self.queries]
+        self.assertTrue(all(sizes), 'window was not limited by epoch!')
+
+    def test_paginate_dense_window(self):
+        pages = list(pagination.paginate_epochs(
+            self.client, 'tle', START, START + datetime.timedelta(days=10),
+            max_rows=5, min_window=datetime.timedelta(hours=1)))
+        self.assertTrue(all(len(p) <= 5 for p in pages), 'page too large!')
+        self.assertEqual(sorted(r['NORAD_CAT_ID'] for p in pages for r in p),
+                         sorted(r['NORAD_CAT_ID'] for r in self.rows),
+                         'dense windows lost or repeated records!')
+
+    def test_paging_keys_replaced(self):
+        pages = list(pagination.paginate_epochs(
+            self.client, 'tle', START, START + datetime.timedelta(days=10),
+            max_rows=5, min_window=datetime.timedelta(hours=1),
+            epoch='>now-30', limit=3))
+        self.assertEqual(len([r for p in pages for r in p]), len(self.rows),
+                         'given epoch or limit was not replaced!')
+
+    def test_epoch_range(self):
+        self.assertEqual(pagination.epoch_range(START, START +
+                                                datetime.timedelta(days=1)),
+                         '2018-01-01 00:00:00.000000--'
+                         '2018-01-01 23:59:59.999999',
+                         'epoch range was not end-exclusive!')
+
+    def test_bad_format(self):
+        client = st.SpaceTrackClient('user', 'pass', fmt='xml')
+        with self.assertRaisesRegex(ValueError, 'Cannot page',
+                                    msg='unpageable format was accepted!'):
+            list(pagination.paginate(client, 'satcat'))
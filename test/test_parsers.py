@@ -0,0 +1,78 @@
+import unittest
+from unittest import mock
+from .. import spacetracktool as st
+from ..spacetracktool import parsers
+from .test_space_track_client import _response
+
+
+def _chunks(text, size):
+    """ Splits text into chunks of the given size. """
+    return [text[i:i + size] for i in range(0, len(text), size)]
+
+
+TLE = ('ISS (ZARYA)\n'
+       '1 25544U 98067A   18001.50000000  .00002182  00000-0  40768-4 0  9997\n'
+       '2 25544  51.6415 254.8361 0003427 275.1843  84.8974 15.54212562 92935\n'
+       'SL-1 R/B\n'
+       '1 00001U 57001A   18001.50000000  .00000000  00000-0  00000-0 0  9999\n'
+       '2 00001  65.1000  90.0000 0050000 100.0000 260.0000 14.00000000   014\n')
+
+
+class TestParsers(unittest.TestCase):
+    """ Tests the incremental parsers of the parsers module. """
+
+    def test_iter_json_array(self):
+        text = '[{"A": "1", "B": "x,]"},\n {"A": "22"}, 3, 45]'
+        for size in range(1, len(text)):
+            self.assertEqual(list(parsers.iter_json_array(_chunks(text, size))),
+                             [{'A': '1', 'B': 'x,]'}, {'A': '22'}, 3, 45],
+                             'JSON array split every {} chars was not '
+                             'parsed!'.format(size))
+        self.assertEqual(list(parsers.iter_json_array(['[', ']'])), [],
+                         'empty array was not parsed!')
+        with self.assertRaisesRegex(ValueError, 'not a JSON array',
+                                    msg='non-array was accepted!'):
+            list(parsers.iter_json_array(['{"error": "x"}']))
+
+    def test_iter_text(self):
+        data = 'ångström'.encode('utf-8')
+        chunks = [data[i:i + 1] for i in range(len(data))]
+        self.assertEqual(''.join(parsers.iter_text(chunks)), 'ångström',
+                         'split multi-byte characters were not decoded!')
+
+    def test_iter_csv(self):
+        text = 'A,B\r\n1,"x\ny"\r\n2,z\r\n'
+        self.assertEqual(list(parsers.iter_csv(_chunks(text, 3))),
+                         [{'A': '1', 'B': 'x\ny'}, {'A': '2', 'B': 'z'}],
+                         'CSV rows were not parsed!')
+
+    def test_iter_tle(self):
+        records = list(parsers.iter_tle(_chunks(TLE, 7), lines_per_record=3))
+        self.assertEqual(len(records), 2, 'wrong number of 3le records!')
+        self.assertEqual(records[1][0], 'SL-1 R/B', 'name line was lost!')
+        with self.assertRaisesRegex(ValueError, 'partway',
+                                    msg='truncated TLE was accepted!'):
+            list(parsers.iter_tle([TLE[:-70]], lines_per_record=3))
+
+    @mock.patch('requests.Session')
+    def test_stream_submit(self, session_cls):
+        session = session_cls.return_value
+        session.post.return_value = _response(text='""')
+        res = _response()
+        res.encoding = None
+        res.iter_content.return_value = iter(_chunks(TLE.encode(), 10))
+        session.get.return_value = res
+        client = st.SpaceTrackClient('user', 'pass', fmt='3le',
+                                     persistent=True, rate_limit=False)
+        query = client.build_query('tle_latest', ordinal=1)
+        records = list(client.submit(query, stream=True))
+        self.assertEqual(records[0][0], 'ISS (ZARYA)',
+                         'streamed records were not parsed!')
+        self.assertTrue(session.get.call_args[1]['stream'],
+                        'response body was not streamed!')
+        res.close.assert_called_once_with()
+        client = st.SpaceTrackClient('user', 'pass', fmt='xml')
+        with self.assertRaisesRegex(ValueError, 'Cannot stream',
+                                    msg='unstreamable format was accepted!'):
+            client.submit(client.build_query('satcat', norad_cat_id=1),
+                          stream=True)
@@ -0,0 +1,57 @@
+import unittest
+from .. import spacetracktool as st
+from ..spacetracktool import columns, propagation
+from .test_parsers import TLE
+from .test_records import ROW
+
+try:
+    import numpy as np
+    from sgp4.api import Satrec
+except ImportError:
+    np = None
+
+
+@unittest.skipIf(np is None, 'numpy or sgp4 is not installed')
+class TestPropagation(unittest.TestCase):
+    """ Tests the propagate function of the propagation module. """
+
+    def setUp(self):
+        self.elements = columns.from_tle(TLE)
+        self.times = np.datetime64('2018-01-01T12:00') + \
+            np.arange(7) * np.timedelta64(15, 'm')
+
+    def test_matches_sgp4(self):
+        ephemeris = propagation.propagate(self.elements, self.times)
+        self.assertEqual(ephemeris.positions.shape, (2, 7, 3),
+                         'result was not objects x times!')
+        lines = TLE.splitlines()
+        whole, fraction = propagation.julian_dates(self.times)
+        for index, (line1, line2) in enumerate([lines[1:3], lines[4:6]]):
+            errors, positions, velocities = Satrec.twoline2rv(
+                line1, line2).sgp4_array(whole, fraction)
+            np.testing.assert_allclose(ephemeris.positions[index], positions,
+                                       atol=1e-3, err_msg='wrong position!')
+            np.testing.assert_allclose(ephemeris.velocities[index],
+                                       velocities, atol=1e-6,
+                                       err_msg='wrong velocity!')
+        self.assertFalse(ephemeris.errors.any(), 'propagation failed!')
+
+    def test_records_and_rows(self):
+        expected = propagation.propagate(self.elements[:1], self.times)
+        for elsets in ([st.records.TleRecord.from_dict(ROW)], [ROW]):
+            ephemeris = propagation.propagate(elsets, self.times)
+            self.assertEqual(ephemeris.norad_cat_id.tolist(), [25544],
+                             'catalog numbers were lost!')
+            np.testing.assert_allclose(ephemeris.positions,
+                                       expected.positions, atol=1e-3,
+                                       err_msg='rows propagated differently!')
+
+    def test_workers(self):
+        expected = propagation.propagate(self.elements, self.times)
+        ephemeris = propagation.propagate(self.elements, self.times,
+                                          workers=2, chunk_size=1)
+        np.testing.assert_array_equal(ephemeris.positions, expected.positions,
+                                      err_msg='workers changed the result!')
+        np.testing.assert_array_equal(ephemeris.velocities,
+                                      expected.velocities,
+                                      err_msg='workers changed the result!')
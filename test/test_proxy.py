@@ -0,0 +1,72 @@
+import unittest
+from unittest import mock
+import requests
+from .. import spacetracktool as st
+from ..spacetracktool import proxy
+from ..spacetracktool.spacetrackclient import _make_response
+
+
+class TestSpaceTrackProxy(unittest.TestCase):
+    """ Tests the SpaceTrackProxy class of the proxy module. """
+
+    def setUp(self):
+        with mock.patch('requests.Session') as session_cls:
+            self.upstream = session_cls.return_value
+            client = proxy.make_client('user', 'pass', rate_limit=False,
+                                       retry=None)
+        self.upstream.post.return_value = _make_response('login', 200, b'""')
+        self.upstream.get.side_effect = self._upstream_get
+        self.proxy = proxy.SpaceTrackProxy(client, port=0).start()
+        self.addCleanup(self.proxy.close)
+
+    @staticmethod
+    def _upstream_get(url, **kwargs):
+        if 'NORAD_CAT_ID/0' in url:
+            return _make_response(url, 400, b'bad query')
+        return _make_response(url, 200, b'[{"NORAD_CAT_ID": "1"}]',
+                              headers={'Content-Type': 'application/json'})
+
+    def test_caches_queries(self):
+        with st.SpaceTrackClient('any', 'thing', persistent=True,
+                                 rate_limit=False,
+                                 base=self.proxy.base) as client:
+            first = client.satcat_query(norad_cat_id=1)
+            second = client.satcat_query(norad_cat_id=1)
+        self.assertEqual(second.json(), [{'NORAD_CAT_ID': '1'}],
+                         'proxy changed the result!')
+        self.assertEqual((first.headers['X-Cache'],
+                          second.headers['X-Cache']), ('MISS', 'HIT'),
+                         'repeated query was not cached!')
+        self.assertEqual(self.upstream.get.call_count, 1,
+                         'repeated query reached space-track.org!')
+        self.assertTrue(self.upstream.get.call_args[0][0].startswith(
+            'https://www.space-track.org/basicspacedata/query/class/satcat/'),
+                        'query was not passed on to space-track.org!')
+
+    def test_credentials_with_query(self):
+        client = st.SpaceTrackClient('any', 'thing', rate_limit=False,
+                                     base=self.proxy.base)
+        self.assertEqual(client.satcat_query(norad_cat_id=1).json(),
+                         [{'NORAD_CAT_ID': '1'}],
+                         'query posted to the login URL was not answered!')
+
+    def test_relays_errors(self):
+        client = st.SpaceTrackClient('any', 'thing', rate_limit=False,
+                                     retry=None, base=self.proxy.base)
+        with self.assertRaisesRegex(requests.exceptions.HTTPError, '400',
+                                    msg='upstream error was not relayed!'):
+            client.satcat_query(norad_cat_id=0)
+
+    def test_equivalent_paths(self):
+        path = '/basicspacedata/query/class/satcat/NORAD_CAT_ID/{}'
+        self.proxy.query(path.format('>1'))
+        status, body, headers = self.proxy.query(path.format('%3E1'))
+        self.assertEqual((status, headers['X-Cache']), (200, 'HIT'),
+                         'percent-encoded path was not decoded!')
+
+    def test_internal_error(self):
+        self.upstream.get.side_effect = ValueError('broken')
+        status, body, _ = self.proxy.query(
+            '/basicspacedata/query/class/satcat/NORAD_CAT_ID/2')
+        self.assertEqual((status, body), (500, b'broken'),
+                         'internal error was not answered with a 500!')
@@ -0,0 +1,122 @@
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+from .. import spacetracktool as st
+from .test_space_track_client import _response
+
+
+class TestQuery(unittest.TestCase):
+    """ Tests the Query class and SpaceTrackClient.build_query. """
+
+    def setUp(self):
+        self.client = st.SpaceTrackClient('user', 'pass')
+
+    def test_build_query(self):
+        query = self.client.build_query('tle', epoch='>2018-01-01',
+                                        norad_cat_id=12345)
+        self.assertIsInstance(query, st.Query, 'build_query returned no Query!')
+        self.assertEqual(query.predicates,
+                         (('NORAD_CAT_ID', '12345'), ('EPOCH', '>2018-01-01')),
+                         'predicates were not in key order!')
+        self.assertEqual(query.url,
+                         'https://www.space-track.org/basicspacedata/query/class/tle/NORAD_CAT_ID/12345/EPOCH/>2018-01-01/format/json',
+                         'Query compiled to the wrong URL!')
+        self.assertEqual(self.client.print_query(), query.url,
+                         'print_query did not show the last built query!')
+
+    def test_immutable(self):
+        query = self.client.build_query('satcat', norad_cat_id=1)
+        with self.assertRaises(AttributeError, msg='Query was mutable!'):
+            query.fmt = 'csv'
+        other = self.client.build_query('satcat', norad_cat_id=2)
+        self.assertIn('NORAD_CAT_ID/1/', query.url,
+                      'building a query changed an earlier one!')
+        self.assertIn('NORAD_CAT_ID/2/', other.url,
+                      'query was not built from its own arguments!')
+
+    def test_compact(self):
+        query = self.client.build_query('tle', norad_cat_id=1)
+        self.assertTrue(query.compact().url.endswith('/format/tle'),
+                        'query was not compacted!')
+        self.assertEqual(query.compact('3le').fmt, '3le',
+                         'compact format was ignored!')
+        satcat = self.client.build_query('satcat', norad_cat_id=1)
+        self.assertIs(satcat.compact(), satcat,
+                      'non-element query was compacted!')
+
+    def test_defaults_and_expanded(self):
+        decay = self.client.build_query('decay', norad_cat_id=1)
+        self.assertIn(('PRECEDENCE', '2'), decay.predicates,
+                      'decay query did not default its precedence!')
+        cdm = self.client.build_query('cdm', cdm_id=1)
+        self.assertEqual(cdm.controller, 'expandedspacedata',
+                         'cdm query used the wrong controller!')
+
+    def test_schema(self):
+        schema = st.query.REQUEST_SCHEMAS['tle_latest']
+        self.assertEqual(schema.predicates({'limit': 5, 'epoch': '>now-1',
+                                            'ordinal': 1}),
+                         (('ORDINAL', '1'), ('EPOCH', '>now-1'),
+                          ('limit', '5')),
+                         'predicates were not in URL order!')
+        with self.assertRaisesRegex(KeyError, 'Unexpected argument satname',
+                                    msg='unknown key was accepted!'):
+            schema.predicates({'satname': 'ISS'})
+        prefix = st.query.url_prefix('https://host', 'basicspacedata', 'tle')
+        self.assertEqual(prefix,
+                         'https://host/basicspacedata/query/class/tle',
+                         'URL prefix was wrong!')
+        self.assertIs(st.query.url_prefix('https://host', 'basicspacedata',
+                                          'tle'), prefix,
+                      'URL prefix was not cached!')
+
+    def test_bad_request_class(self):
+        with self.assertRaisesRegex(ValueError, 'Unknown request class',
+                                    msg='bad request class was accepted!'):
+            self.client.build_query('not_a_class', norad_cat_id=1)
+
+    @mock.patch('requests.Session')
+    def test_concurrent_submit(self, session_cls):
+        session = session_cls.return_value
+        session.post.return_value = _response(text='""')
+        session.get.side_effect = lambda url, **kwargs: _response(text=url)
+        client = st.SpaceTrackClient('user', 'pass', persistent=True,
+                                     rate_limit=False)
+        queries = [client.build_query('tle_latest', norad_cat_id=i)
+                   for i in range(50)]
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            results = list(pool.map(client.submit, queries))
+        for query, result in zip(queries, results):
+            self.assertEqual(result.text, query.url,
+                             'threads got each other\'s results!')
+        self.assertEqual(session.post.call_count, 1,
+                         'threads logged in more than once!')
+
+    @mock.patch('requests.Session')
+    def test_batch_query(self, session_cls):
+        session = session_cls.return_value
+        session.post.return_value = _response(text='""')
+
+        def get(url, **kwargs):
+            res = _response()
+            ids = url.split('/NORAD_CAT_ID/')[1].split('/')[0]
+            first = ids.split(',')[0].split('--')[0]
+            # every chunk also returns object 1, which must be de-duplicated
+            res.json.return_value = [{'NORAD_CAT_ID': first},
+                                     {'NORAD_CAT_ID': '1'}]
+            return res
+
+        session.get.side_effect = get
+        client = st.SpaceTrackClient('user', 'pass', persistent=True,
+                                     rate_limit=False)
+        records = client.batch_query('tle_latest', range(1, 3000, 2),
+                                     max_url_length=400, ordinal=1)
+        urls = [c[0][0] for c in session.get.call_args_list]
+        self.assertGreater(len(urls), 1, 'IDs were not split into chunks!')
+        self.assertLess(len(urls), 100, 'IDs were not batched!')
+        self.assertTrue(all(len(u) <= 400 for u in urls),
+                        'query URL exceeded max_url_length!')
+        self.assertTrue(all('/ORDINAL/1/' in u for u in urls),
+                        'extra predicates were dropped!')
+        self.assertEqual(len(records), len(urls),
+                         'duplicate records were not removed!')
@@ -0,0 +1,76 @@
+import asyncio
+import threading
+import unittest
+from ..spacetracktool import ratelimit
+
+
+class FakeClock:
+    """ Manually advanced clock for driving the limiter. """
+
+    def __init__(self):
+        self.now = 0.
+
+    def __call__(self):
+        return self.now
+
+
+class TestRateLimiter(unittest.TestCase):
+    """ Tests the RateLimiter class of the ratelimit module. """
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.limiter = ratelimit.RateLimiter(limits=((3, 10.), (5, 100.)),
+                                             clock=self.clock)
+
+    def test_bad_limits(self):
+        with self.assertRaisesRegex(ValueError, 'positive',
+                                    msg='bad limits were accepted!'):
+            ratelimit.RateLimiter(limits=((0, 60.),))
+
+    def test_reserve(self):
+        delays = [self.limiter.reserve() for _ in range(3)]
+        self.assertEqual(delays, [0., 0., 0.], 'burst was throttled!')
+        self.assertEqual(self.limiter.reserve(), 10.,
+                         'per-period limit was not enforced!')
+        self.assertEqual(self.limiter.reserve(), 10.,
+                         'per-period limit was not enforced!')
+        # The hourly-style bucket is now empty until its first token returns.
+        self.assertEqual(self.limiter.reserve(), 100.,
+                         'second limit was not enforced!')
+
+    def test_tokens_return(self):
+        for _ in range(3):
+            self.limiter.reserve()
+        self.clock.now = 10.
+        self.assertEqual(self.limiter.reserve(), 0.,
+                         'spent token did not return after its period!')
+
+    def test_first_come_first_served(self):
+        for _ in range(3):
+            self.limiter.reserve()
+        first = self.limiter.reserve()
+        self.clock.now = 1.
+        second = self.limiter.reserve()
+        self.assertGreaterEqual(1. + second, first,
+                                'later request jumped the queue!')
+
+    def test_threads_and_tasks(self):
+        limiter = ratelimit.RateLimiter(limits=((4, 0.5),))
+        waits = []
+
+        def work():
+            waits.append(limiter.acquire())
+
+        async def tasks():
+            return await asyncio.gather(
+                *(limiter.acquire_async() for _ in range(4)))
+
+        threads = [threading.Thread(target=work) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        waits.extend(asyncio.run(tasks()))
+        self.assertEqual(len(waits), 8, 'requests were lost!')
+        self.assertEqual(sum(1 for w in waits if w > 0), 4,
+                         'second burst was not queued!')
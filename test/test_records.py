@@ -0,0 +1,121 @@
+import datetime
+import sys
+import unittest
+from unittest import mock
+from .. import spacetracktool as st
+from ..spacetracktool import records
+from .test_parsers import TLE
+from .test_space_track_client import _response
+
+ROW = {'NORAD_CAT_ID': '25544', 'OBJECT_NAME': 'ISS (ZARYA)',
+       'CLASSIFICATION_TYPE': 'U', 'INTLDES': '98067A',
+       'EPOCH': '2018-01-01 12:00:00', 'EPOCH_MICROSECONDS': '0',
+       'MEAN_MOTION': '15.54212562', 'ECCENTRICITY': '0.0003427',
+       'INCLINATION': '51.6415', 'RA_OF_ASC_NODE': '254.8361',
+       'ARG_OF_PERICENTER': '275.1843', 'MEAN_ANOMALY': '84.8974',
+       'EPHEMERIS_TYPE': '0', 'ELEMENT_SET_NO': '999',
+       'REV_AT_EPOCH': '9293', 'BSTAR': '4.0768E-5',
+       'MEAN_MOTION_DOT': '2.182E-5', 'MEAN_MOTION_DDOT': '0',
+       'FILE': '2345678', 'TLE_LINE0': '0 ISS (ZARYA)',
+       'TLE_LINE1': TLE.splitlines()[1], 'TLE_LINE2': TLE.splitlines()[2],
+       'OBJECT_TYPE': 'PAYLOAD', 'APOGEE': '409.59', 'PERIGEE': '404.97'}
+
+
+class TestTleRecord(unittest.TestCase):
+    """ Tests the TleRecord class and parsers of the records module. """
+
+    def test_from_dict(self):
+        record = records.TleRecord.from_dict(ROW)
+        self.assertEqual(record.norad_cat_id, 25544, 'ID was not an int!')
+        self.assertEqual(record.epoch, datetime.datetime(2018, 1, 1, 12),
+                         'epoch was not parsed!')
+        self.assertAlmostEqual(record.bstar, 4.0768e-5,
+                               msg='bstar was not parsed!')
+        self.assertEqual(record.apogee, 409.59, 'apogee was not kept!')
+        with self.assertRaises(AttributeError, msg='record had a __dict__!'):
+            record.extra = 1
+
+    def test_from_lines(self):
+        line0, line1, line2 = TLE.splitlines()[:3]
+        record = records.TleRecord.from_lines(line1, line2, name=line0)
+        from_dict = records.TleRecord.from_dict(ROW)
+        self.assertEqual(record.norad_cat_id, 25544, 'ID was not parsed!')
+        self.assertEqual(record.object_name, 'ISS (ZARYA)',
+                         'name was not kept!')
+        self.assertEqual(record.epoch, from_dict.epoch,
+                         'epoch was not parsed!')
+        for name in ('mean_motion', 'eccentricity', 'inclination', 'bstar',
+                     'mean_motion_dot', 'element_set_no', 'rev_at_epoch'):
+            self.assertAlmostEqual(getattr(record, name),
+                                   getattr(from_dict, name),
+                                   msg='{} was not parsed!'.format(name))
+        self.assertAlmostEqual(record.apogee, 409.6, delta=5.,
+                               msg='apogee was not derived from elements!')
+        with self.assertRaisesRegex(ValueError, 'Not a two-line',
+                                    msg='bad lines were accepted!'):
+            records.TleRecord.from_lines(line2, line1)
+
+    def test_alpha5(self):
+        line1 = TLE.splitlines()[1].replace('25544', 'A0001', 1)
+        record = records.TleRecord.from_lines(line1, TLE.splitlines()[2])
+        self.assertEqual(record.norad_cat_id, 100001,
+                         'Alpha-5 number was not decoded!')
+
+    def test_parse_tle(self):
+        three = list(records.parse_tle(TLE))
+        two = list(records.parse_tle([l for i, l in enumerate(TLE.splitlines())
+                                      if i % 3]))
+        self.assertEqual([r.norad_cat_id for r in three], [25544, 1],
+                         '3le text was not parsed!')
+        self.assertEqual([r.object_name for r in three],
+                         ['ISS (ZARYA)', 'SL-1 R/B'], 'names were lost!')
+        self.assertEqual([r.norad_cat_id for r in two], [25544, 1],
+                         'tle lines were not parsed!')
+        self.assertIsNone(two[0].object_name, 'tle record got a name!')
+
+    def test_compact(self):
+        record = records.TleRecord.from_dict(ROW)
+        self.assertLess(sys.getsizeof(record), sys.getsizeof(ROW) / 2,
+                        'record was not smaller than its dict!')
+
+    @mock.patch('requests.Session')
+    def test_client_records(self, session_cls):
+        session = session_cls.return_value
+        session.post.return_value = _response(text='""')
+        res = _response()
+        res.encoding = None
+        res.iter_content.return_value = iter([TLE.encode()])
+        session.get.return_value = res
+        client = st.SpaceTrackClient('user', 'pass', fmt='3le',
+                                     persistent=True, rate_limit=False)
+        elsets = list(client.records(client.build_query('tle_latest',
+                                                        ordinal=1)))
+        self.assertEqual([r.norad_cat_id for r in elsets], [25544, 1],
+                         'client did not yield TleRecords!')
+
+    @mock.patch('requests.Session')
+    def test_client_compact(self, session_cls):
+        session = session_cls.return_value
+        session.headers = {}
+        session.post.return_value = _response(text='""')
+        res = _response()
+        res.encoding = None
+        res.iter_content.return_value = iter([TLE.encode()])
+        session.get.return_value = res
+        client = st.SpaceTrackClient('user', 'pass', persistent=True,
+                                     rate_limit=False, compact='3le')
+        self.assertIn('gzip', session.headers['Accept-Encoding'],
+                      'client did not ask for compressed results!')
+        elsets = list(client.records(client.build_query('tle_latest',
+                                                        ordinal=1)))
+        self.assertTrue(session.get.call_args[0][0].endswith('/format/3le'),
+                        'compact mode did not request the 3le format!')
+        self.assertEqual([r.object_name for r in elsets],
+                         ['ISS (ZARYA)', 'SL-1 R/B'],
+                         'compact results were not parsed to TleRecords!')
+        url = client.build_query('tle', norad_cat_id=1).url
+        self.assertTrue(client._element_url(url).endswith('/format/3le'),
+                        'compact mode did not rewrite a URL string!')
+        url = client.build_query('satcat', norad_cat_id=1).url
+        self.assertEqual(client._element_url(url), url,
+                         'compact mode rewrote a satcat query!')
@@ -0,0 +1,169 @@
+import unittest
+from unittest import mock
+import requests
+from .. import spacetracktool as st
+from ..spacetracktool import retry
+from .test_ratelimit import FakeClock
+
+URL = 'https://www.space-track.org/basicspacedata/query/class/tle/format/json'
+
+
+def _response(status_code=200, text='', headers=None):
+    """ Builds a canned response object for mocked sessions. """
+    res = mock.Mock(spec=requests.Response)
+    res.status_code = status_code
+    res.ok = status_code < 400
+    res.text = text
+    res.headers = headers or {}
+    if not res.ok:
+        res.raise_for_status.side_effect = requests.exceptions.HTTPError(
+            response=res)
+    return res
+
+
+class TestRetryPolicy(unittest.TestCase):
+    """ Tests the RetryPolicy class and helpers of the retry module. """
+
+    def test_parse_retry_after(self):
+        self.assertEqual(retry.parse_retry_after('120'), 120.,
+                         'seconds were not parsed!')
+        self.assertEqual(retry.parse_retry_after(
+            'Thu, 01 Jan 1970 00:01:00 GMT', now=0.), 60.,
+                         'HTTP date was not parsed!')
+        self.assertIsNone(retry.parse_retry_after(None),
+                          'missing header was not None!')
+        self.assertIsNone(retry.parse_retry_after('soon'),
+                          'bad header was not None!')
+
+    def test_delay(self):
+        policy = st.RetryPolicy(backoff=1., max_backoff=5., jitter=False)
+        delays = [policy.delay(attempt) for attempt in range(4)]
+        self.assertEqual(delays, [1., 2., 4., 5.],
+                         'backoff was not exponential and capped!')
+        self.assertEqual(policy.delay(0, retry_after=3.), 3.,
+                         'Retry-After was not honoured!')
+        jittered = st.RetryPolicy(backoff=1.).delay(2)
+        self.assertTrue(0. <= jittered <= 4., 'jitter exceeded the backoff!')
+
+    def test_allow(self):
+        policy = st.RetryPolicy(max_retries=2)
+        self.assertTrue(policy.allow(URL, 0), 'first retry was refused!')
+        self.assertFalse(policy.allow(URL, 2), 'max_retries was exceeded!')
+        self.assertFalse(policy.allow('https://www.space-track.org/ajaxauth/'
+                                      'login', 0),
+                         'non-query request was retried!')
+
+    def test_budget(self):
+        clock = FakeClock()
+        policy = st.RetryPolicy(budget=2, budget_period=10., clock=clock)
+        allowed = [policy.allow(URL, 0) for _ in range(3)]
+        self.assertEqual(allowed, [True, True, False],
+                         'retry budget was not enforced!')
+        clock.now = 10.
+        self.assertTrue(policy.allow(URL, 0), 'retry budget did not refill!')
+
+
+class TestCircuitBreaker(unittest.TestCase):
+    """ Tests the CircuitBreaker class of the retry module. """
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.breaker = st.CircuitBreaker(failure_threshold=2,
+                                         reset_timeout=30., clock=self.clock)
+
+    def test_opens_after_failures(self):
+        self.breaker.record_failure()
+        self.breaker.before_request()
+        self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, 'open', 'circuit did not open!')
+        with self.assertRaises(st.CircuitOpenError,
+                               msg='open circuit let a request through!'):
+            self.breaker.before_request()
+
+    def test_half_open_trial(self):
+        self.breaker.record_failure()
+        self.breaker.record_failure()
+        self.clock.now = 30.
+        self.assertEqual(self.breaker.state, 'half-open',
+                         'circuit did not half-open after the timeout!')
+        self.breaker.before_request()
+        with self.assertRaises(st.CircuitOpenError,
+                               msg='second trial request was let through!'):
+            self.breaker.before_request()
+        self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, 'open',
+                         'failed trial did not reopen the circuit!')
+        self.clock.now = 60.
+        self.breaker.before_request()
+        self.breaker.record_success()
+        self.assertEqual(self.breaker.state, 'closed',
+                         'successful trial did not close the circuit!')
+
+
+class TestClientRetry(unittest.TestCase):
+    """ Tests retries made by SpaceTrackClient. """
+
+    def setUp(self):
+        patcher = mock.patch('requests.Session')
+        self.session = patcher.start().return_value
+        self.addCleanup(patcher.stop)
+        self.session.post.return_value = _response(text='""')
+        self.client = st.SpaceTrackClient(
+            'user', 'pass', persistent=True, rate_limit=False,
+            retry=st.RetryPolicy(backoff=0.))
+
+    def test_retries_unavailable(self):
+        self.session.get.side_effect = [_response(503), _response(text='[]')]
+        result = self.client.tle_query(norad_cat_id=12345)
+        self.assertTrue(result.ok, '503 response was not retried!')
+        self.assertEqual(result.retries, 1, 'retry was not counted!')
+
+    def test_retries_connection_error(self):
+        self.session.get.side_effect = [requests.exceptions.ConnectionError(),
+                                        _response(text='[]')]
+        result = self.client.tle_query(norad_cat_id=12345)
+        self.assertTrue(result.ok, 'connection error was not retried!')
+
+    def test_gives_up(self):
+        self.session.get.side_effect = lambda url, **kwargs: _response(503)
+        with self.assertRaises(requests.exceptions.HTTPError,
+                               msg='persistent 503 did not raise!'):
+            self.client.tle_query(norad_cat_id=12345)
+        self.assertEqual(self.session.get.call_count, 4,
+                         'max_retries was not respected!')
+
+    def test_circuit_breaker(self):
+        client = st.SpaceTrackClient(
+            'user', 'pass', persistent=True, rate_limit=False, retry=None,
+            circuit_breaker=st.CircuitBreaker(failure_threshold=1))
+        self.session.get.side_effect = lambda url, **kwargs: _response(503)
+        with self.assertRaises(requests.exceptions.HTTPError,
+                               msg='503 did not raise!'):
+            client.tle_query(norad_cat_id=12345)
+        with self.assertRaises(st.CircuitOpenError,
+                               msg='open circuit did not fail fast!'):
+            client.tle_query(norad_cat_id=12345)
+        self.assertEqual(self.session.get.call_count, 1,
+                         'request was sent through an open circuit!')
+
+    def test_failed_trial_login(self):
+        clock = FakeClock()
+        breaker = st.CircuitBreaker(failure_threshold=1, reset_timeout=30.,
+                                    clock=clock)
+        client = st.SpaceTrackClient('user', 'pass', persistent=True,
+                                     rate_limit=False, retry=None,
+                                     circuit_breaker=breaker)
+        breaker.record_failure()
+        clock.now = 31.
+        self.session.post.return_value = _response(500)
+        with self.assertRaises(requests.exceptions.HTTPError,
+                               msg='rejected login did not raise!'):
+            client.tle_query(norad_cat_id=12345)
+        self.assertEqual(breaker.state, 'open',
+                         'failed trial did not open the circuit!')
+        clock.now = 62.
+        self.session.post.return_value = _response(text='""')
+        self.session.get.side_effect = lambda url, **kwargs: _response(
+            text='[]')
+        self.assertTrue(client.tle_query(norad_cat_id=12345).ok,
+                        'circuit stayed open after a failed trial!')
@@ -0,0 +1,82 @@
+import unittest
+from ..spacetracktool import columns, propagation, screening
+from .test_parsers import TLE
+
+try:
+    import numpy as np
+    from sgp4.api import Satrec
+except ImportError:
+    np = None
+
+
+@unittest.skipIf(np is None, 'numpy or sgp4 is not installed')
+class TestScreening(unittest.TestCase):
+    """ Tests the screening module. """
+
+    def setUp(self):
+        elements = columns.from_tle(TLE)
+        twin = elements[:1].copy()  # trails the ISS by about 1 km
+        twin['norad_cat_id'] = 99999
+        twin['mean_anomaly'] += 0.01
+        geo = elements[:1].copy()
+        geo['norad_cat_id'] = 88888
+        geo['mean_motion'] = 1.0027
+        geo['perigee'], geo['apogee'] = 35780., 35790.
+        self.catalog = np.concatenate([elements, twin, geo])
+        self.start = elements['epoch'][0]
+        self.stop = self.start + np.timedelta64(3, 'h')
+
+    def test_overlapping_shells(self):
+        overlaps = screening.overlapping_shells(
+            [400., 402., 900., 35780.], [410., 405., 930., 35790.], pad=5.)
+        self.assertEqual(overlaps.tolist(), [True, True, False, False],
+                         'wrong shells overlap!')
+        self.assertTrue(screening.overlapping_shells(
+            [900., np.nan], [930., np.nan]).all(),
+                        'object of unknown altitude was dropped!')
+        self.assertTrue(screening.overlapping_shells(
+            [400., 414.], [405., 420.], pad=5.).all(),
+                        'shells within twice the pad do not overlap!')
+
+    def test_pair_searches_agree(self):
+        points = np.random.default_rng(0).uniform(-100., 100., (2000, 3))
+        expected = {tuple(pair) for pair in
+                    screening.kdtree_pairs(points, 5.).tolist()}
+        found = screening.grid_pairs(points, 5.).tolist()
+        self.assertEqual(len(found), len(expected), 'pair found twice!')
+        self.assertEqual(set(map(tuple, found)), expected,
+                         'grid and k-d tree found different pairs!')
+
+    def test_screen(self):
+        for method in ('kdtree', 'grid'):
+            events = screening.screen(self.catalog, self.start, self.stop,
+                                      threshold=5., method=method)
+            self.assertEqual(
+                events[['norad_cat_id_1', 'norad_cat_id_2']].tolist(),
+                [(25544, 99999)], 'wrong pairs were reported!')
+            self.assertLess(events['distance'][0], 5.,
+                            'miss distance is over the threshold!')
+
+    def test_closest_approach(self):
+        events = screening.screen(self.catalog[[0, 2]], self.start,
+                                  self.stop, threshold=5.)
+        whole, fraction = propagation.julian_dates(events['time'])
+        lines = TLE.splitlines()
+        _, iss, _ = Satrec.twoline2rv(lines[1], lines[2]).sgp4_array(
+            whole, fraction)
+        twin = propagation.propagate(self.catalog[2:3], events['time'])
+        self.assertAlmostEqual(
+            np.linalg.norm(twin.positions[0, 0] - iss[0]),
+            events['distance'][0], places=3, msg='wrong miss distance!')
+
+    def test_workers(self):
+        expected = screening.screen(self.catalog, self.start, self.stop)
+        events = screening.screen(self.catalog, self.start, self.stop,
+                                  workers=2, block=7)
+        np.testing.assert_array_equal(events, expected,
+                                      err_msg='workers changed the result!')
+
+    def test_bad_method(self):
+        with self.assertRaises(ValueError, msg='bad method was accepted!'):
+            screening.screen(self.catalog, self.start, self.stop,
+                             method='brute')
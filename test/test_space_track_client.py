@@ -1,5 +1,11 @@
+import gzip
+import io
+import os
+import tempfile
 import unittest
+from unittest import mock
 import requests
+import urllib3
 from .. import spacetracktool as st
 
 
@@ -167,3 +173,175 @@ class TestSpaceTrackClient(unittest.TestCase):
             with self.assertWarnsRegex(Warning, 'not supported',
                                        msg='organization_query did not raise expected warning!'):
                 self.client.organization_query()
+
+
+def _response(status_code=200, text=''):
+    """ Builds a canned response object for mocked sessions. """
+    res = mock.Mock(spec=requests.Response)
+    res.status_code = status_code
+    res.ok = status_code < 400
+    res.text = text
+    return res
+
+
+class TestPersistentSession(unittest.TestCase):
+    """ Tests the session-backed mode of SpaceTrackClient. """
+
+    def setUp(self):
+        patcher = mock.patch('requests.Session')
+        self.session = patcher.start().return_value
+        self.addCleanup(patcher.stop)
+        self.session.post.return_value = _response(text='""')
+        self.session.get.return_value = _response(text='[]')
+        self.client = st.SpaceTrackClient('user', 'pass', persistent=True)
+
+    def test_logs_in_once(self):
+        self.client.tle_query(norad_cat_id=12345)
+        self.client.satcat_query(norad_cat_id=12345)
+        self.assertEqual(self.session.post.call_count, 1,
+                         'client did not reuse its login!')
+        self.assertEqual(self.session.get.call_count, 2,
+                         'queries were not sent as plain GETs!')
+        url = self.session.get.call_args[0][0]
+        self.assertEqual(url,
+                         'https://www.space-track.org/basicspacedata/query/class/satcat/NORAD_CAT_ID/12345/format/json',
+                         'GET was not sent to the compiled query!')
+
+    def test_relogin_on_expired_cookie(self):
+        self.client.tle_query(norad_cat_id=12345)
+        self.session.get.side_effect = [_response(401), _response(text='[]')]
+        result = self.client.tle_query(norad_cat_id=12345)
+        self.assertTrue(result.ok, 'query was not retried after login!')
+        self.assertEqual(self.session.post.call_count, 2,
+                         'client did not log in again on 401!')
+
+    def test_failed_login(self):
+        self.session.post.return_value = _response(text='{"Login":"Failed"}')
+        with self.assertRaisesRegex(requests.exceptions.HTTPError, 'Login failed',
+                                    msg='bad login did not raise!'):
+            self.client.tle_query(norad_cat_id=12345)
+
+    def test_context_manager_logs_out(self):
+        with self.client as client:
+            client.tle_query(norad_cat_id=12345)
+        self.assertEqual(self.session.post.call_args[0][0],
+                         'https://www.space-track.org/ajaxauth/logout',
+                         'closing the client did not log out!')
+        self.session.close.assert_called_once_with()
+
+    def test_rate_limit(self):
+        limiter = st.RateLimiter(limits=((1, 0.05),))
+        client = st.SpaceTrackClient('user', 'pass', persistent=True,
+                                     rate_limit=limiter)
+        self.session.get.side_effect = lambda url, **kwargs: _response(text='[]')
+        first = client.tle_query(norad_cat_id=12345)
+        second = client.tle_query(norad_cat_id=12345)
+        self.assertEqual(first.queue_wait, 0., 'first query was delayed!')
+        self.assertGreater(second.queue_wait, 0.,
+                           'second query was not rate limited!')
+
+
+class _Raw(io.BytesIO):
+    """ A response body that can drop its connection part-way. """
+
+    def __init__(self, data, fail_after=None):
+        super().__init__(data)
+        self.fail_after = fail_after
+
+    def stream(self, chunk_size, decode_content=True):
+        while True:
+            if self.fail_after is not None and self.tell() >= self.fail_after:
+                raise urllib3.exceptions.ProtocolError('connection dropped')
+            chunk = self.read(chunk_size)
+            if not chunk:
+                return
+            yield chunk
+
+
+def _stream_response(data, status_code=200, headers=None, fail_after=None):
+    """ Builds a streamed response for mocked sessions. """
+    res = requests.Response()
+    res.status_code = status_code
+    res.headers.update(headers or {})
+    res.raw = _Raw(data, fail_after)
+    return res
+
+
+class TestSubmitToFile(unittest.TestCase):
+    """ Tests the submit_to_file method of SpaceTrackClient. """
+
+    def setUp(self):
+        patcher = mock.patch('requests.Session')
+        self.session = patcher.start().return_value
+        self.addCleanup(patcher.stop)
+        self.session.post.return_value = _response(text='""')
+        self.client = st.SpaceTrackClient(
+            'user', 'pass', persistent=True, rate_limit=False,
+            retry=st.RetryPolicy(backoff=0., budget=None))
+        self.query = self.client.build_query('tle', norad_cat_id=1)
+        self.data = bytes(range(256)) * 4
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.path = os.path.join(tmp.name, 'tle.json')
+
+    def _read(self, path=None):
+        with open(path or self.path, 'rb') as result:
+            return result.read()
+
+    def test_writes_file(self):
+        self.session.get.return_value = _stream_response(self.data)
+        res = self.client.submit_to_file(self.path, self.query,
+                                         chunk_size=100)
+        self.assertEqual(self._read(), self.data, 'file content was wrong!')
+        self.assertFalse(os.path.exists(self.path + '.part'),
+                         'partial file was left behind!')
+        self.assertEqual(res.bytes_received, len(self.data),
+                         'received bytes were not counted!')
+        out = io.BytesIO()
+        self.session.get.return_value = _stream_response(self.data)
+        self.client.submit_to_file(out, self.query)
+        self.assertEqual(out.getvalue(), self.data,
+                         'file-like object was not written!')
+
+    def test_resumes(self):
+        self.session.get.side_effect = [
+            _stream_response(self.data, fail_after=400),
+            _stream_response(self.data[400:], status_code=206)]
+        res = self.client.submit_to_file(self.path, self.query,
+                                         chunk_size=100)
+        self.assertEqual(self._read(), self.data,
+                         'resumed file content was wrong!')
+        headers = self.session.get.call_args[1]['headers']
+        self.assertEqual(headers['Range'], 'bytes=400-',
+                         'download did not resume where it stopped!')
+        self.assertEqual(res.retries, 1, 'resume was not counted!')
+
+    def test_restarts_on_full_body(self):
+        with open(self.path + '.part', 'wb') as part:
+            part.write(b'stale')
+        self.session.get.return_value = _stream_response(self.data)
+        self.client.submit_to_file(self.path, self.query)
+        self.assertEqual(self._read(), self.data,
+                         'full body was appended to the partial file!')
+
+    def test_no_resume(self):
+        self.session.get.return_value = _stream_response(self.data,
+                                                         fail_after=400)
+        with self.assertRaises(requests.exceptions.ChunkedEncodingError,
+                               msg='dropped connection was ignored!'):
+            self.client.submit_to_file(self.path, self.query, resume=False,
+                                       chunk_size=100)
+        self.assertFalse(os.path.exists(self.path),
+                         'partial download was renamed into place!')
+
+    def test_compress(self):
+        self.session.get.return_value = _stream_response(self.data)
+        self.client.submit_to_file(self.path, self.query, compress=True)
+        self.assertEqual(gzip.decompress(self._read()), self.data,
+                         'body was not compressed!')
+        body = gzip.compress(self.data)
+        self.session.get.return_value = _stream_response(
+            body, headers={'Content-Encoding': 'gzip'})
+        self.client.submit_to_file(self.path, self.query, compress=True)
+        self.assertEqual(self._read(), body,
+                         'gzipped body was not written as it arrived!')
@@ -0,0 +1,94 @@
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+from .. import spacetracktool as st
+from ..spacetracktool import store, sync
+from .test_space_track_client import _response
+
+try:
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+ELSETS = [
+    {'NORAD_CAT_ID': '25544', 'EPOCH': '2018-01-01 12:00:00',
+     'OBJECT_TYPE': 'PAYLOAD', 'FILE': '10', 'INCLINATION': '51.6415'},
+    {'NORAD_CAT_ID': '25544', 'EPOCH': '2018-01-02 12:00:00',
+     'OBJECT_TYPE': 'PAYLOAD', 'FILE': '12', 'INCLINATION': '51.6400'},
+    {'NORAD_CAT_ID': '43013', 'EPOCH': '2018-01-01 06:00:00',
+     'OBJECT_TYPE': 'PAYLOAD', 'FILE': '11', 'INCLINATION': '98.7'},
+]
+
+
+class TestCatalogStore(unittest.TestCase):
+    """ Tests the CatalogStore class of the store module. """
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.store = store.CatalogStore(os.path.join(self.directory, 'db'))
+        self.addCleanup(self.store.close)
+        self.store.upsert(ELSETS)
+
+    def test_upsert(self):
+        self.store.upsert([dict(ELSETS[0], FILE='13')])
+        elsets = self.store.find('tle', norad_cat_id=25544)
+        self.assertEqual([row['FILE'] for row in elsets], ['13', '12'],
+                         'upsert did not replace the stored copy!')
+
+    def test_find(self):
+        latest = self.store.find('tle_latest')
+        self.assertEqual([row['FILE'] for row in latest], ['12', '11'],
+                         'latest element sets were not found!')
+        sun_sync = self.store.find('tle_latest', inclination=(97., 99.))
+        self.assertEqual([row['NORAD_CAT_ID'] for row in sun_sync], ['43013'],
+                         'range lookup returned the wrong objects!')
+        early = self.store.find('tle', epoch=(None, '2018-01-02'))
+        self.assertEqual(len(early), 2, 'epoch range lookup failed!')
+        with self.assertRaises(KeyError, msg='unindexed column was accepted!'):
+            self.store.find('tle', comment='x')
+
+    def test_get(self):
+        found = self.store.get('tle_latest', [25544, 1])
+        self.assertEqual(list(found), [25544], 'get found the wrong IDs!')
+        self.assertEqual(found[25544]['FILE'], '12',
+                         'get did not return the latest element set!')
+        self.assertEqual(self.store.get('tle_latest', [25544], max_age=-1.),
+                         {}, 'max_age did not skip old records!')
+
+    def test_state_and_sync(self):
+        client = st.SpaceTrackClient('user', 'pass', rate_limit=False)
+        with mock.patch.object(client, 'submit',
+                               return_value=iter(ELSETS[1:])):
+            sync.TleSync(client, self.store).run()
+        self.assertEqual(self.store.get_state('tle_file'), 12,
+                         'sync state was not stored!')
+
+    @unittest.skipIf(pyarrow is None, 'pyarrow is not installed')
+    def test_to_parquet(self):
+        path = os.path.join(self.directory, 'tle.parquet')
+        self.store.to_parquet(path, norad_cat_id=25544)
+        table = pyarrow.parquet.read_table(path)
+        self.assertEqual(table.column('INCLINATION').to_pylist(),
+                         [51.6415, 51.64], 'elements were not exported!')
+
+    @mock.patch('requests.Session')
+    def test_client_lookup(self, session_cls):
+        session = session_cls.return_value
+        session.post.return_value = _response(text='""')
+        res = _response(text='[]')
+        res.json.return_value = [{'NORAD_CAT_ID': '1', 'FILE': '9',
+                                  'EPOCH': '2018-01-01 00:00:00'}]
+        session.get.return_value = res
+        client = st.SpaceTrackClient('user', 'pass', persistent=True,
+                                     rate_limit=False, store=self.store)
+        found = client.lookup('tle_latest', [1, 25544])
+        self.assertEqual(sorted(found), [1, 25544],
+                         'lookup did not merge local and remote records!')
+        self.assertIn('/NORAD_CAT_ID/1/', session.get.call_args[0][0],
+                      'lookup queried IDs that were stored locally!')
+        client.lookup('tle_latest', [1])
+        self.assertEqual(session.get.call_count, 1,
+                         'stored record was fetched again!')
@@ -0,0 +1,65 @@
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+from .. import spacetracktool as st
+from ..spacetracktool import sync
+
+
+class TestTleSync(unittest.TestCase):
+    """ Tests the TleSync and JsonLinesStore classes of the sync module. """
+
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        self.store = sync.JsonLinesStore(os.path.join(directory, 'tle.jsonl'))
+        self.client = st.SpaceTrackClient('user', 'pass', rate_limit=False)
+        self.pages = [
+            [{'NORAD_CAT_ID': '1', 'FILE': '10'},
+             {'NORAD_CAT_ID': '2', 'FILE': '12'}],
+            [{'NORAD_CAT_ID': '1', 'FILE': '15'}],
+            [],
+        ]
+        self.urls = []
+
+        def submit(query, stream=False):
+            self.urls.append(query.url)
+            return iter(self.pages.pop(0))
+
+        patcher = mock.patch.object(self.client, 'submit', side_effect=submit)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_run(self):
+        tle_sync = sync.TleSync(self.client, self.store, batch_size=1,
+                                object_type='PAYLOAD')
+        self.assertEqual(tle_sync.run(), 2, 'first run lost records!')
+        self.assertIn('/class/tle_latest/ORDINAL/1/OBJECT_TYPE/PAYLOAD/',
+                      self.urls[0], 'first run did not pull latest elsets!')
+        self.assertEqual(tle_sync.high_water_mark, 12,
+                         'high-water mark was not recorded!')
+        self.assertEqual(tle_sync.run(), 1, 'second run lost records!')
+        self.assertIn('/class/tle/OBJECT_TYPE/PAYLOAD/FILE/>12/',
+                      self.urls[1], 'second run did not ask for new files!')
+        self.assertEqual(tle_sync.run(), 0, 'empty run found records!')
+        self.assertEqual(tle_sync.high_water_mark, 15,
+                         'empty run changed the high-water mark!')
+        self.assertEqual([r['FILE'] for r in self.store.records()],
+                         ['10', '12', '15'], 'records were not merged!')
+
+    def test_rerun_after_failure(self):
+        records = [{'NORAD_CAT_ID': '1', 'FILE': '10'},
+                   {'NORAD_CAT_ID': '2', 'FILE': '10'}]
+        self.store.upsert(records[:1])
+        store = sync.JsonLinesStore(self.store._path)  # as a new process
+        store.upsert(records)
+        store.upsert(records)
+        self.assertEqual(list(store.records()), records,
+                         'element sets fetched again were duplicated!')
+
+    def test_requires_json(self):
+        client = st.SpaceTrackClient('user', 'pass', fmt='csv')
+        with self.assertRaisesRegex(ValueError, 'json',
+                                    msg='non-JSON client was accepted!'):
+            sync.TleSync(client, self.store)